@@ -0,0 +1,119 @@
+"""Per-venue availability index.
+
+Each venue keeps one ``VenueCalendarMonth`` row per calendar month whose
+``booked_days`` column is a bitmap of the days taken by active venue bookings
+(bit 0 = day 1). Reading a 60-90 day window is a single query over at most
+four rows, instead of one ``exists()`` query per day.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def _month_masks(dates):
+    masks = defaultdict(int)
+    for day in dates:
+        masks[month_start(day)] |= 1 << (day.day - 1)
+    return masks
+
+
+def mark_booked(venue_id, dates):
+    """Set the bits for ``dates`` in the venue's calendar."""
+    from .models import VenueCalendarMonth
+
+    for month, mask in _month_masks(dates).items():
+        rows = VenueCalendarMonth.objects.filter(venue_id=venue_id, month=month)
+        if rows.update(booked_days=F('booked_days').bitor(mask)):
+            continue
+        try:
+            with transaction.atomic():
+                VenueCalendarMonth.objects.create(venue_id=venue_id, month=month, booked_days=mask)
+        except IntegrityError:
+            # Another request created the month row first
+            rows.update(booked_days=F('booked_days').bitor(mask))
+
+
+def mark_free(venue_id, dates):
+    """Clear the bits for ``dates`` in the venue's calendar."""
+    from .models import VenueCalendarMonth
+
+    for month, mask in _month_masks(dates).items():
+        VenueCalendarMonth.objects.filter(venue_id=venue_id, month=month).update(
+            booked_days=F('booked_days').bitand(~mask)
+        )
+
+
+def booked_dates(venue_id, start, end):
+    """Return the sorted list of booked dates between ``start`` and ``end`` (inclusive)."""
+    from .models import VenueCalendarMonth
+
+    months = VenueCalendarMonth.objects.filter(
+        venue_id=venue_id,
+        month__gte=month_start(start),
+        month__lte=end,
+        booked_days__gt=0,
+    ).values_list('month', 'booked_days')
+
+    booked = []
+    for month, mask in months:
+        day = 1
+        while mask:
+            if mask & 1:
+                current = month.replace(day=day)
+                if start <= current <= end:
+                    booked.append(current)
+            mask >>= 1
+            day += 1
+    return sorted(booked)
+
+
+def date_range(start, end):
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def rebuild(venue_ids=None):
+    """Recompute the calendar (and the occupancy totals kept on it) from the
+    active venue bookings.
+
+    Returns the number of month rows written.
+    """
+    from .models import VenueBooking, VenueCalendarMonth
+    from .occupancy import month_shares
+
+    bookings = VenueBooking.objects.filter(status__in=ACTIVE_STATUSES)
+    months = VenueCalendarMonth.objects.all()
+    if venue_ids is not None:
+        bookings = bookings.filter(venue_id__in=venue_ids)
+        months = months.filter(venue_id__in=venue_ids)
+
+    masks = defaultdict(int)
+    totals = defaultdict(lambda: [0, 0])
+    rows = bookings.values_list('venue_id', 'event_date', 'end_date', 'total_price')
+    for venue_id, start, end, price in rows.iterator():
+        for day in date_range(start, end):
+            masks[(venue_id, month_start(day))] |= 1 << (day.day - 1)
+        for month, revenue in month_shares(start, end, price).items():
+            totals[(venue_id, month)][0] += 1
+            totals[(venue_id, month)][1] += revenue
+
+    with transaction.atomic():
+        months.delete()
+        VenueCalendarMonth.objects.bulk_create(
+            [
+                VenueCalendarMonth(
+                    venue_id=venue_id, month=month, booked_days=mask,
+                    bookings=totals[(venue_id, month)][0], revenue=totals[(venue_id, month)][1],
+                )
+                for (venue_id, month), mask in masks.items()
+            ],
+            batch_size=1000,
+        )
+    return len(masks)
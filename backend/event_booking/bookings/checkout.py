@@ -0,0 +1,101 @@
+"""Multi-item checkout: several event bookings (and optionally a venue booking)
+in one request and one transaction.
+
+Prices come from one bulk ``in_bulk`` read of the events, tickets are taken
+with one conditional inventory update per event, the bookings are written
+with a single ``bulk_create`` and the sales rollup gets one update per event.
+"""
+from collections import Counter
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from rest_framework import serializers
+
+from event_booking import response_cache
+from events import inventory
+from events.models import Event
+from . import rollups
+from .models import Booking, bookings_namespace
+from .serializers import VenueBookingSerializer
+
+MAX_ITEMS = 50
+
+
+class CheckoutItemSerializer(serializers.Serializer):
+    # A plain id: events are fetched in one query for the whole basket
+    event = serializers.IntegerField(min_value=1)
+    num_tickets = serializers.IntegerField(min_value=1)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    items = CheckoutItemSerializer(many=True, required=False, default=list)
+    venue_booking = serializers.DictField(required=False)
+
+    def validate_items(self, value):
+        if len(value) > MAX_ITEMS:
+            raise serializers.ValidationError(f"A checkout can contain at most {MAX_ITEMS} items.")
+        return value
+
+    def validate(self, data):
+        if not data['items'] and not data.get('venue_booking'):
+            raise serializers.ValidationError("Nothing to check out.")
+        return data
+
+
+def checkout(user, items, venue_booking=None, context=None):
+    """Book every item for ``user`` or nothing at all.
+
+    Returns ``(bookings, venue_booking)``; raises DRF ``ValidationError``.
+    """
+    wanted = Counter()
+    for item in items:
+        wanted[item['event']] += item['num_tickets']
+
+    with transaction.atomic():
+        events = Event.objects.in_bulk(list(wanted))
+        missing = sorted(set(wanted) - set(events))
+        if missing:
+            raise serializers.ValidationError({'items': [f"Event {event_id} does not exist." for event_id in missing]})
+        queued = [event.title for event in events.values() if event.waiting_room]
+        if queued:
+            raise serializers.ValidationError(
+                {'items': [f"'{title}' uses a waiting room; book it on its own." for title in queued]}
+            )
+
+        # Take tickets in a stable order so concurrent checkouts cannot deadlock
+        for event_id in sorted(wanted):
+            try:
+                inventory.reserve(event_id, wanted[event_id])
+            except DjangoValidationError as exc:
+                raise serializers.ValidationError({'items': [f"{events[event_id].title}: {exc.messages[0]}"]})
+
+        bookings = [
+            Booking(
+                user=user,
+                event=events[item['event']],
+                num_tickets=item['num_tickets'],
+                total_price=events[item['event']].price * item['num_tickets'],
+            )
+            for item in items
+        ]
+        Booking.objects.bulk_create(bookings)
+        if bookings and bookings[0].pk is None:
+            # Backends without INSERT ... RETURNING (MySQL) do not hand back ids;
+            # the rows are this transaction's newest bookings for the user
+            bookings = list(Booking.objects.filter(user=user).order_by('-id')[:len(bookings)])[::-1]
+        # bulk_create skips Booking.save(), so roll the sales up here: one
+        # update per event rather than per booking
+        rollups.apply('event', [(None, rollups.booking_share(booking)) for booking in bookings])
+        if bookings:
+            response_cache.bump(bookings_namespace(user.pk))
+
+        venue = None
+        if venue_booking:
+            serializer = VenueBookingSerializer(data=venue_booking, context=context or {})
+            try:
+                serializer.is_valid(raise_exception=True)
+                venue = serializer.save(user=user)
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError({'venue_booking': exc.detail})
+
+    return bookings, venue
@@ -0,0 +1,107 @@
+"""Streaming CSV/JSONL exports of bookings for finance.
+
+The rows are read in keyset-paginated batches (``id > last id``, ``CHUNK_SIZE``
+at a time), each through ``.iterator()``, and written out as they arrive by a
+``StreamingHttpResponse``. At no point does the whole export sit in memory,
+on the web server or in the database driver, however many rows there are.
+Backends that cannot stream a single result set (MySQL's default cursor
+buffers it client-side) still only ever hold one batch.
+"""
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+CHUNK_SIZE = 2000
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to the caller."""
+    def write(self, value):
+        return value
+
+
+def parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: ["Use the YYYY-MM-DD format."]})
+
+
+def filter_booking_date(queryset, params):
+    """Apply the inclusive ``?from=`` / ``?to=`` dates to ``booking_date``."""
+    start, end = parse_date(params, 'from'), parse_date(params, 'to')
+    if start and end and end < start:
+        raise ValidationError({'to': ["Must not be before 'from'."]})
+    # Datetime bounds rather than __date lookups, so the booking_date index is used
+    if start:
+        queryset = queryset.filter(booking_date__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end:
+        queryset = queryset.filter(
+            booking_date__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+        )
+    return queryset
+
+
+def rows(queryset, fields, chunk_size=None):
+    """Yield ``queryset``'s rows as value tuples of ``fields`` (``'id'`` first), in id order."""
+    chunk_size = chunk_size or CHUNK_SIZE
+    last_id = 0
+    while True:
+        count = 0
+        batch = queryset.filter(id__gt=last_id).order_by('id').values_list(*fields)[:chunk_size]
+        for row in batch.iterator(chunk_size=chunk_size):
+            count += 1
+            last_id = row[0]
+            yield row
+        if count < chunk_size:
+            return
+
+
+def _csv_cell(value):
+    """Defuse user-supplied text that a spreadsheet would evaluate (CSV injection)."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_lines(header, values):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in values:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def _jsonl_lines(header, values):
+    for row in values:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def stream(request, queryset, columns, filename):
+    """Export ``queryset`` as ``?file_format=csv`` (default) or ``jsonl``.
+
+    ``columns`` maps output column names to ``values_list`` lookups, ``id`` first.
+    """
+    fmt = request.query_params.get('file_format', 'csv')
+    if fmt not in FORMATS:
+        raise ValidationError({'file_format': [f"Must be one of {', '.join(FORMATS)}."]})
+    queryset = filter_booking_date(queryset, request.query_params)
+    header = list(columns)
+    values = rows(queryset, list(columns.values()))
+    lines = _csv_lines(header, values) if fmt == 'csv' else _jsonl_lines(header, values)
+    response = StreamingHttpResponse(lines, content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
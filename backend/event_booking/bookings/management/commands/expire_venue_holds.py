@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bookings import reservations
+
+
+class Command(BaseCommand):
+    help = "Cancel pending venue bookings whose hold has expired and free their dates."
+
+    def handle(self, *args, **options):
+        expired = reservations.expire_holds()
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} venue hold(s)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bookings import rollups
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild the daily event and venue sales rollups from the bookings."
+
+    def handle(self, *args, **options):
+        events, venues = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {events} event and {venues} venue sales day(s)."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from bookings import availability
+
+
+class Command(BaseCommand):
+    help = "Rebuild the venue availability calendar from the active venue bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venue', type=int, action='append', dest='venues',
+                            help="Only rebuild the given venue id (repeatable).")
+
+    def handle(self, *args, **options):
+        rows = availability.rebuild(options['venues'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} calendar month(s)."))
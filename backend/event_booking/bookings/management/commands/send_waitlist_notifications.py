@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from bookings import waitlist
+
+
+class Command(BaseCommand):
+    help = "Email users whose waitlist entries have been promoted to bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        sent = waitlist.send_notifications(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} waitlist notification(s)."))
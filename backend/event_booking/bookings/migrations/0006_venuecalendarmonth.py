@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:24
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.db import migrations, models
+
+
+def build_calendar(apps, schema_editor):
+    VenueBooking = apps.get_model('bookings', 'VenueBooking')
+    VenueCalendarMonth = apps.get_model('bookings', 'VenueCalendarMonth')
+
+    masks = defaultdict(int)
+    active = VenueBooking.objects.filter(status__in=['pending', 'confirmed'])
+    for venue_id, event_date in active.values_list('venue_id', 'event_date').iterator():
+        masks[(venue_id, event_date.replace(day=1))] |= 1 << (event_date.day - 1)
+
+    VenueCalendarMonth.objects.bulk_create(
+        [
+            VenueCalendarMonth(venue_id=venue_id, month=month, booked_days=mask)
+            for (venue_id, month), mask in masks.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_remove_booking_purpose'),
+        ('venue', '0002_venue_description_venue_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueCalendarMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('booked_days', models.BigIntegerField(default=0)),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_months', to='venue.venue')),
+            ],
+            options={
+                'unique_together': {('venue', 'month')},
+            },
+        ),
+        migrations.RunPython(build_calendar, migrations.RunPython.noop),
+    ]
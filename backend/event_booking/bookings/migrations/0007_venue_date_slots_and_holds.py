@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_slots(apps, schema_editor):
+    VenueBooking = apps.get_model('bookings', 'VenueBooking')
+    VenueDateSlot = apps.get_model('bookings', 'VenueDateSlot')
+
+    active = VenueBooking.objects.filter(status__in=['pending', 'confirmed'])
+    VenueDateSlot.objects.bulk_create(
+        [
+            VenueDateSlot(venue_id=venue_id, date=event_date, booking_id=booking_id)
+            for booking_id, venue_id, event_date in active.values_list('id', 'venue_id', 'event_date').iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_venuecalendarmonth'),
+        ('venue', '0002_venue_description_venue_price'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueDateSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='venuebooking',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='venuebooking',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='venuebooking',
+            index=models.Index(fields=['status', 'hold_expires_at'], name='bookings_ve_status_4ff62b_idx'),
+        ),
+        migrations.AddField(
+            model_name='venuedateslot',
+            name='booking',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='bookings.venuebooking'),
+        ),
+        migrations.AddField(
+            model_name='venuedateslot',
+            name='venue',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='date_slots', to='venue.venue'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='venuedateslot',
+            unique_together={('venue', 'date')},
+        ),
+        migrations.RunPython(create_slots, migrations.RunPython.noop),
+    ]
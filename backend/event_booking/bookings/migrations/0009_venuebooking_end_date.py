@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+def fill_end_date(apps, schema_editor):
+    VenueBooking = apps.get_model('bookings', 'VenueBooking')
+    VenueBooking.objects.filter(end_date__isnull=True).update(end_date=models.F('event_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venuebooking',
+            name='end_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_end_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='venuebooking',
+            name='end_date',
+            field=models.DateField(blank=True),
+        ),
+    ]
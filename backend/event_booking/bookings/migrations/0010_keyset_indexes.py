@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_venuebooking_end_date'),
+        ('events', '0003_event_waiting_room'),
+        ('venue', '0002_venue_description_venue_price'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['booking_date', 'id'], name='bookings_bo_booking_544863_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'booking_date', 'id'], name='bookings_bo_user_id_f70c3f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venuebooking',
+            index=models.Index(fields=['booking_date', 'id'], name='bookings_ve_booking_2394db_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venuebooking',
+            index=models.Index(fields=['user', 'booking_date', 'id'], name='bookings_ve_user_id_4fa21e_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:12
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    Booking.objects.update(updated_at=models.F('booking_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'updated_at'], name='bookings_bo_user_id_1dfc52_idx'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:24
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+# Frozen copy of bookings.rollups.rebuild as of this migration
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+
+def backfill(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    VenueBooking = apps.get_model('bookings', 'VenueBooking')
+    EventSalesDay = apps.get_model('bookings', 'EventSalesDay')
+    VenueSalesDay = apps.get_model('bookings', 'VenueSalesDay')
+
+    active = Q(status__in=ACTIVE_STATUSES)
+    money = models.DecimalField(max_digits=14, decimal_places=2)
+    event_rows = (
+        Booking.objects.annotate(day=TruncDate('booking_date'))
+        .values('event_id', 'day')
+        .annotate(
+            n_bookings=Count('id', filter=active),
+            n_tickets=Coalesce(Sum('num_tickets', filter=active), 0),
+            n_revenue=Coalesce(Sum('total_price', filter=active), Value(0), output_field=money),
+            n_cancellations=Count('id', filter=Q(status='cancelled')),
+        )
+        .order_by()
+    )
+    EventSalesDay.objects.bulk_create(
+        (
+            EventSalesDay(
+                event_id=row['event_id'], day=row['day'], bookings=row['n_bookings'],
+                tickets=row['n_tickets'], revenue=row['n_revenue'], cancellations=row['n_cancellations'],
+            )
+            for row in event_rows.iterator(chunk_size=2000)
+        ),
+        batch_size=1000,
+    )
+
+    venues = defaultdict(lambda: [0, 0, Decimal(0), 0])
+    rows = VenueBooking.objects.values_list(
+        'venue_id', 'booking_date', 'status', 'event_date', 'end_date', 'total_price',
+    )
+    for venue_id, booked_at, status, start, end, price in rows.iterator(chunk_size=2000):
+        row = venues[(venue_id, timezone.localdate(booked_at))]
+        if status in ACTIVE_STATUSES:
+            row[0] += 1
+            row[1] += (end - start).days + 1
+            row[2] += price
+        elif status == 'cancelled':
+            row[3] += 1
+    VenueSalesDay.objects.bulk_create(
+        (
+            VenueSalesDay(venue_id=venue_id, day=day, bookings=counts[0], days_booked=counts[1],
+                          revenue=counts[2], cancellations=counts[3])
+            for (venue_id, day), counts in venues.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_booking_updated_at'),
+        ('events', '0004_event_updated_at'),
+        ('venue', '0003_venue_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSalesDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bookings', models.IntegerField(default=0)),
+                ('tickets', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cancellations', models.IntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_days', to='events.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'event'], name='bookings_ev_day_465c3c_idx')],
+                'unique_together': {('event', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VenueSalesDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bookings', models.IntegerField(default=0)),
+                ('days_booked', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cancellations', models.IntegerField(default=0)),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_days', to='venue.venue')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'venue'], name='bookings_ve_day_47aadb_idx')],
+                'unique_together': {('venue', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:31
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations, models
+
+# Frozen copy of bookings.availability.rebuild and
+# bookings.occupancy.month_shares as of this migration
+ACTIVE_STATUSES = ('pending', 'confirmed')
+CENT = Decimal('0.01')
+
+
+def month_shares(start, end, total_price):
+    days = defaultdict(int)
+    for offset in range((end - start).days + 1):
+        days[(start + timedelta(days=offset)).replace(day=1)] += 1
+    total_days = sum(days.values())
+    total_price = Decimal(str(total_price))
+    shares = {}
+    remaining = total_price
+    months = sorted(days)
+    for month in months[:-1]:
+        shares[month] = (total_price * days[month] / total_days).quantize(CENT)
+        remaining -= shares[month]
+    shares[months[-1]] = remaining
+    return shares
+
+
+def backfill(apps, schema_editor):
+    VenueBooking = apps.get_model('bookings', 'VenueBooking')
+    VenueCalendarMonth = apps.get_model('bookings', 'VenueCalendarMonth')
+
+    masks = defaultdict(int)
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    rows = VenueBooking.objects.filter(status__in=ACTIVE_STATUSES).values_list(
+        'venue_id', 'event_date', 'end_date', 'total_price',
+    )
+    for venue_id, start, end, price in rows.iterator():
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            masks[(venue_id, day.replace(day=1))] |= 1 << (day.day - 1)
+        for month, revenue in month_shares(start, end, price).items():
+            totals[(venue_id, month)][0] += 1
+            totals[(venue_id, month)][1] += revenue
+
+    VenueCalendarMonth.objects.all().delete()
+    VenueCalendarMonth.objects.bulk_create(
+        [
+            VenueCalendarMonth(
+                venue_id=venue_id, month=month, booked_days=mask,
+                bookings=totals[(venue_id, month)][0], revenue=totals[(venue_id, month)][1],
+            )
+            for (venue_id, month), mask in masks.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venuecalendarmonth',
+            name='bookings',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='venuecalendarmonth',
+            name='revenue',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:32
+
+from django.db import migrations
+
+
+def clear_holds(apps, schema_editor):
+    # Until holds became opt-in every pending booking got one; none of them
+    # was asked for, so none may expire
+    VenueBooking = apps.get_model('bookings', 'VenueBooking')
+    VenueBooking.objects.filter(status='pending', hold_expires_at__isnull=False).update(hold_expires_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_venue_occupancy'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_holds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:47
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0014_clear_accidental_venue_holds'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='bookings_bo_user_id_1dfc52_idx',
+        ),
+    ]
@@ -1,9 +1,17 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from event_booking import response_cache
+from . import availability, occupancy, reservations, rollups, waitlist
+from events import inventory
 from events.models import Event
 from venue.models import Venue
 
+def bookings_namespace(user_id):
+    """Response-cache namespace of one user's bookings; bumped on each of their writes."""
+    return f'bookings:{user_id}'
+
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -26,11 +34,78 @@ class Booking(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     # purpose = models.CharField(max_length=50, choices=PURPOSE_CHOICES, default='other')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the staff list and each user's own list
+            models.Index(fields=['booking_date', 'id']),
+            models.Index(fields=['user', 'booking_date', 'id']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember how many tickets this row currently holds
+        instance._held = instance._holding()
+        instance._priced = (instance.event_id, instance.num_tickets)
+        instance._rolled = rollups.booking_share(instance)
+        return instance
+
+    def _holding(self):
+        if self.status in availability.ACTIVE_STATUSES:
+            return (self.event_id, self.num_tickets)
+        return None
+
+    def _lock(self):
+        # Re-read what the stored row holds under a row lock: two writers
+        # working from the same loaded snapshot (double cancel, cancel racing
+        # a delete) must not both give its tickets back
+        if self._state.adding:
+            return
+        stored = type(self).objects.select_for_update().filter(pk=self.pk).first()
+        self._held = stored._held if stored else None
+        self._rolled = stored._rolled if stored else None
 
     def save(self, *args, **kwargs):
-        # Automatically calculate total price based on event price × tickets
-        self.total_price = self.event.price * self.num_tickets
-        super().save(*args, **kwargs)
+        current = self._holding()
+
+        # Automatically calculate total price based on event price × tickets,
+        # only when the ticket count (or event) actually changed
+        order = (self.event_id, self.num_tickets)
+        if getattr(self, '_priced', None) != order:
+            self.total_price = self.event.price * self.num_tickets
+
+        with transaction.atomic():
+            self._lock()
+            previous = getattr(self, '_held', None)
+            if previous != current:
+                if previous:
+                    inventory.release(*previous)
+                if current:
+                    inventory.reserve(*current)
+            super().save(*args, **kwargs)
+            rolled = rollups.booking_share(self)
+            rollups.apply('event', [(getattr(self, '_rolled', None), rolled)])
+            response_cache.bump(bookings_namespace(self.user_id))
+            if previous and previous != current:
+                # Hand the freed tickets to the waitlist in the same transaction
+                waitlist.promote(previous[0])
+        self._held = current
+        self._priced = order
+        self._rolled = rolled
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self._lock()
+            previous = getattr(self, '_held', None)
+            if previous:
+                inventory.release(*previous)
+            rollups.apply('event', [(getattr(self, '_rolled', None), None)])
+            result = super().delete(*args, **kwargs)
+            if previous:
+                waitlist.promote(previous[0])
+        return result
 
     def __str__(self):
         return f"{self.user.username} - {self.event.title} ({self.status})"
@@ -53,30 +128,198 @@ class VenueBooking(models.Model):
     
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='venue_bookings')
     venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='bookings')
-    event_date = models.DateField()
+    event_date = models.DateField()  # first day of the booking
+    end_date = models.DateField(blank=True)  # last day (inclusive); defaults to event_date
     purpose = models.CharField(max_length=50, choices=PURPOSE_CHOICES, default='other')
     custom_requirements = models.TextField(blank=True, null=True)
     booking_date = models.DateTimeField(auto_now_add=True)
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Set only for bookings made as a hold (see bookings.reservations): the
+    # date is kept until this time unless the booking is confirmed first
+    hold_expires_at = models.DateTimeField(blank=True, null=True)
     
     class Meta:
-        unique_together = ('venue', 'event_date')
+        indexes = [
+            models.Index(fields=['status', 'hold_expires_at']),
+            models.Index(fields=['booking_date', 'id']),
+            models.Index(fields=['user', 'booking_date', 'id']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember which dates this row currently holds
+        instance._reserved = instance._reservation()
+        instance._rolled = rollups.venue_booking_share(instance)
+        instance._occupied = occupancy.share(instance)
+        return instance
+
+    def _reservation(self):
+        if self.status in availability.ACTIVE_STATUSES:
+            return (self.venue_id, self.event_date, self.end_date)
+        return None
+
+    @property
+    def num_days(self):
+        return (self.end_date - self.event_date).days + 1
+
+    def _lock(self):
+        # Re-read what the stored row holds under a row lock (see Booking._lock)
+        if self._state.adding:
+            return
+        stored = type(self).objects.select_for_update().filter(pk=self.pk).first()
+        self._reserved = stored._reserved if stored else None
+        self._rolled = stored._rolled if stored else None
+        self._occupied = stored._occupied if stored else None
     
     def save(self, *args, **kwargs):
-        # Check if venue is already booked for this date
-        if not self.pk:  # Only check on creation, not update
-            existing = VenueBooking.objects.filter(
-                venue=self.venue,
-                event_date=self.event_date,
-                status__in=['pending', 'confirmed']
-            ).exists()
-            if existing:
-                raise ValidationError("This venue is already booked for the selected date.")
-        
-        # Calculate total price based on venue price
-        self.total_price = self.venue.price
-        super().save(*args, **kwargs)
+        if not self.end_date:
+            self.end_date = self.event_date
+        if self.end_date < self.event_date:
+            raise ValidationError("End date cannot be before the start date.")
+
+        if self.status != 'pending':
+            # Confirming (or cancelling) ends a hold
+            self.hold_expires_at = None
+
+        # Calculate total price based on venue price per day
+        self.total_price = self.venue.price * self.num_days
+        with transaction.atomic():
+            self._lock()
+            super().save(*args, **kwargs)
+            self._sync_reservation()
+            rolled = rollups.venue_booking_share(self)
+            rollups.apply('venue', [(getattr(self, '_rolled', None), rolled)])
+            occupied = occupancy.share(self)
+            occupancy.apply([(getattr(self, '_occupied', None), occupied)], vendor_ids=[self.venue.created_by_id])
+        self._rolled = rolled
+        self._occupied = occupied
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self._lock()
+            previous = getattr(self, '_reserved', None)
+            if previous:
+                reservations.release(self, previous[0], availability.date_range(*previous[1:]))
+            rollups.apply('venue', [(getattr(self, '_rolled', None), None)])
+            occupancy.apply([(getattr(self, '_occupied', None), None)], vendor_ids=[self.venue.created_by_id])
+            return super().delete(*args, **kwargs)
+
+    def _sync_reservation(self):
+        # The only venue/date conflict check: claiming raises ValidationError
+        # (rolling back the save) when the date is taken
+        previous = getattr(self, '_reserved', None)
+        current = self._reservation()
+        if previous != current:
+            if previous:
+                reservations.release(self, previous[0], availability.date_range(*previous[1:]))
+            if current:
+                reservations.claim(self, availability.date_range(*current[1:]))
+        self._reserved = current
+
+    def __str__(self):
+        if self.end_date and self.end_date != self.event_date:
+            return f"{self.user.username} - {self.venue.name} ({self.event_date} to {self.end_date})"
+        return f"{self.user.username} - {self.venue.name} ({self.event_date})"
+
+
+class EventSalesDay(models.Model):
+    """One event's sales on one day, kept current by bookings.rollups."""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='sales_days')
+    day = models.DateField()  # the day the bookings were made
+    bookings = models.IntegerField(default=0)  # active bookings
+    tickets = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cancellations = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('event', 'day')
+        indexes = [
+            # Date-range reports across every event
+            models.Index(fields=['day', 'event']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id} - {self.day}"
+
+
+class VenueSalesDay(models.Model):
+    """One venue's bookings on one day, kept current by bookings.rollups."""
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='sales_days')
+    day = models.DateField()  # the day the bookings were made
+    bookings = models.IntegerField(default=0)  # active bookings
+    days_booked = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cancellations = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('venue', 'day')
+        indexes = [
+            models.Index(fields=['day', 'venue']),
+        ]
+
+    def __str__(self):
+        return f"{self.venue_id} - {self.day}"
+
+
+class VenueCalendarMonth(models.Model):
+    """Bitmap of the days a venue is booked in one month (bit 0 = day 1).
+
+    Also the vendor occupancy bucket: the active bookings touching the month
+    and their revenue prorated to its days (see bookings.occupancy).
+    """
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='calendar_months')
+    month = models.DateField()  # first day of the month
+    booked_days = models.BigIntegerField(default=0)
+    bookings = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('venue', 'month')
+
+    def __str__(self):
+        return f"{self.venue_id} - {self.month:%Y-%m}"
+
+
+class VenueDateSlot(models.Model):
+    """One venue day taken by an active venue booking.
+
+    A multi-day booking owns one slot per day, so the unique (venue, date)
+    index is a sorted interval index of every venue's active bookings.
+    """
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='date_slots')
+    date = models.DateField()
+    booking = models.ForeignKey(VenueBooking, on_delete=models.CASCADE, related_name='slots')
+
+    class Meta:
+        unique_together = ('venue', 'date')
+
+    def __str__(self):
+        return f"{self.venue_id} - {self.date}"
+
+
+class WaitlistEntry(models.Model):
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='waitlist_entries')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='waitlist')
+    num_tickets = models.PositiveIntegerField(default=1)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    created_at = models.DateTimeField(auto_now_add=True)
+    booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, blank=True, null=True, related_name='waitlist_entries')
+    # Set once the promotion email has gone out
+    notified_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'status', 'created_at', 'id']),
+            models.Index(fields=['status', 'notified_at']),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.venue.name} ({self.event_date})"
\ No newline at end of file
+        return f"{self.user_id} - {self.event_id} ({self.status})"
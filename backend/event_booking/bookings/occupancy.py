@@ -0,0 +1,159 @@
+"""Monthly venue occupancy and revenue for the vendor portal.
+
+``VenueCalendarMonth`` already carries one row per venue and month with a
+bitmap of the booked days (see bookings.availability). It also keeps the
+number of active bookings touching the month and their revenue, prorated by
+the days that fall in it. ``VenueBooking.save``/``delete`` and the hold sweeper
+move a booking's share with ``F()`` updates in the writer's transaction, the
+same way bookings.rollups does for the sales tables.
+
+``vendor_report`` reads a vendor's venues and months in two indexed queries
+and is cached per vendor in the versioned response cache. Every venue booking
+write and venue change bumps the owner's generation.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from event_booking import response_cache
+from .availability import ACTIVE_STATUSES, month_start
+
+CENT = Decimal('0.01')
+
+
+def namespace(vendor_id):
+    return f'occupancy:{vendor_id}'
+
+
+def invalidate(vendor_id):
+    response_cache.bump(namespace(vendor_id))
+
+
+def next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def month_shares(start, end, total_price):
+    """Split a booking of ``start``-``end`` into ``{month: revenue}``, pro rata by day."""
+    days = defaultdict(int)
+    for offset in range((end - start).days + 1):
+        day = date.fromordinal(start.toordinal() + offset)
+        days[month_start(day)] += 1
+    total_days = sum(days.values())
+    total_price = Decimal(str(total_price))
+    shares = {}
+    remaining = total_price
+    months = sorted(days)
+    for month in months[:-1]:
+        shares[month] = (total_price * days[month] / total_days).quantize(CENT)
+        remaining -= shares[month]
+    # The last month takes the rounding remainder, so the parts add up exactly
+    shares[months[-1]] = remaining
+    return shares
+
+
+def share(booking):
+    """``(venue_id, {month: revenue})`` of an active venue booking, else ``None``."""
+    if booking.status not in ACTIVE_STATUSES or not booking.event_date or not booking.end_date:
+        return None
+    return (booking.venue_id, month_shares(booking.event_date, booking.end_date, booking.total_price))
+
+
+def apply(changes, vendor_ids=None):
+    """Move month totals for ``(previous, current)`` share pairs and drop the
+    owners' cached reports (looked up when ``vendor_ids`` is not given)."""
+    from venue.models import Venue
+    from .models import VenueCalendarMonth
+
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    for previous, current in changes:
+        if previous == current:
+            continue
+        for side, sign in ((previous, -1), (current, 1)):
+            if side is None:
+                continue
+            venue_id, shares = side
+            for month, revenue in shares.items():
+                row = totals[(venue_id, month)]
+                row[0] += sign
+                row[1] += sign * revenue
+
+    for (venue_id, month), (bookings, revenue) in totals.items():
+        if not bookings and not revenue:
+            continue
+        rows = VenueCalendarMonth.objects.filter(venue_id=venue_id, month=month)
+        updates = {'bookings': F('bookings') + bookings, 'revenue': F('revenue') + revenue}
+        if rows.update(**updates):
+            continue
+        try:
+            with transaction.atomic():
+                VenueCalendarMonth.objects.create(venue_id=venue_id, month=month, bookings=bookings, revenue=revenue)
+        except IntegrityError:
+            # Another request created the month row first
+            rows.update(**updates)
+
+    if not totals:
+        return
+    if vendor_ids is None:
+        venues = {venue_id for venue_id, _ in totals}
+        vendor_ids = set(Venue.objects.filter(pk__in=venues).values_list('created_by_id', flat=True))
+    for vendor_id in vendor_ids:
+        invalidate(vendor_id)
+
+
+def _build_report(vendor_id, start, end):
+    from venue.models import Venue
+    from .models import VenueCalendarMonth
+
+    months = []
+    month = start
+    while month <= end:
+        months.append(month)
+        month = next_month(month)
+
+    buckets = {
+        (venue_id, month): (booked_days, bookings, revenue)
+        for venue_id, month, booked_days, bookings, revenue in VenueCalendarMonth.objects.filter(
+            venue__created_by_id=vendor_id, month__gte=start, month__lte=end,
+        ).values_list('venue_id', 'month', 'booked_days', 'bookings', 'revenue')
+    }
+
+    venues = []
+    for venue_id, name in Venue.objects.filter(created_by_id=vendor_id).order_by('name', 'id').values_list('id', 'name'):
+        rows = []
+        for month in months:
+            booked_days, bookings, revenue = buckets.get((venue_id, month), (0, 0, Decimal(0)))
+            booked = bin(booked_days).count('1')
+            length = (next_month(month) - month).days
+            rows.append({
+                'month': month.strftime('%Y-%m'),
+                'booked_days': booked,
+                'days': length,
+                'occupancy': round(booked / length, 4),
+                'bookings': bookings,
+                'revenue': revenue,
+            })
+        venues.append({
+            'venue': venue_id,
+            'name': name,
+            'booked_days': sum(row['booked_days'] for row in rows),
+            'revenue': sum((row['revenue'] for row in rows), Decimal(0)),
+            'months': rows,
+        })
+    return {
+        'from': start.strftime('%Y-%m'),
+        'to': end.strftime('%Y-%m'),
+        'revenue': sum((venue['revenue'] for venue in venues), Decimal(0)),
+        'venues': venues,
+    }
+
+
+def vendor_report(vendor_id, start, end):
+    """Occupancy and revenue per owned venue for the months ``start``-``end``."""
+    key = response_cache.cache_key(namespace(vendor_id), f'{start:%Y-%m}|{end:%Y-%m}')
+    return response_cache.get_or_build(key, lambda: _build_report(vendor_id, start, end))
@@ -0,0 +1,133 @@
+"""Atomic venue date reservations.
+
+A venue day is taken by inserting a ``VenueDateSlot`` row; the unique
+``(venue, date)`` constraint makes that insert the only conflict check, so two
+concurrent requests can never both win. Slots only exist for active bookings,
+which means a cancelled (or expired) booking gives its dates back.
+
+A booking created as a *hold* (``hold=True`` on the API) keeps its dates only
+until ``hold_expires_at``, unless ``POST /venue-bookings/<id>/confirm/``
+confirms it first. Expired holds are released by the ``expire_venue_holds``
+command, and lazily whenever a new reservation runs into one. Ordinary pending
+bookings have no deadline and never expire.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import availability, occupancy, rollups
+
+UNAVAILABLE_MESSAGE = "This venue is already booked for the selected date."
+
+
+def hold_ttl():
+    return getattr(settings, 'VENUE_HOLD_TTL', timedelta(minutes=15))
+
+
+def hold_deadline():
+    """``hold_expires_at`` for a hold placed now."""
+    return timezone.now() + hold_ttl()
+
+
+def claim(booking, dates):
+    """Take ``dates`` at the booking's venue or raise ``ValidationError``."""
+    from .models import VenueDateSlot
+
+    def insert():
+        with transaction.atomic():
+            VenueDateSlot.objects.bulk_create(
+                [VenueDateSlot(venue_id=booking.venue_id, date=day, booking=booking) for day in dates]
+            )
+
+    try:
+        insert()
+    except IntegrityError:
+        # The dates may only be blocked by holds nobody has swept yet
+        if not expire_holds(venue_id=booking.venue_id, dates=dates):
+            raise _unavailable(booking.venue_id, dates)
+        try:
+            insert()
+        except IntegrityError:
+            raise _unavailable(booking.venue_id, dates)
+
+    availability.mark_booked(booking.venue_id, dates)
+
+
+def conflicts(venue_id, start, end):
+    """Dates between ``start`` and ``end`` already taken at the venue.
+
+    A range probe on the unique (venue, date) index: O(log n) to find the
+    start plus one step per taken day, whatever the venue's booking history.
+    """
+    from .models import VenueDateSlot
+
+    return list(
+        VenueDateSlot.objects.filter(venue_id=venue_id, date__range=(start, end))
+        .order_by('date')
+        .values_list('date', flat=True)
+    )
+
+
+def _unavailable(venue_id, dates):
+    if len(dates) == 1:
+        return ValidationError(UNAVAILABLE_MESSAGE)
+    taken = conflicts(venue_id, min(dates), max(dates))
+    return ValidationError(
+        "This venue is already booked on " + ", ".join(day.isoformat() for day in taken) + "."
+    )
+
+
+def release(booking, venue_id, dates):
+    """Give ``dates`` held by ``booking`` back to the venue's inventory."""
+    from .models import VenueDateSlot
+
+    VenueDateSlot.objects.filter(booking_id=booking.pk, venue_id=venue_id, date__in=dates).delete()
+    availability.mark_free(venue_id, dates)
+
+
+def expire_holds(now=None, venue_id=None, dates=None):
+    """Cancel held bookings whose hold has lapsed and free their dates.
+
+    Returns the number of bookings expired.
+    """
+    from .models import VenueBooking, VenueDateSlot
+
+    now = now or timezone.now()
+    stale = VenueBooking.objects.filter(status='pending', hold_expires_at__lte=now)
+    if venue_id is not None:
+        stale = stale.filter(venue_id=venue_id)
+    if dates is not None:
+        stale = stale.filter(pk__in=VenueDateSlot.objects.filter(date__in=dates).values('booking_id'))
+
+    with transaction.atomic():
+        ids = list(stale.select_for_update().values_list('pk', flat=True))
+        if not ids:
+            return 0
+
+        slots = VenueDateSlot.objects.filter(booking_id__in=ids)
+        freed = {}
+        for slot_venue, day in slots.values_list('venue_id', 'date'):
+            freed.setdefault(slot_venue, []).append(day)
+
+        # The sales rollup moves from active to cancelled for each of them,
+        # and their months lose the booking
+        changes = []
+        months = []
+        for booking in VenueBooking.objects.filter(pk__in=ids, status='pending'):
+            previous = rollups.venue_booking_share(booking)
+            months.append((occupancy.share(booking), None))
+            booking.status = 'cancelled'
+            changes.append((previous, rollups.venue_booking_share(booking)))
+
+        expired = VenueBooking.objects.filter(pk__in=ids, status='pending').update(
+            status='cancelled', hold_expires_at=None
+        )
+        rollups.apply('venue', changes)
+        occupancy.apply(months)
+        slots.delete()
+        for slot_venue, days in freed.items():
+            availability.mark_free(slot_venue, days)
+    return expired
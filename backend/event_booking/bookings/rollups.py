@@ -0,0 +1,154 @@
+"""Daily sales rollups for the staff dashboards.
+
+``EventSalesDay`` holds, per event and per day a booking was made, the active
+bookings, tickets and revenue plus the number of cancelled bookings;
+``VenueSalesDay`` holds the same per venue (with booked days instead of
+tickets). Reports read these small tables instead of summing ``Booking`` and
+``VenueBooking``.
+
+Each booking *contributes* one delta to one row: its counts while active, a
+single cancellation once cancelled. ``Booking``/``VenueBooking.save`` and
+``delete``, the checkout ``bulk_create`` and the hold sweeper move that
+contribution with conditional ``F()`` updates in the writer's transaction, so
+the rollups never drift from the bookings. Cancellations stay on the day the
+booking was made, which keeps every row a pure function of the bookings and
+lets ``manage.py rebuild_sales_rollups`` reproduce it exactly.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .availability import ACTIVE_STATUSES
+
+EVENT_FIELDS = ('bookings', 'tickets', 'revenue', 'cancellations')
+VENUE_FIELDS = ('bookings', 'days_booked', 'revenue', 'cancellations')
+
+
+def booking_share(booking):
+    """``(event_id, day, deltas)`` that ``booking`` adds to ``EventSalesDay``."""
+    if booking.booking_date is None:
+        return None
+    if booking.status in ACTIVE_STATUSES:
+        deltas = (1, booking.num_tickets, booking.total_price, 0)
+    elif booking.status == 'cancelled':
+        deltas = (0, 0, Decimal(0), 1)
+    else:
+        return None
+    return (booking.event_id, timezone.localdate(booking.booking_date), deltas)
+
+
+def venue_booking_share(booking):
+    """``(venue_id, day, deltas)`` that ``booking`` adds to ``VenueSalesDay``."""
+    if booking.booking_date is None:
+        return None
+    if booking.status in ACTIVE_STATUSES:
+        deltas = (1, booking.num_days, booking.total_price, 0)
+    elif booking.status == 'cancelled':
+        deltas = (0, 0, Decimal(0), 1)
+    else:
+        return None
+    return (booking.venue_id, timezone.localdate(booking.booking_date), deltas)
+
+
+def _model(kind):
+    from .models import EventSalesDay, VenueSalesDay
+
+    if kind == 'event':
+        return EventSalesDay, 'event_id', EVENT_FIELDS
+    return VenueSalesDay, 'venue_id', VENUE_FIELDS
+
+
+def apply(kind, changes):
+    """Move contributions for ``(previous, current)`` share pairs.
+
+    Changes to the same row are summed first, and all touched rows are
+    written together, so any write costs the same two queries.
+    """
+    totals = defaultdict(lambda: [0, 0, Decimal(0), 0])
+    for previous, current in changes:
+        if previous == current:
+            continue
+        for share, sign in ((previous, -1), (current, 1)):
+            if share is None:
+                continue
+            key, day, deltas = share
+            row = totals[(key, day)]
+            for index, delta in enumerate(deltas):
+                row[index] += sign * delta
+
+    totals = {row: deltas for row, deltas in totals.items() if any(deltas)}
+    if not totals:
+        return
+    model, key_field, fields = _model(kind)
+    rows = {row: Q(**{key_field: row[0], 'day': row[1]}) for row in totals}
+    # Create the missing rows zeroed (a concurrent creator just wins), then
+    # move every delta in one UPDATE whose F() arithmetic runs in the database
+    model.objects.bulk_create([model(**{key_field: key, 'day': day}) for key, day in totals], ignore_conflicts=True)
+    updates = {}
+    for index, field in enumerate(fields):
+        whens = [When(rows[row], then=F(field) + deltas[index]) for row, deltas in totals.items() if deltas[index]]
+        if whens:
+            updates[field] = Case(*whens, default=F(field))
+    model.objects.filter(reduce(or_, rows.values())).update(**updates)
+
+
+def rebuild():
+    """Recompute both rollups from the bookings; returns ``(event_rows, venue_rows)``."""
+    from .models import Booking, EventSalesDay, VenueBooking, VenueSalesDay
+
+    active = Q(status__in=ACTIVE_STATUSES)
+    money = DecimalField(max_digits=14, decimal_places=2)
+    event_rows = (
+        Booking.objects.annotate(day=TruncDate('booking_date'))
+        .values('event_id', 'day')
+        .annotate(
+            n_bookings=Count('id', filter=active),
+            n_tickets=Coalesce(Sum('num_tickets', filter=active), 0),
+            n_revenue=Coalesce(Sum('total_price', filter=active), Value(0), output_field=money),
+            n_cancellations=Count('id', filter=Q(status='cancelled')),
+        )
+        .order_by()
+    )
+
+    # Booked days span two date columns, so venue rows are summed here rather
+    # than in SQL; memory is bounded by the size of the rollup itself
+    venues = defaultdict(lambda: [0, 0, Decimal(0), 0])
+    rows = VenueBooking.objects.values_list(
+        'venue_id', 'booking_date', 'status', 'event_date', 'end_date', 'total_price',
+    )
+    for venue_id, booked_at, status, start, end, price in rows.iterator(chunk_size=2000):
+        row = venues[(venue_id, timezone.localdate(booked_at))]
+        if status in ACTIVE_STATUSES:
+            row[0] += 1
+            row[1] += (end - start).days + 1
+            row[2] += price
+        elif status == 'cancelled':
+            row[3] += 1
+
+    with transaction.atomic():
+        EventSalesDay.objects.all().delete()
+        VenueSalesDay.objects.all().delete()
+        events = EventSalesDay.objects.bulk_create(
+            (
+                EventSalesDay(
+                    event_id=row['event_id'], day=row['day'], bookings=row['n_bookings'],
+                    tickets=row['n_tickets'], revenue=row['n_revenue'], cancellations=row['n_cancellations'],
+                )
+                for row in event_rows.iterator(chunk_size=2000)
+            ),
+            batch_size=1000,
+        )
+        VenueSalesDay.objects.bulk_create(
+            (
+                VenueSalesDay(venue_id=venue_id, day=day, **dict(zip(VENUE_FIELDS, deltas)))
+                for (venue_id, day), deltas in venues.items()
+            ),
+            batch_size=1000,
+        )
+    return len(events), len(venues)
@@ -1,11 +1,34 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Booking, VenueBooking
+from . import reservations
+from .models import Booking, EventSalesDay, VenueBooking, VenueSalesDay, WaitlistEntry
 
 class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = '__all__'
         read_only_fields = ['user', 'total_price', 'booking_date']
+
+    def validate_event(self, value):
+        # Moving a booking would skip the target event's waiting room
+        if self.instance is not None and value != self.instance.event:
+            raise serializers.ValidationError("A booking cannot be moved to another event; book that event instead.")
+        return value
+
+    # Ticket availability is enforced by the conditional inventory update in
+    # Booking.save (see events.inventory)
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
     
     # def validate_purpose(self, value):
     #     if not value:
@@ -16,11 +39,13 @@ class BookingSerializer(serializers.ModelSerializer):
 class VenueBookingSerializer(serializers.ModelSerializer):
     venue_name = serializers.CharField(source='venue.name', read_only=True)
     venue_price = serializers.DecimalField(source='venue.price', read_only=True, max_digits=10, decimal_places=2)
+    # Create only: keep the dates for VENUE_HOLD_TTL until the booking is confirmed
+    hold = serializers.BooleanField(write_only=True, required=False, default=False)
     
     class Meta:
         model = VenueBooking
         fields = '__all__'
-        read_only_fields = ['user', 'total_price', 'booking_date']
+        read_only_fields = ['user', 'total_price', 'booking_date', 'hold_expires_at']
     
     def validate_purpose(self, value):
         if not value:
@@ -34,20 +59,72 @@ class VenueBookingSerializer(serializers.ModelSerializer):
         return value
     
     def validate(self, data):
-        # Check if venue is already booked for the selected date
-        from django.core.exceptions import ValidationError
-        venue = data.get('venue')
-        event_date = data.get('event_date')
-        
-        if venue and event_date:
-            existing = VenueBooking.objects.filter(
-                venue=venue,
-                event_date=event_date,
-                status__in=['pending', 'confirmed']
-            ).exists()
-            if existing:
-                raise serializers.ValidationError(
-                    "This venue is already booked for the selected date."
-                )
-        
+        start = data.get('event_date', getattr(self.instance, 'event_date', None))
+        end = data.get('end_date')
+        if end is None:
+            if self.instance is not None and 'event_date' in data:
+                # Moving a booking keeps its length
+                end = start + (self.instance.end_date - self.instance.event_date)
+            else:
+                end = getattr(self.instance, 'end_date', None) or start
+        if start and end:
+            if end < start:
+                raise serializers.ValidationError({'end_date': "End date cannot be before the event date."})
+            max_days = getattr(settings, 'VENUE_BOOKING_MAX_DAYS', 14)
+            if (end - start).days + 1 > max_days:
+                raise serializers.ValidationError({'end_date': f"A venue can be booked for at most {max_days} days."})
+            data['end_date'] = end
         return data
+
+    # Date conflicts are resolved atomically when the booking claims its dates
+    # (see bookings.reservations), so there is no separate exists() check here.
+    def create(self, validated_data):
+        if validated_data.pop('hold', False):
+            validated_data['status'] = 'pending'
+            validated_data['hold_expires_at'] = reservations.hold_deadline()
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+
+    def update(self, instance, validated_data):
+        validated_data.pop('hold', None)
+        try:
+            return super().update(instance, validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WaitlistEntry
+        fields = ['id', 'event', 'num_tickets', 'status', 'created_at', 'booking']
+        read_only_fields = ['status', 'created_at', 'booking']
+
+    def validate_num_tickets(self, value):
+        if value < 1:
+            raise serializers.ValidationError("At least one ticket is required.")
+        return value
+
+    def validate(self, data):
+        event = data['event']
+        if data.get('num_tickets', 1) > event.capacity:
+            raise serializers.ValidationError("The event does not have that many tickets in total.")
+        if event.tickets_remaining >= data.get('num_tickets', 1):
+            raise serializers.ValidationError("Tickets are still available for this event; book them directly.")
+        user = self.context['request'].user
+        if WaitlistEntry.objects.filter(user=user, event=event, status='waiting').exists():
+            raise serializers.ValidationError("You are already on the waitlist for this event.")
+        return data
+
+
+class EventSalesDaySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventSalesDay
+        fields = ['event', 'day', 'bookings', 'tickets', 'revenue', 'cancellations']
+
+
+class VenueSalesDaySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VenueSalesDay
+        fields = ['venue', 'day', 'bookings', 'days_booked', 'revenue', 'cancellations']
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from event_booking import response_cache
+from .models import Booking, bookings_namespace
+
+
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_list(sender, instance, **kwargs):
+    # Cascades (event or user deleted) skip Booking.delete() but still send this
+    response_cache.bump(bookings_namespace(instance.user_id))
@@ -1,3 +1,787 @@
-from django.test import TestCase
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from datetime import date, time as clock, timedelta
+from unittest import mock
+from django.core.cache import cache, caches
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.test import APITestCase
+from event_booking.testing import QueryCountGuardMixin
+from events.models import Event
+from user.models import User
+from venue.models import Venue
+from . import availability, export, reservations, waiting_room, waitlist
+from .models import (
+    Booking, EventSalesDay, VenueBooking, VenueCalendarMonth, VenueDateSlot, VenueSalesDay, WaitlistEntry,
+)
 
-# Create your tests here.
+
+def make_event(user, capacity=10, price=500):
+    venue = Venue.objects.create(name='Ramada', location='Lucknow', capacity=300, price=40000, created_by=user)
+    return Event.objects.create(
+        title='Concert', description='Live', date=date.today() + timedelta(days=30), time=clock(19, 0),
+        venue=venue, created_by=user, capacity=capacity, price=price,
+    )
+
+
+class VenueAvailabilityIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.venue = Venue.objects.create(
+            name='Ramada', location='Lucknow', capacity=300, price=40000, created_by=self.user
+        )
+        self.day = date.today() + timedelta(days=10)
+
+    def test_booking_marks_date_and_cancel_frees_it(self):
+        booking = VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day)
+        self.assertEqual(availability.booked_dates(self.venue.pk, self.day, self.day), [self.day])
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(availability.booked_dates(self.venue.pk, self.day, self.day), [])
+
+    def test_delete_frees_date(self):
+        booking = VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day)
+        VenueBooking.objects.get(pk=booking.pk).delete()
+        self.assertEqual(availability.booked_dates(self.venue.pk, self.day, self.day), [])
+
+    def test_rebuild_matches_bookings(self):
+        VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day)
+        VenueCalendarMonth.objects.all().delete()
+        availability.rebuild()
+        self.assertEqual(availability.booked_dates(self.venue.pk, self.day, self.day), [self.day])
+
+
+class VenueAvailabilityEndpointTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.venue = Venue.objects.create(
+            name='Ramada', location='Lucknow', capacity=300, price=40000, created_by=self.user
+        )
+        self.start = date.today() + timedelta(days=1)
+        self.booked = self.start + timedelta(days=40)
+        VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.booked)
+
+    def test_window_is_served_from_index(self):
+        url = f'/api/venues/{self.venue.pk}/availability/'
+        end = self.start + timedelta(days=89)
+        # venue lookup + one read of the month rows
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'from': self.start.isoformat(), 'to': end.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['booked'], [self.booked])
+        self.assertEqual(len(response.data['available']), 89)
+        self.assertNotIn(self.booked, response.data['available'])
+
+    def test_invalid_range_rejected(self):
+        url = f'/api/venues/{self.venue.pk}/availability/'
+        response = self.client.get(url, {'from': '2030-02-01', 'to': '2030-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class VenueReservationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.venue = Venue.objects.create(
+            name='Ramada', location='Lucknow', capacity=300, price=40000, created_by=self.user
+        )
+        self.day = date.today() + timedelta(days=10)
+
+    def test_second_booking_for_same_date_is_rejected(self):
+        VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day)
+        with self.assertRaises(ValidationError):
+            VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day)
+        self.assertEqual(VenueBooking.objects.count(), 1)
+
+    def test_cancelled_booking_frees_date(self):
+        booking = VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day)
+        booking.status = 'cancelled'
+        booking.save()
+        VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day)
+        self.assertEqual(VenueDateSlot.objects.filter(venue=self.venue, date=self.day).count(), 1)
+
+    def test_stale_copies_cancel_once(self):
+        booking = VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day)
+        first, second = VenueBooking.objects.get(pk=booking.pk), VenueBooking.objects.get(pk=booking.pk)
+        first.status = 'cancelled'
+        first.save()
+        second.status = 'cancelled'
+        second.save()
+        self.assertEqual(VenueSalesDay.objects.values_list('bookings', 'cancellations').get(), (0, 1))
+        self.assertEqual(VenueCalendarMonth.objects.values_list('bookings', 'revenue').get(), (0, 0))
+
+    def hold(self, day):
+        return VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=day,
+                                           hold_expires_at=reservations.hold_deadline())
+
+    def test_only_holds_expire(self):
+        booking = VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day)
+        self.assertIsNone(booking.hold_expires_at)
+        booking.purpose = 'party'
+        booking.save()
+        self.assertIsNone(booking.hold_expires_at)
+
+        held = self.hold(self.day + timedelta(days=1))
+        held.status = 'confirmed'
+        held.save()
+        self.assertIsNone(held.hold_expires_at)
+
+    def test_sweeper_expires_stale_holds(self):
+        booking = self.hold(self.day)
+        pending = VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day + timedelta(days=1))
+        self.assertEqual(reservations.expire_holds(now=timezone.now() + timedelta(days=1)), 1)
+
+        booking.refresh_from_db()
+        pending.refresh_from_db()
+        self.assertEqual(booking.status, 'cancelled')
+        self.assertEqual(pending.status, 'pending')
+        self.assertEqual(availability.booked_dates(self.venue.pk, self.day, self.day), [])
+
+    def test_expired_hold_does_not_block_new_booking(self):
+        stale = self.hold(self.day)
+        VenueBooking.objects.filter(pk=stale.pk).update(hold_expires_at=timezone.now() - timedelta(minutes=1))
+
+        VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.day)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'cancelled')
+
+
+class MultiDayVenueBookingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.venue = Venue.objects.create(
+            name='Ramada', location='Lucknow', capacity=300, price=40000, created_by=self.user
+        )
+        self.start = date.today() + timedelta(days=10)
+
+    def book(self, offset, days):
+        start = self.start + timedelta(days=offset)
+        return VenueBooking.objects.create(
+            user=self.user, venue=self.venue, event_date=start, end_date=start + timedelta(days=days - 1)
+        )
+
+    def test_range_claims_every_day_and_prices_per_day(self):
+        booking = self.book(0, 3)
+        self.assertEqual(booking.total_price, 120000)
+        self.assertEqual(booking.slots.count(), 3)
+        end = self.start + timedelta(days=5)
+        self.assertEqual(len(availability.booked_dates(self.venue.pk, self.start, end)), 3)
+
+    def test_overlapping_range_is_rejected(self):
+        self.book(0, 3)
+        with self.assertRaisesMessage(ValidationError, (self.start + timedelta(days=2)).isoformat()):
+            self.book(2, 4)
+        self.assertEqual(reservations.conflicts(self.venue.pk, self.start, self.start + timedelta(days=10)),
+                         availability.date_range(self.start, self.start + timedelta(days=2)))
+        # adjacent ranges are fine
+        self.book(3, 2)
+
+    def test_single_day_defaults_end_date(self):
+        booking = VenueBooking.objects.create(user=self.user, venue=self.venue, event_date=self.start)
+        self.assertEqual(booking.end_date, self.start)
+
+
+class VenueBookingApiTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.venue = Venue.objects.create(
+            name='Ramada', location='Lucknow', capacity=300, price=40000, created_by=self.user
+        )
+        self.client.force_authenticate(self.user)
+        self.payload = {
+            'venue': self.venue.pk,
+            'event_date': (date.today() + timedelta(days=10)).isoformat(),
+            'purpose': 'wedding',
+        }
+
+    def test_range_longer_than_limit_is_rejected(self):
+        payload = dict(self.payload, end_date=(date.today() + timedelta(days=40)).isoformat())
+        response = self.client.post('/api/venue-bookings/', payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('end_date', response.data)
+
+    def test_conflicting_booking_returns_400(self):
+        self.assertEqual(self.client.post('/api/venue-bookings/', self.payload).status_code, 201)
+        response = self.client.post('/api/venue-bookings/', self.payload)
+        self.assertEqual(response.status_code, 400)
+
+    def test_hold_then_confirm(self):
+        plain = self.client.post('/api/venue-bookings/', self.payload)
+        self.assertIsNone(plain.data['hold_expires_at'])
+
+        payload = dict(self.payload, event_date=(date.today() + timedelta(days=11)).isoformat(), hold=True)
+        held = self.client.post('/api/venue-bookings/', payload)
+        self.assertEqual(held.status_code, 201)
+        self.assertIsNotNone(held.data['hold_expires_at'])
+        self.assertNotIn('hold', held.data)
+
+        confirmed = self.client.post(f"/api/venue-bookings/{held.data['id']}/confirm/")
+        self.assertEqual(confirmed.status_code, 200)
+        self.assertEqual((confirmed.data['status'], confirmed.data['hold_expires_at']), ('confirmed', None))
+        self.assertEqual(reservations.expire_holds(now=timezone.now() + timedelta(days=1)), 0)
+        self.assertEqual(self.client.post(f"/api/venue-bookings/{held.data['id']}/confirm/").status_code, 400)
+
+
+class TicketInventoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.event = make_event(self.user, capacity=5)
+
+    def remaining(self):
+        self.event.refresh_from_db()
+        return self.event.tickets_remaining
+
+    def test_new_event_starts_at_capacity(self):
+        self.assertEqual(self.event.tickets_remaining, 5)
+
+    def test_booking_takes_tickets_and_cancel_restores_them(self):
+        booking = Booking.objects.create(user=self.user, event=self.event, num_tickets=3)
+        self.assertEqual(booking.total_price, 1500)
+        self.assertEqual(self.remaining(), 2)
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.remaining(), 5)
+
+    def test_stale_copies_release_tickets_once(self):
+        booking = Booking.objects.create(user=self.user, event=self.event, num_tickets=3)
+        first, second, third = (Booking.objects.get(pk=booking.pk) for _ in range(3))
+        first.status = 'cancelled'
+        first.save()
+        second.status = 'cancelled'
+        second.save()
+        third.delete()
+        self.assertEqual(self.remaining(), 5)
+        self.assertEqual(EventSalesDay.objects.values_list('bookings', 'tickets', 'cancellations').get(), (0, 0, 0))
+
+    def test_cannot_oversell(self):
+        Booking.objects.create(user=self.user, event=self.event, num_tickets=4)
+        with self.assertRaises(ValidationError):
+            Booking.objects.create(user=self.user, event=self.event, num_tickets=2)
+        self.assertEqual(self.remaining(), 1)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_status_change_does_not_refetch_event(self):
+        booking = Booking.objects.get(pk=Booking.objects.create(user=self.user, event=self.event).pk)
+        booking.status = 'confirmed'
+        with CaptureQueriesContext(connection) as queries:
+            booking.save()
+        self.assertFalse([q for q in queries.captured_queries if 'events_event' in q['sql']])
+
+    def test_capacity_cannot_drop_below_sold(self):
+        Booking.objects.create(user=self.user, event=self.event, num_tickets=4)
+        self.event.capacity = 3
+        with self.assertRaises(ValidationError):
+            self.event.save()
+
+        self.event.capacity = 8
+        self.event.save()
+        self.assertEqual(self.remaining(), 4)
+
+    def test_api_rejects_sold_out_booking(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/api/bookings/', {'event': self.event.pk, 'num_tickets': 6})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.remaining(), 5)
+
+
+class TicketInventoryConcurrencyTests(TransactionTestCase):
+    """Hammer one event with concurrent buyers and check nothing is oversold."""
+    buyers = 200
+    capacity = 50
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.event = make_event(self.user, capacity=self.capacity)
+
+    def buy(self, _):
+        try:
+            while True:
+                try:
+                    Booking.objects.create(user_id=self.user.pk, event_id=self.event.pk, num_tickets=1,
+                                           total_price=self.event.price)
+                    return True
+                except ValidationError:
+                    return False
+                except OperationalError:
+                    # SQLite serialises writers by failing them; retry like a client would
+                    time.sleep(0.01)
+        finally:
+            connection.close()
+
+    def test_no_oversell_under_concurrent_buyers(self):
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(self.buy, range(self.buyers)))
+
+        self.event.refresh_from_db()
+        sold = Booking.objects.filter(event=self.event).count()
+        self.assertEqual(sum(results), sold)
+        self.assertEqual(sold, self.capacity)
+        self.assertEqual(self.event.tickets_remaining, 0)
+
+
+@override_settings(BOOKING_WAITING_ROOM={'ADMIT_RATE': 0.001, 'BURST': 1, 'MAX_QUEUE': 1, 'TOKEN_TTL': 600})
+class WaitingRoomTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.event = make_event(self.user, capacity=10)
+        self.event.waiting_room = True
+        self.event.save()
+        self.client.force_authenticate(self.user)
+
+    def join(self):
+        return self.client.post('/api/bookings/queue/', {'event': self.event.pk})
+
+    def book(self, token=None):
+        headers = {'HTTP_X_QUEUE_TOKEN': token} if token else {}
+        return self.client.post('/api/bookings/', {'event': self.event.pk, 'num_tickets': 1}, **headers)
+
+    def test_booking_requires_queue_token(self):
+        self.assertEqual(self.book().status_code, 403)
+
+    def test_admitted_token_books_once(self):
+        ticket = self.join().data
+        self.assertTrue(ticket['admitted'])
+        self.assertEqual(self.book(ticket['token']).status_code, 201)
+        self.assertEqual(self.book(ticket['token']).status_code, 403)
+
+    def test_token_is_claimed_before_booking(self):
+        token = self.join().data['token']
+        position = waiting_room.admit(self.event.pk, token, self.user.pk)
+        # A parallel request with the same token is turned away up front
+        with self.assertRaises(PermissionDenied):
+            waiting_room.admit(self.event.pk, token, self.user.pk)
+        waiting_room.release(self.event.pk, position)
+        self.assertEqual(waiting_room.admit(self.event.pk, token, self.user.pk), position)
+
+    def test_failed_booking_gives_the_token_back(self):
+        token = self.join().data['token']
+        response = self.client.post('/api/bookings/', {'event': self.event.pk, 'num_tickets': 50},
+                                    HTTP_X_QUEUE_TOKEN=token)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.book(token).status_code, 201)
+
+    @override_settings(BOOKING_WAITING_ROOM={'ADMIT_RATE': 0.001, 'BURST': 5, 'MAX_QUEUE': 5, 'TOKEN_TTL': 600})
+    def test_updates_cannot_skip_the_queue(self):
+        open_event = make_event(self.user, capacity=10)
+        booking = Booking.objects.create(user=self.user, event=open_event, num_tickets=1)
+        url = f'/api/bookings/{booking.pk}/'
+        # Moving an ungated booking onto the hot event is refused outright
+        self.assertEqual(self.client.patch(url, {'event': self.event.pk}).status_code, 400)
+
+        ticket = self.join().data
+        booking = Booking.objects.get(pk=self.book(ticket['token']).data['id'])
+        url = f'/api/bookings/{booking.pk}/'
+        # Buying more needs a fresh admission; giving tickets back does not
+        self.assertEqual(self.client.patch(url, {'num_tickets': 3}).status_code, 403)
+        self.assertEqual(self.client.patch(url, {'status': 'cancelled'}).status_code, 200)
+        self.assertEqual(self.client.patch(url, {'status': 'confirmed'}).status_code, 403)
+        ticket = self.join().data
+        response = self.client.patch(url, {'status': 'confirmed'}, HTTP_X_QUEUE_TOKEN=ticket['token'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_queued_buyer_gets_429_with_retry_after(self):
+        self.join()
+        ticket = self.join().data
+        self.assertFalse(ticket['admitted'])
+
+        response = self.book(ticket['token'])
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+
+        self.client.force_authenticate(None)
+        poll = self.client.get('/api/bookings/queue/status/', {'event': self.event.pk, 'token': ticket['token']})
+        self.assertEqual(poll.status_code, 200)
+        self.assertEqual(poll.data['position'], 2)
+        self.assertIn('Retry-After', poll.headers)
+
+    def test_full_queue_returns_503(self):
+        self.join()
+        self.join()
+        response = self.join()
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+
+class WaitlistTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='Test@1234')
+        self.event = make_event(self.owner, capacity=3)
+        self.booking = Booking.objects.create(user=self.owner, event=self.event, num_tickets=3)
+        self.first = User.objects.create_user(username='first', email='first@example.com', password='Test@1234')
+        self.second = User.objects.create_user(username='second', email='second@example.com', password='Test@1234')
+
+    def join(self, user, num_tickets=1):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/waitlist/', {'event': self.event.pk, 'num_tickets': num_tickets})
+
+    def test_join_only_when_sold_out(self):
+        self.assertEqual(self.join(self.first).status_code, 201)
+        self.assertEqual(self.join(self.first).status_code, 400)
+
+        self.booking.num_tickets = 2
+        self.booking.save()
+        # the freed ticket went to the waitlist, so the event is sold out again
+        self.assertEqual(self.join(self.second).status_code, 201)
+
+    def test_cancellation_promotes_in_fifo_order(self):
+        self.join(self.first, num_tickets=2)
+        self.join(self.second, num_tickets=2)
+
+        self.booking.status = 'cancelled'
+        self.booking.save()
+
+        first, second = WaitlistEntry.objects.order_by('id')
+        self.assertEqual(first.status, 'promoted')
+        self.assertEqual(first.booking.user, self.first)
+        # only one ticket left after the first promotion
+        self.assertEqual(second.status, 'waiting')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.tickets_remaining, 1)
+
+    def test_requests_beyond_capacity_never_block_the_queue(self):
+        self.assertEqual(self.join(self.first, num_tickets=4).status_code, 400)
+
+        # An entry left over from before the capacity was cut
+        oversized = WaitlistEntry.objects.create(user=self.first, event=self.event, num_tickets=4)
+        self.join(self.second)
+        self.booking.status = 'cancelled'
+        self.booking.save()
+
+        oversized.refresh_from_db()
+        self.assertEqual(oversized.status, 'cancelled')
+        self.assertEqual(WaitlistEntry.objects.get(user=self.second).status, 'promoted')
+
+    def test_notifications_are_queued_not_sent_inline(self):
+        self.join(self.first)
+        self.booking.status = 'cancelled'
+        self.booking.save()
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(waitlist.send_notifications(), 1)
+        self.assertEqual(mail.outbox[0].to, ['first@example.com'])
+        self.assertEqual(waitlist.send_notifications(), 0)
+
+
+class CheckoutTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.concert = make_event(self.user, capacity=10, price=500)
+        self.play = Event.objects.create(
+            title='Play', description='Drama', date=self.concert.date, time=clock(18, 0),
+            venue=self.concert.venue, created_by=self.user, capacity=2, price=300,
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_checkout_books_everything_in_one_go(self):
+        payload = {
+            'items': [
+                {'event': self.concert.pk, 'num_tickets': 2},
+                {'event': self.play.pk, 'num_tickets': 1},
+            ],
+            'venue_booking': {
+                'venue': self.concert.venue.pk,
+                'event_date': (date.today() + timedelta(days=20)).isoformat(),
+                'purpose': 'party',
+            },
+        }
+        response = self.client.post('/api/bookings/checkout/', payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data['bookings']), 2)
+        self.assertEqual(float(response.data['total_price']), 1300 + 40000)
+        self.assertEqual(Booking.objects.count(), 2)
+        self.assertEqual(VenueBooking.objects.count(), 1)
+        self.concert.refresh_from_db()
+        self.assertEqual(self.concert.tickets_remaining, 8)
+
+    def test_checkout_is_all_or_nothing(self):
+        payload = {'items': [
+            {'event': self.concert.pk, 'num_tickets': 2},
+            {'event': self.play.pk, 'num_tickets': 3},
+        ]}
+        response = self.client.post('/api/bookings/checkout/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Booking.objects.count(), 0)
+        self.concert.refresh_from_db()
+        self.assertEqual(self.concert.tickets_remaining, 10)
+
+    def test_query_count_does_not_grow_with_items(self):
+        def run(count):
+            items = [{'event': self.concert.pk, 'num_tickets': 1}] * count
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/bookings/checkout/', {'items': items}, format='json')
+            self.assertEqual(response.status_code, 201)
+            return len(queries)
+
+        self.assertEqual(run(1), run(5))
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        caches['idempotency'].clear()
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.event = make_event(self.user, capacity=10)
+        self.client.force_authenticate(self.user)
+
+    def post(self, key, num_tickets=1):
+        return self.client.post('/api/bookings/', {'event': self.event.pk, 'num_tickets': num_tickets},
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_response(self):
+        first = self.post('retry-1')
+        self.assertEqual(first.status_code, 201)
+
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.post('retry-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertFalse([q for q in queries.captured_queries if 'bookings_booking' in q['sql']])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        self.post('retry-2')
+        self.assertEqual(self.post('retry-2', num_tickets=3).status_code, 422)
+
+    def test_failed_request_is_not_stored(self):
+        self.assertEqual(self.post('retry-3', num_tickets=50).status_code, 400)
+        retry = self.post('retry-3', num_tickets=50)
+        self.assertEqual(retry.status_code, 400)
+        self.assertNotIn('Idempotent-Replayed', retry.headers)
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.event = make_event(self.user, capacity=50)
+        caches['shared'].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(5):
+                Booking.objects.create(user=self.user, event=self.event)
+        self.client.force_authenticate(self.user)
+
+    def test_walks_all_pages_newest_first_without_count(self):
+        seen = []
+        url = '/api/bookings/?page_size=2'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql'].upper()])
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        expected = list(Booking.objects.order_by('-booking_date', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+
+class ListQueryCountTests(QueryCountGuardMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234', is_staff=True)
+        self.event = make_event(self.user, capacity=100)
+        self.client.force_authenticate(self.user)
+
+    def test_bookings_list(self):
+        def add(count):
+            for _ in range(count):
+                Booking.objects.create(user=self.user, event=self.event)
+        self.assertListQueriesConstant('/api/bookings/', add)
+
+    def test_venue_bookings_list(self):
+        def add(count):
+            for _ in range(count):
+                venue = Venue.objects.create(name='Hall', location='Lucknow', capacity=50, price=100,
+                                             created_by=self.user)
+                VenueBooking.objects.create(user=self.user, venue=venue, event_date=date.today() + timedelta(days=5))
+        self.assertListQueriesConstant('/api/venue-bookings/', add)
+
+    def test_waitlist_list(self):
+        def add(count):
+            for _ in range(count):
+                WaitlistEntry.objects.create(user=self.user, event=self.event)
+        self.assertListQueriesConstant('/api/waitlist/', add)
+
+
+class BookingConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.other = User.objects.create_user(username='other', password='Test@1234')
+        self.event = make_event(self.user, capacity=50)
+        self.booking = Booking.objects.create(user=self.user, event=self.event)
+        self.client.force_authenticate(self.user)
+        caches['shared'].clear()
+
+    def test_unchanged_list_is_not_modified(self):
+        first = self.client.get('/api/bookings/')
+        self.assertEqual(first.status_code, 200)
+
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers['ETag'], first.headers['ETag'])
+        self.assertFalse([q for q in queries.captured_queries if 'bookings_booking' in q['sql']])
+
+    def test_staff_list_has_no_validators(self):
+        self.client.force_authenticate(User.objects.create_user(username='staff', password='Test@1234', is_staff=True))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/bookings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+        self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql'].upper()])
+
+    def test_changes_to_own_bookings_change_the_etag(self):
+        etag = self.client.get('/api/bookings/').headers['ETag']
+        # Someone else's booking is not part of this user's list
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(user=self.other, event=self.event)
+        self.assertEqual(self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.booking.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.save()
+        changed = self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+        etag = changed.headers['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.delete()
+        self.assertEqual(self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get('/api/bookings/').headers['ETag']
+        payload = {'items': [{'event': self.event.pk, 'num_tickets': 1}]}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/api/bookings/checkout/', payload, format='json').status_code, 201)
+        self.assertEqual(self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_cascade_delete_changes_the_etag(self):
+        etag = self.client.get('/api/bookings/').headers['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.delete()
+        changed = self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data['results'], [])
+
+
+class BookingExportTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='Test@1234', is_staff=True)
+        self.event = make_event(self.staff, capacity=50)
+        self.bookings = [Booking.objects.create(user=self.staff, event=self.event, num_tickets=2) for _ in range(5)]
+        self.client.force_authenticate(self.staff)
+
+    def test_csv_is_streamed_in_batches(self):
+        with mock.patch.object(export, 'CHUNK_SIZE', 2), CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/bookings/export/')
+            self.assertTrue(response.streaming)
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('bookings.csv', response['Content-Disposition'])
+        self.assertEqual(lines[0].split(',')[:4], ['id', 'user', 'username', 'event'])
+        self.assertEqual([int(line.split(',')[0]) for line in lines[1:]], [b.pk for b in self.bookings])
+        self.assertIn('staff,', lines[1])
+        # Three keyset batches of at most two rows, each a single joined query
+        self.assertEqual(len([q for q in queries.captured_queries if 'bookings_booking' in q['sql']]), 3)
+
+    def test_csv_cells_cannot_run_as_formulas(self):
+        Event.objects.filter(pk=self.event.pk).update(title='=HYPERLINK("http://evil.example","Refund")')
+        response = self.client.get('/api/bookings/export/')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[1][4], '\'=HYPERLINK("http://evil.example","Refund")')
+        # JSONL is data, not a spreadsheet, and stays as stored
+        response = self.client.get('/api/bookings/export/?file_format=jsonl')
+        self.assertEqual(json.loads(next(iter(response.streaming_content)))['event_title'][0], '=')
+
+    def test_jsonl_with_date_range(self):
+        Booking.objects.filter(pk=self.bookings[0].pk).update(booking_date=timezone.now() - timedelta(days=10))
+        today = timezone.now().date().isoformat()
+        response = self.client.get(f'/api/bookings/export/?file_format=jsonl&from={today}&to={today}')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [b.pk for b in self.bookings[1:]])
+        self.assertEqual((rows[0]['num_tickets'], rows[0]['total_price']), (2, '1000.00'))
+
+        self.assertEqual(self.client.get('/api/bookings/export/?from=yesterday').status_code, 400)
+        self.assertEqual(self.client.get('/api/bookings/export/?file_format=xml').status_code, 400)
+
+    def test_venue_bookings_and_staff_only(self):
+        VenueBooking.objects.create(user=self.staff, venue=self.event.venue, event_date=date.today() + timedelta(days=3))
+        response = self.client.get('/api/venue-bookings/export/')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Ramada', lines[1])
+
+        self.client.force_authenticate(User.objects.create_user(username='guest', password='Test@1234'))
+        self.assertEqual(self.client.get('/api/venue-bookings/export/').status_code, 403)
+
+
+class SalesRollupTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='Test@1234', is_staff=True)
+        self.event = make_event(self.staff, capacity=50, price=500)
+        self.venue = self.event.venue
+        self.client.force_authenticate(self.staff)
+
+    def snapshot(self):
+        return (
+            sorted(EventSalesDay.objects.values_list('event_id', 'day', 'bookings', 'tickets', 'revenue', 'cancellations')),
+            sorted(VenueSalesDay.objects.values_list('venue_id', 'day', 'bookings', 'days_booked', 'revenue', 'cancellations')),
+        )
+
+    def test_rollups_follow_every_write_path(self):
+        first = Booking.objects.create(user=self.staff, event=self.event, num_tickets=2)
+        Booking.objects.create(user=self.staff, event=self.event, num_tickets=1).delete()
+        response = self.client.post('/api/bookings/checkout/', {'items': [
+            {'event': self.event.pk, 'num_tickets': 3}, {'event': self.event.pk, 'num_tickets': 1},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        first.num_tickets = 4
+        first.save()
+        first.status = 'cancelled'
+        first.save()
+
+        start = date.today() + timedelta(days=10)
+        VenueBooking.objects.create(user=self.staff, venue=self.venue, event_date=start, end_date=start + timedelta(days=2),
+                                    status='confirmed')
+        held = VenueBooking.objects.create(user=self.staff, venue=self.venue, event_date=start + timedelta(days=5))
+        VenueBooking.objects.filter(pk=held.pk).update(hold_expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(reservations.expire_holds(), 1)
+
+        today = timezone.localdate()
+        events, venues = self.snapshot()
+        self.assertEqual(events, [(self.event.pk, today, 2, 4, 2000, 1)])
+        self.assertEqual(venues, [(self.venue.pk, today, 1, 3, 120000, 1)])
+
+        # The rebuild reproduces exactly what the writes maintained
+        call_command('rebuild_sales_rollups', stdout=StringIO())
+        self.assertEqual(self.snapshot(), (events, venues))
+
+    def test_dashboard_reads_only_the_rollup(self):
+        other = make_event(self.staff, capacity=50, price=100)
+        Booking.objects.create(user=self.staff, event=self.event, num_tickets=2)
+        Booking.objects.create(user=self.staff, event=other, num_tickets=5)
+        EventSalesDay.objects.create(event=self.event, day=date(2020, 1, 1), bookings=1, tickets=1, revenue=500)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/sales/events/totals/?from={timezone.localdate()}')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries.captured_queries if 'bookings_booking' in q['sql']])
+        self.assertEqual(response.data['totals']['revenue'], 1500)
+        self.assertEqual([row['event'] for row in response.data['events']], [self.event.pk, other.pk])
+
+        rows = self.client.get(f'/api/sales/events/?event={other.pk}').data['results']
+        self.assertEqual([(row['tickets'], row['revenue']) for row in rows], [(5, '500.00')])
+        self.assertEqual(self.client.get('/api/sales/venues/?from=soon').status_code, 400)
+
+        self.client.force_authenticate(User.objects.create_user(username='guest', password='Test@1234'))
+        self.assertEqual(self.client.get('/api/sales/events/').status_code, 403)
@@ -1,35 +1,280 @@
-from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
-from .models import Booking, VenueBooking
-from .serializers import BookingSerializer, VenueBookingSerializer
+import hashlib
 
-class BookingViewSet(viewsets.ModelViewSet):
+from django.db import transaction
+from django.db.models import Sum
+from django.utils.cache import quote_etag
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from event_booking import response_cache
+from event_booking.conditional import ConditionalGetMixin
+from event_booking.idempotency import idempotent
+from . import export, rollups, waiting_room
+from .availability import ACTIVE_STATUSES
+from .checkout import CheckoutSerializer, checkout
+from .models import Booking, EventSalesDay, VenueBooking, VenueSalesDay, WaitlistEntry, bookings_namespace
+from .serializers import (
+    BookingSerializer, EventSalesDaySerializer, VenueBookingSerializer, VenueSalesDaySerializer,
+    WaitlistEntrySerializer,
+)
+
+class BookingViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    # BookingSerializer renders relations as ids only, so nothing is joined
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-booking_date', '-id')
 
     def get_queryset(self):
         # Normal users see only their bookings
         user = self.request.user
+        queryset = super().get_queryset()
         if user.is_staff:
-            return Booking.objects.all()
-        return Booking.objects.filter(user=user)
+            return queryset
+        return queryset.filter(user=user)
+
+    def get_validators(self, request, queryset):
+        # Only a user's own list gets validators, and they come from the
+        # generation their writes bump rather than an aggregate over the rows:
+        # a poll costs one cache read and never a COUNT. Staff lists span the
+        # whole table and are served without validators.
+        if request.user.is_staff:
+            return None
+        generation = response_cache.generation(bookings_namespace(request.user.pk))
+        fingerprint = f'{request.get_full_path()}|{request.accepted_renderer.format}|{generation}'
+        return quote_etag(hashlib.sha256(fingerprint.encode()).hexdigest()), None
+
+    def _through_waiting_room(self, request, event_id, write):
+        # Hot events only accept buyers the waiting room has admitted; this is
+        # checked before any database work is done. The admission is handed
+        # back if the write does not go through.
+        position = None
+        if event_id and waiting_room.is_enabled(event_id):
+            position = waiting_room.admit(event_id, request.headers.get('X-Queue-Token'), request.user.pk)
+        try:
+            response = write()
+        except Exception:
+            if position is not None:
+                waiting_room.release(event_id, position)
+            raise
+        if position is not None and not status.is_success(response.status_code):
+            waiting_room.release(event_id, position)
+        return response
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return self._through_waiting_room(
+            request, request.data.get('event'), lambda: super(BookingViewSet, self).create(request, *args, **kwargs)
+        )
+
+    def update(self, request, *args, **kwargs):
+        # Taking more tickets (a larger count, or reviving a cancelled
+        # booking) is a purchase too; the event itself cannot change
+        booking = self.get_object()
+        new_status = request.data.get('status', booking.status)
+        try:
+            new_tickets = int(request.data.get('num_tickets', booking.num_tickets))
+        except (TypeError, ValueError):
+            new_tickets = booking.num_tickets  # the serializer reports it
+        held = booking.num_tickets if booking.status in ACTIVE_STATUSES else 0
+        buying = new_status in ACTIVE_STATUSES and new_tickets > held
+        return self._through_waiting_room(
+            request, booking.event_id if buying else None,
+            lambda: super(BookingViewSet, self).update(request, *args, **kwargs),
+        )
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # Tickets are taken from the event's inventory in the same transaction
+        # as the booking insert, so a failed insert gives them back
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['post'])
+    @idempotent
+    def checkout(self, request):
+        """Book several events (and optionally a venue) at once:
+        POST {"items": [{"event": id, "num_tickets": n}, ...], "venue_booking": {...}}
+        """
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        bookings, venue_booking = checkout(
+            request.user,
+            serializer.validated_data['items'],
+            serializer.validated_data.get('venue_booking'),
+            context=self.get_serializer_context(),
+        )
+        total = sum(booking.total_price for booking in bookings)
+        if venue_booking:
+            total += venue_booking.total_price
+        return Response({
+            'bookings': BookingSerializer(bookings, many=True).data,
+            'venue_booking': VenueBookingSerializer(venue_booking).data if venue_booking else None,
+            'total_price': total,
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def queue(self, request):
+        """Join the waiting room of an event: POST {"event": id}"""
+        event_id = request.data.get('event')
+        if not event_id or not waiting_room.is_enabled(event_id):
+            return Response({"detail": "This event has no waiting room."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(waiting_room.join(event_id, request.user.pk), status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='queue/status',
+            permission_classes=[AllowAny], authentication_classes=[])
+    def queue_status(self, request):
+        """Poll a queue position: GET ?event=&token= (the signed token is the credential)"""
+        event_id = request.query_params.get('event')
+        token = request.query_params.get('token')
+        if not event_id or not event_id.isdigit() or not token:
+            return Response({"detail": "event and token are required."}, status=status.HTTP_400_BAD_REQUEST)
+        current = waiting_room.status_for(event_id, token)
+        headers = {'Retry-After': str(current['retry_after'])} if not current['admitted'] else None
+        return Response(current, headers=headers)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream every booking: GET ?file_format=csv|jsonl&from=YYYY-MM-DD&to=YYYY-MM-DD
+        (booking dates, inclusive)."""
+        return export.stream(request, Booking.objects.all(), {
+            'id': 'id',
+            'user': 'user_id',
+            'username': 'user__username',
+            'event': 'event_id',
+            'event_title': 'event__title',
+            'num_tickets': 'num_tickets',
+            'total_price': 'total_price',
+            'status': 'status',
+            'booking_date': 'booking_date',
+        }, 'bookings')
 
 
 class VenueBookingViewSet(viewsets.ModelViewSet):
-    queryset = VenueBooking.objects.all()
+    # venue_name / venue_price are read from the joined venue row
+    queryset = VenueBooking.objects.select_related('venue')
     serializer_class = VenueBookingSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-booking_date', '-id')
 
     def get_queryset(self):
         # Normal users see only their venue bookings
         user = self.request.user
+        queryset = super().get_queryset()
         if user.is_staff:
-            return VenueBooking.objects.all()
-        return VenueBooking.objects.filter(user=user)
+            return queryset
+        return queryset.filter(user=user)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
\ No newline at end of file
+        serializer.save(user=self.request.user)
+
+    @action(detail=True, methods=['post'])
+    def confirm(self, request, pk=None):
+        """Confirm a pending booking; a hold stops expiring."""
+        booking = self.get_object()
+        if booking.status != 'pending':
+            return Response({"detail": f"Only pending bookings can be confirmed (this one is {booking.status})."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        booking.status = 'confirmed'
+        booking.save()
+        return Response(self.get_serializer(booking).data)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream every venue booking: GET ?file_format=csv|jsonl&from=YYYY-MM-DD&to=YYYY-MM-DD
+        (booking dates, inclusive)."""
+        return export.stream(request, VenueBooking.objects.all(), {
+            'id': 'id',
+            'user': 'user_id',
+            'username': 'user__username',
+            'venue': 'venue_id',
+            'venue_name': 'venue__name',
+            'event_date': 'event_date',
+            'end_date': 'end_date',
+            'purpose': 'purpose',
+            'total_price': 'total_price',
+            'status': 'status',
+            'booking_date': 'booking_date',
+        }, 'venue-bookings')
+
+
+class WaitlistViewSet(viewsets.ModelViewSet):
+    queryset = WaitlistEntry.objects.all()
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [IsAuthenticated]
+    cursor_ordering = ('created_at', 'id')
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+
+    def get_queryset(self):
+        # Users see and leave only their own waitlist entries
+        user = self.request.user
+        queryset = super().get_queryset()
+        if user.is_staff:
+            return queryset
+        return queryset.filter(user=user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        # Keep promoted entries as a record of where the booking came from
+        if instance.status == 'waiting':
+            instance.status = 'cancelled'
+            instance.save(update_fields=['status'])
+
+
+class SalesRollupViewSet(viewsets.ReadOnlyModelViewSet):
+    """Staff dashboards over the daily sales rollups (see bookings.rollups).
+
+    GET ?from=YYYY-MM-DD&to=YYYY-MM-DD[&<key>=id] lists day rows, newest first;
+    GET totals/ with the same filters sums them per <key> and overall.
+    """
+    permission_classes = [IsAdminUser]
+    cursor_ordering = ('-day', '-id')
+    key = None
+    fields = None
+
+    def get_queryset(self):
+        params = self.request.query_params
+        start, end = export.parse_date(params, 'from'), export.parse_date(params, 'to')
+        queryset = super().get_queryset()
+        if start:
+            queryset = queryset.filter(day__gte=start)
+        if end:
+            queryset = queryset.filter(day__lte=end)
+        key = params.get(self.key)
+        if key:
+            if not key.isdigit():
+                raise ValidationError({self.key: ["Must be an id."]})
+            queryset = queryset.filter(**{f'{self.key}_id': key})
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def totals(self, request):
+        queryset = self.get_queryset().order_by()
+        sums = {field: Sum(field) for field in self.fields}
+        per_key = queryset.values(self.key).annotate(**sums).order_by('-revenue', self.key)
+        overall = queryset.aggregate(**sums)
+        return Response({
+            'totals': {field: overall[field] or 0 for field in self.fields},
+            self.key + 's': list(per_key),
+        })
+
+
+class EventSalesViewSet(SalesRollupViewSet):
+    queryset = EventSalesDay.objects.all()
+    serializer_class = EventSalesDaySerializer
+    key = 'event'
+    fields = rollups.EVENT_FIELDS
+
+
+class VenueSalesViewSet(SalesRollupViewSet):
+    queryset = VenueSalesDay.objects.all()
+    serializer_class = VenueSalesDaySerializer
+    key = 'venue'
+    fields = rollups.VENUE_FIELDS
@@ -0,0 +1,163 @@
+"""Virtual waiting room for flash sales.
+
+Buyers of an event flagged with ``Event.waiting_room`` first join a per-event
+queue and receive a signed position token. Positions are admitted at
+``ADMIT_RATE`` per second (plus an initial ``BURST``), and only an admitted
+token may create a booking, once. Queue state lives in the ``shared`` cache
+(a database table by default; point it at Redis or Memcached for flash sales),
+so the booking tables only see as many writers as we let through.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache, caches
+from rest_framework import status
+from rest_framework.exceptions import APIException, PermissionDenied, Throttled
+
+TOKEN_SALT = 'bookings.waiting_room'
+ENABLED_CACHE_TTL = 30
+
+DEFAULTS = {
+    'ADMIT_RATE': 20.0,
+    'BURST': 50,
+    'MAX_QUEUE': 5000,
+    'TOKEN_TTL': 1800,
+}
+
+
+class QueueFull(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The queue for this event is full, please try again later."
+    default_code = 'queue_full'
+
+    def __init__(self, wait):
+        super().__init__()
+        # DRF turns `wait` into a Retry-After header
+        self.wait = wait
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'BOOKING_WAITING_ROOM', {})}
+
+
+def _store():
+    return caches['shared']
+
+
+def _key(event_id, name):
+    return f'waiting-room:{event_id}:{name}'
+
+
+def is_enabled(event_id):
+    """Whether the event is behind the waiting room (cached per process)."""
+    from events.models import Event
+
+    try:
+        event_id = int(event_id)
+    except (TypeError, ValueError):
+        return False
+    key = _key(event_id, 'enabled')
+    enabled = cache.get(key)
+    if enabled is None:
+        enabled = Event.objects.filter(pk=event_id, waiting_room=True).exists()
+        cache.set(key, enabled, ENABLED_CACHE_TTL)
+    return enabled
+
+
+def _advance(event_id):
+    """Return ``(issued, head)``: positions handed out and positions admitted so far."""
+    opts = config()
+    store = _store()
+    now = time.time()
+    issued_key, head_key = _key(event_id, 'issued'), _key(event_id, 'head')
+    values = store.get_many([issued_key, head_key])
+    issued = values.get(issued_key, 0)
+    head, stamp = values.get(head_key, (float(opts['BURST']), now))
+
+    # Admit ADMIT_RATE positions per second, but never bank more than BURST
+    # spare admissions while the queue is idle
+    advanced = min(head + (now - stamp) * opts['ADMIT_RATE'], issued + opts['BURST'])
+    if head_key not in values or int(advanced) != int(head):
+        store.set(head_key, (advanced, now), opts['TOKEN_TTL'])
+    return issued, int(advanced)
+
+
+def _wait_for(position, head):
+    return max(1, math.ceil((position - head) / config()['ADMIT_RATE']))
+
+
+def _status(event_id, position):
+    _, head = _advance(event_id)
+    admitted = position <= head
+    return {
+        'event': int(event_id),
+        'position': position,
+        'admitted': admitted,
+        'ahead': 0 if admitted else position - head - 1,
+        'retry_after': 0 if admitted else _wait_for(position, head),
+    }
+
+
+def join(event_id, user_id):
+    """Hand out the next queue position, or raise ``QueueFull``."""
+    opts = config()
+    store = _store()
+    issued, head = _advance(event_id)
+    if issued - head >= opts['MAX_QUEUE']:
+        raise QueueFull(wait=_wait_for(issued - opts['MAX_QUEUE'] + 1, head))
+
+    issued_key = _key(event_id, 'issued')
+    store.add(issued_key, 0, opts['TOKEN_TTL'])
+    try:
+        position = store.incr(issued_key)
+    except ValueError:
+        # The counter expired between add() and incr()
+        store.add(issued_key, 0, opts['TOKEN_TTL'])
+        position = store.incr(issued_key)
+    store.touch(issued_key, opts['TOKEN_TTL'])
+
+    token = signing.dumps({'e': int(event_id), 'u': user_id, 'p': position}, salt=TOKEN_SALT)
+    return {**_status(event_id, position), 'token': token}
+
+
+def _load(event_id, token):
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT, max_age=config()['TOKEN_TTL'])
+    except signing.BadSignature:
+        raise PermissionDenied("Invalid or expired queue token.")
+    if data.get('e') != int(event_id):
+        raise PermissionDenied("This queue token is for a different event.")
+    return data
+
+
+def status_for(event_id, token):
+    """Queue position of ``token``; needs no database or authentication."""
+    return _status(event_id, _load(event_id, token)['p'])
+
+
+def admit(event_id, token, user_id):
+    """Claim ``token`` for one booking by ``user_id`` now; returns the position.
+
+    The claim is an atomic ``add``, so parallel requests with the same token
+    cannot all get through; call ``release`` if the booking then fails.
+    Raises ``Throttled`` (429 + Retry-After) while the position is still queued.
+    """
+    if not token:
+        raise PermissionDenied("This event uses a waiting room; join the queue first.")
+    data = _load(event_id, token)
+    if data.get('u') != user_id:
+        raise PermissionDenied("This queue token belongs to another user.")
+
+    current = _status(event_id, data['p'])
+    if not current['admitted']:
+        raise Throttled(wait=current['retry_after'], detail="You are still in the queue for this event.")
+    if not _store().add(_key(event_id, f"used:{data['p']}"), True, config()['TOKEN_TTL']):
+        raise PermissionDenied("This queue token has already been used.")
+    return data['p']
+
+
+def release(event_id, position):
+    """Give a claimed position back after its booking failed."""
+    _store().delete(_key(event_id, f'used:{position}'))
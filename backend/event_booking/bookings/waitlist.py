@@ -0,0 +1,118 @@
+"""Event waitlist.
+
+When a booking gives tickets back, ``promote`` hands them to the oldest
+waiting entries of that event (strict FIFO), inside the same transaction as the
+cancellation. Entries are read in small batches straight off the
+``(event, status, created_at)`` index. An entry larger than the event's whole
+capacity can never be served, so it is cancelled instead of blocking the
+queue. Promoted users are not emailed inline: the entries stay queued with
+``notified_at`` unset until the ``send_waitlist_notifications`` command picks
+them up.
+"""
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+PROMOTION_BATCH_SIZE = 50
+
+logger = logging.getLogger(__name__)
+
+
+def promote(event_id, batch_size=PROMOTION_BATCH_SIZE):
+    """Turn waiting entries into bookings while the event has tickets left.
+
+    Returns the list of promoted entries.
+    """
+    from events.models import Event
+    from .models import Booking, WaitlistEntry
+
+    promoted = []
+    with transaction.atomic():
+        event = Event.objects.filter(pk=event_id).first()
+        if not event:
+            return promoted
+        remaining = event.tickets_remaining
+
+        while remaining:
+            batch = list(
+                WaitlistEntry.objects.select_for_update()
+                .filter(event_id=event_id, status='waiting')
+                .order_by('created_at', 'id')[:batch_size]
+            )
+            changed = []
+            for entry in batch:
+                if entry.num_tickets > event.capacity:
+                    # Capacity was cut below this request: it can never be
+                    # served, so it must not hold up the queue behind it
+                    entry.status = 'cancelled'
+                    changed.append(entry)
+                    continue
+                # Strict FIFO: a large request at the head is not skipped
+                if entry.num_tickets > remaining:
+                    remaining = 0
+                    break
+                booking = Booking(user_id=entry.user_id, event=event, num_tickets=entry.num_tickets)
+                try:
+                    booking.save()
+                except ValidationError:
+                    # Someone else bought the tickets in the meantime
+                    remaining = 0
+                    break
+                entry.status = 'promoted'
+                entry.booking = booking
+                changed.append(entry)
+                remaining -= entry.num_tickets
+                if not remaining:
+                    break
+
+            WaitlistEntry.objects.bulk_update(changed, ['status', 'booking'])
+            promoted.extend(entry for entry in changed if entry.status == 'promoted')
+            if len(batch) < batch_size:
+                break
+    return promoted
+
+
+def send_notifications(batch_size=100):
+    """Email promoted users that have not been told yet; returns the number sent."""
+    from .models import WaitlistEntry
+
+    pending = (
+        WaitlistEntry.objects.filter(status='promoted', notified_at__isnull=True)
+        .select_related('user', 'event', 'booking')
+        .order_by('id')
+    )
+    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', None)
+    connection = get_connection()
+    sent = 0
+
+    while True:
+        batch = list(pending[:batch_size])
+        if not batch:
+            return sent
+
+        messages = []
+        for entry in batch:
+            if not entry.user.email:
+                continue
+            body = render_to_string('email/waitlist_promoted.html', {
+                'user': entry.user,
+                'event': entry.event,
+                'booking': entry.booking,
+            })
+            msg = EmailMessage("Tickets available: you're off the waitlist!", body, from_email, [entry.user.email])
+            msg.content_subtype = "html"
+            messages.append(msg)
+
+        try:
+            connection.send_messages(messages)
+        except Exception:
+            logger.exception("Waitlist notification batch failed")
+            return sent
+
+        WaitlistEntry.objects.filter(pk__in=[entry.pk for entry in batch]).update(notified_at=timezone.now())
+        sent += len(messages)
@@ -0,0 +1,110 @@
+"""Idempotency-Key support for POST endpoints.
+
+Decorate a view's ``create``/``post`` with ``@idempotent``. When the client
+sends an ``Idempotency-Key`` header, the first successful response is stored in
+the ``idempotency`` cache (bounded TTL and size) and every retry with the same
+key gets that response back without running the view again.
+
+Responses carrying credentials must not be stored as-is: pass ``dump`` to
+reduce the body to what can be kept (e.g. the new object's id) and ``load`` to
+rebuild a fresh body from it on replay. Request bodies are only ever kept as
+a keyed HMAC, never in a form that could reveal a password.
+"""
+import functools
+import hashlib
+import json
+
+from django.core.cache import caches
+from django.utils.crypto import salted_hmac
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# How long a request may hold its key before a retry is allowed to run it again
+IN_PROGRESS_TTL = 60
+
+
+def _store():
+    return caches['idempotency']
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def _cache_key(request, key):
+    user = request.user.pk if request.user and request.user.is_authenticated else 'anon'
+    return 'idempotency:' + _digest(f'{user}:{request.method}:{request.path}:{key}')
+
+
+def _fingerprint(request):
+    try:
+        body = json.dumps(request.data, sort_keys=True, default=str)
+    except TypeError:
+        body = repr(request.data)
+    return salted_hmac('event_booking.idempotency.fingerprint', body).hexdigest()
+
+
+def _replay(stored, fingerprint, load):
+    if stored['fingerprint'] != fingerprint:
+        return Response(
+            {"detail": f"This {HEADER} was already used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if stored.get('in_progress'):
+        return Response(
+            {"detail": f"A request with this {HEADER} is still being processed."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    data = load(stored['data']) if load else stored['data']
+    return Response(data, status=stored['status'], headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(view_method=None, *, dump=None, load=None):
+    """Make a POST handler idempotent; usable bare or as ``@idempotent(dump=..., load=...)``."""
+    if view_method is None:
+        return functools.partial(idempotent, dump=dump, load=load)
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        store = _store()
+        cache_key = _cache_key(request, key)
+        fingerprint = _fingerprint(request)
+
+        stored = store.get(cache_key)
+        if stored is not None:
+            return _replay(stored, fingerprint, load)
+        # Claim the key so a concurrent retry cannot run the write a second time
+        if not store.add(cache_key, {'fingerprint': fingerprint, 'in_progress': True}, IN_PROGRESS_TTL):
+            stored = store.get(cache_key)
+            if stored is not None:
+                return _replay(stored, fingerprint, load)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            store.delete(cache_key)
+            raise
+
+        if status.is_success(response.status_code):
+            store.set(cache_key, {
+                'fingerprint': fingerprint,
+                'status': response.status_code,
+                'data': dump(response.data) if dump else response.data,
+            })
+        else:
+            # Failed attempts are not remembered; the client may fix and retry
+            store.delete(cache_key)
+        return response
+
+    return wrapper
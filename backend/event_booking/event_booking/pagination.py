@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination over each viewset's indexed ``cursor_ordering``.
+
+    Pages are fetched with ``WHERE key > cursor ORDER BY key LIMIT n``, so the
+    cost does not grow with the page number and no COUNT(*) is ever run.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('id',)
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'cursor_ordering', self.ordering))
@@ -0,0 +1,143 @@
+"""Versioned response cache for the public catalog (venues, events).
+
+Every cached response is keyed by its namespace's *generation*, a counter that
+model signals bump on each write. Invalidation is therefore a single ``incr``:
+old entries are simply never looked up again and age out on their own, and no
+key scanning is needed.
+
+A cache miss is rebuilt by one request only (single flight): the first request
+takes a short lock and builds the response while the others wait for it to
+land in the cache instead of all hitting the database at once.
+"""
+import hashlib
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+DEFAULTS = {
+    'ALIAS': 'shared',
+    'TIMEOUT': 300,
+    'LOCK_TIMEOUT': 10,
+    'WAIT': 2.0,  # seconds a request waits for another one's rebuild
+}
+POLL_INTERVAL = 0.05
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'RESPONSE_CACHE', {})}
+
+
+def _store():
+    return caches[config()['ALIAS']]
+
+
+def _generation_key(namespace):
+    return f'response-gen:{namespace}'
+
+
+def _fresh_generation():
+    # A random start in a 62-bit space: a counter the cache lost (evicted,
+    # culled, flushed) does not come back at a value it had before, which
+    # would make that generation's entries and ETags valid again
+    return secrets.randbits(62)
+
+
+def generation(namespace):
+    store = _store()
+    key = _generation_key(namespace)
+    value = store.get(key)
+    if value is None:
+        # Whoever adds first wins; everyone then reads the same start
+        store.add(key, _fresh_generation(), None)
+        value = store.get(key) or _fresh_generation()
+    return value
+
+
+def bump(namespace):
+    """Invalidate every cached response of ``namespace``.
+
+    Deferred until the current transaction commits, so a concurrent rebuild
+    cannot cache the old rows under the new generation. A cache outage is
+    logged rather than failing the write that triggered it.
+    """
+    transaction.on_commit(lambda: _bump(namespace), robust=True)
+
+
+def _bump(namespace):
+    store = _store()
+    key = _generation_key(namespace)
+    try:
+        store.incr(key)
+    except ValueError:
+        # No generation yet (or it was evicted): start a fresh one
+        store.set(key, _fresh_generation(), None)
+
+
+def cache_key(namespace, variant):
+    """Key of one cached value of ``namespace`` under its current generation."""
+    digest = hashlib.sha256(variant.encode()).hexdigest()
+    return f'response:{namespace}:{generation(namespace)}:{digest}'
+
+
+def get_or_build(key, build):
+    """Return the cached value for ``key``, building it at most once at a time."""
+    opts = config()
+    store = _store()
+    value = store.get(key)
+    if value is not None:
+        return value
+
+    lock = f'{key}:lock'
+    if not store.add(lock, 1, opts['LOCK_TIMEOUT']):
+        # Someone else is rebuilding; wait for their result
+        deadline = time.monotonic() + opts['WAIT']
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            value = store.get(key)
+            if value is not None:
+                return value
+        # Builder is too slow or died: build without caching contention
+        return build()
+
+    try:
+        value = build()
+        if value is not None:
+            store.set(key, value, opts['TIMEOUT'])
+        return value
+    finally:
+        store.delete(lock)
+
+
+class CachedResponseMixin:
+    """Serve ``list``/``retrieve`` from the versioned response cache.
+
+    Only the serialized ``response.data`` of 200 responses is cached; rendering
+    (JSON, browsable API) still happens per request. Views that also compute an
+    ETag (``ConditionalGetMixin``) key entries by it, so a body cached just
+    before a write is never served under the validators read after it.
+    """
+    cache_namespace = None
+
+    def _cached(self, request, view):
+        key = cache_key(self.cache_namespace, f"{request.get_full_path()}|{getattr(self, 'etag', None) or ''}")
+
+        built = {}
+
+        def build():
+            built['response'] = response = view()
+            return response.data if response.status_code == 200 else None
+
+        data = get_or_build(key, build)
+        if data is None:
+            return built.get('response') or view()
+        return Response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
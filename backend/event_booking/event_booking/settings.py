@@ -54,24 +54,41 @@ INSTALLED_APPS = [
     'events',
     'bookings',
     'feedback',
+    'notifications',
 ]
 
 AUTH_USER_MODEL = 'user.User'
+# Username, email or vendor ID logins in one indexed query
+AUTHENTICATION_BACKENDS = ['user.backends.MultiIdentifierBackend']
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_HEADERS = [
     "authorization",
     "content-type",
     "accept",
+    "x-queue-token",
+    "idempotency-key",
+    "if-none-match",
+    "if-modified-since",
+]
+CORS_EXPOSE_HEADERS = [
+    "etag",
+    "last-modified",
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
-    )
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'event_booking.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', '50')),
+    # Reverse proxies in front of the app. Throttles (user.ratelimit) key on the
+    # client IP: with 0 that is REMOTE_ADDR and X-Forwarded-For, which any client
+    # can forge, is ignored; behind N trusted proxies the Nth address from the right
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
 }
 
 from datetime import timedelta
@@ -81,7 +98,17 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Tokens carry a digest of the password they were issued for; changing
+    # the password revokes them (also checked against the cached user)
+    'CHECK_REVOKE_TOKEN': True,
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    # Blacklist checks go through the in-process Bloom filter (user.blacklist)
+    'TOKEN_REFRESH_SERIALIZER': 'user.tokens.TokenRefreshSerializer',
+}
+# Expired tokens are removed by `manage.py prune_token_blacklist` (run it on a schedule)
+TOKEN_BLACKLIST_FILTER = {
+    'CAPACITY': int(os.getenv('TOKEN_BLACKLIST_FILTER_CAPACITY', '200000')),
+    'REFRESH_INTERVAL': float(os.getenv('TOKEN_BLACKLIST_FILTER_REFRESH', '60')),
 }
 
 MIDDLEWARE = [
@@ -138,11 +165,111 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
 
-# Cache settings for OTP storage
+# Email outbox (notifications.outbox), drained by `manage.py send_outbox --loop`
+OUTBOX = {
+    'MAX_ATTEMPTS': int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5')),
+    'BACKOFF': int(os.getenv('OUTBOX_BACKOFF', '30')),  # seconds before the first retry, doubled each time
+    'MAX_BACKOFF': int(os.getenv('OUTBOX_MAX_BACKOFF', '3600')),
+}
+
+# Staff notifications to every ticket holder of an event (notifications.broadcast),
+# sent by `manage.py send_event_notifications --loop`
+EVENT_NOTIFICATIONS = {
+    'CHUNK_SIZE': int(os.getenv('EVENT_NOTIFICATIONS_CHUNK_SIZE', '500')),  # recipients per send_messages call
+    'MAX_ATTEMPTS': int(os.getenv('EVENT_NOTIFICATIONS_MAX_ATTEMPTS', '5')),
+}
+
+# Contact-form notifications (feedback.digest). When enabled, messages are only
+# stored and `manage.py send_contact_digest` (run from cron) emails the host at
+# most one summary per WINDOW seconds instead of one email per message.
+CONTACT_DIGEST = {
+    'ENABLED': os.getenv('CONTACT_DIGEST_ENABLED', 'False') == 'True',
+    'WINDOW': int(os.getenv('CONTACT_DIGEST_WINDOW', '900')),
+    'MAX_ENTRIES': int(os.getenv('CONTACT_DIGEST_MAX_ENTRIES', '200')),  # distinct messages listed per digest
+    'MAX_LINKS': int(os.getenv('CONTACT_DIGEST_MAX_LINKS', '3')),  # more links than this is treated as spam
+}
+
+# How long a venue booking made as a hold (hold=True) keeps its date unconfirmed
+# before the sweeper (manage.py expire_venue_holds) returns it to inventory
+VENUE_HOLD_TTL = timedelta(minutes=int(os.getenv('VENUE_HOLD_TTL_MINUTES', '15')))
+# Longest venue booking (in days) a single request may cover
+VENUE_BOOKING_MAX_DAYS = int(os.getenv('VENUE_BOOKING_MAX_DAYS', '14'))
+
+# Cache settings
+# 'shared' holds state every worker process must see (e.g. the booking waiting
+# room). The database backend needs `python manage.py createcachetable`; point
+# SHARED_CACHE_BACKEND/SHARED_CACHE_LOCATION at Redis or Memcached in production.
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # Culling drops the lowest keys first, which include the response-cache
+    # generations, so keep the limit far above the working set
+    'shared': {
+        'BACKEND': os.getenv('SHARED_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', 'shared_cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SHARED_CACHE_MAX_ENTRIES', '1000000')),
+        },
+    },
+    # Stored responses for Idempotency-Key replays; bounded, oldest entries are culled
+    'idempotency': {
+        'BACKEND': os.getenv('IDEMPOTENCY_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('IDEMPOTENCY_CACHE_LOCATION', 'idempotency_cache'),
+        'TIMEOUT': int(os.getenv('IDEMPOTENCY_KEY_TTL', '86400')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '100000')),
+        },
+    },
+}
+
+# One-time login codes (user.otp). The database store is shared by every worker;
+# 'user.otp.CacheOTPStore' keeps them in OTP_CACHE_ALIAS instead
+OTP = {
+    'STORE': os.getenv('OTP_STORE', 'user.otp.DatabaseOTPStore'),
+    'CACHE_ALIAS': os.getenv('OTP_CACHE_ALIAS', 'shared'),
+    'TTL': int(os.getenv('OTP_TTL', '300')),  # seconds a code stays valid
+    'MAX_ATTEMPTS': int(os.getenv('OTP_MAX_ATTEMPTS', '5')),  # wrong codes before a lockout
+    'LOCKOUT': int(os.getenv('OTP_LOCKOUT', '900')),  # seconds an identifier stays locked
+}
+
+# Users resolved from access tokens (user.authentication) are cached for
+# TIMEOUT seconds; saves invalidate the entry in ALIAS, which every worker shares
+AUTH_USER_CACHE = {
+    'ALIAS': os.getenv('AUTH_USER_CACHE_ALIAS', 'shared'),
+    'TIMEOUT': int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60')),
+}
+
+# Vendor ID numbers each process reserves per state/city prefix at a time (user.vendor_ids)
+VENDOR_ID_BLOCK_SIZE = int(os.getenv('VENDOR_ID_BLOCK_SIZE', '20'))
+
+# Bulk user/vendor import (user.bulk_import): the largest file the staff API
+# accepts; bigger ones go through manage.py import_users, which hashes in a process pool
+USER_IMPORT_MAX_API_ROWS = int(os.getenv('USER_IMPORT_MAX_API_ROWS', '2000'))
+
+# Sliding-window limits of the login, OTP and registration endpoints
+# (user.ratelimit), as (requests, window in seconds) per key
+AUTH_RATE_LIMIT = {
+    'ALIAS': 'shared',
+    'RATES': {
+        'ip': (int(os.getenv('AUTH_RATE_LIMIT_IP', '30')), 60),
+        'identifier': (int(os.getenv('AUTH_RATE_LIMIT_IDENTIFIER', '10')), 300),
+        'vendor_id': (int(os.getenv('AUTH_RATE_LIMIT_VENDOR_ID', '10')), 300),
+    },
+}
+
+# Versioned response cache for the venue/event catalog (event_booking.response_cache)
+RESPONSE_CACHE = {
+    'ALIAS': 'shared',
+    'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300')),
+}
+
+# Virtual waiting room for events flagged with Event.waiting_room
+BOOKING_WAITING_ROOM = {
+    'ADMIT_RATE': float(os.getenv('WAITING_ROOM_ADMIT_RATE', '20')),  # buyers admitted per second
+    'BURST': int(os.getenv('WAITING_ROOM_BURST', '50')),  # admitted straight away when the queue is idle
+    'MAX_QUEUE': int(os.getenv('WAITING_ROOM_MAX_QUEUE', '5000')),  # waiting buyers before joins get 503
+    'TOKEN_TTL': int(os.getenv('WAITING_ROOM_TOKEN_TTL', '1800')),  # seconds a queue token stays valid
 }
 
 
@@ -0,0 +1,26 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountGuardMixin:
+    """Fail when a list endpoint's query count grows with the number of rows."""
+
+    def count_list_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return len(queries), len(response.data['results'])
+
+    def assertListQueriesConstant(self, url, add_rows, small=2, large=6):
+        # Run on-commit hooks (cache invalidation) as a real commit would
+        with self.captureOnCommitCallbacks(execute=True):
+            add_rows(small)
+        baseline, listed = self.count_list_queries(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            add_rows(large - small)
+        grown, listed_more = self.count_list_queries(url)
+        self.assertGreater(listed_more, listed, f"{url} did not list the new rows")
+        self.assertEqual(
+            baseline, grown,
+            f"{url} ran {baseline} queries for {listed} rows but {grown} for {listed_more} (N+1)",
+        )
@@ -24,7 +24,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from events.views import EventViewSet
-from bookings.views import BookingViewSet, VenueBookingViewSet
+from bookings.views import BookingViewSet, EventSalesViewSet, VenueBookingViewSet, VenueSalesViewSet, WaitlistViewSet
 from feedback.views import FeedbackViewSet, ContactMessageViewSet
 
 
@@ -34,6 +34,9 @@ router.register(r'venues', VenueViewSet)
 router.register(r'events', EventViewSet)
 router.register(r'bookings', BookingViewSet)
 router.register(r'venue-bookings', VenueBookingViewSet)   
+router.register(r'waitlist', WaitlistViewSet)
+router.register(r'sales/events', EventSalesViewSet)
+router.register(r'sales/venues', VenueSalesViewSet)
 router.register(r'feedback', FeedbackViewSet, basename='feedback')   
 router.register(r'contact', ContactMessageViewSet, basename='contact')   
 
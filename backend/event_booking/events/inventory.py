@@ -0,0 +1,73 @@
+"""Ticket inventory for events.
+
+``Event.tickets_remaining`` is only ever changed through the conditional
+``UPDATE`` statements below, so concurrent buyers serialise on the event row in
+the database and the counter can never go below zero (no oversell).
+
+The catalog shows whether an event is sold out, not the exact count, so an
+ordinary sale leaves the cached event responses alone. Only a change that
+crosses the sold-out line stamps ``updated_at`` and bumps the event response
+cache (queryset updates send no signals). Capacity edits go through
+``Event.save()``, whose signal bumps it anyway.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from event_booking import response_cache
+
+SOLD_OUT_MESSAGE = "Not enough tickets left for this event."
+
+
+def _apply(event_id, delta, **condition):
+    """Add ``delta`` to the remaining tickets if ``condition`` holds.
+
+    Returns the new count, or ``None`` if nothing matched.
+    """
+    from .models import Event
+
+    with transaction.atomic():
+        if not Event.objects.filter(pk=event_id, **condition).update(tickets_remaining=F('tickets_remaining') + delta):
+            return None
+        # The update holds the row lock, so this reads our own write
+        return Event.objects.filter(pk=event_id).values_list('tickets_remaining', flat=True).get()
+
+
+def _availability_changed(event_id):
+    from .models import Event
+
+    Event.objects.filter(pk=event_id).update(updated_at=timezone.now())
+    response_cache.bump('event')
+
+
+def reserve(event_id, quantity):
+    """Take ``quantity`` tickets from the event or raise ``ValidationError``."""
+    if quantity <= 0:
+        return
+    remaining = _apply(event_id, -quantity, tickets_remaining__gte=quantity)
+    if remaining is None:
+        raise ValidationError(SOLD_OUT_MESSAGE)
+    if remaining == 0:
+        _availability_changed(event_id)
+
+
+def release(event_id, quantity):
+    """Put ``quantity`` tickets back on sale."""
+    if quantity <= 0:
+        return
+    if _apply(event_id, quantity) == quantity:
+        # Was sold out until now
+        _availability_changed(event_id)
+
+
+def adjust_capacity(event_id, delta):
+    """Apply a capacity change of ``delta`` to the remaining tickets.
+
+    A reduction is refused when more tickets than that have already been sold.
+    """
+    if delta >= 0:
+        release(event_id, delta)
+        return
+    if _apply(event_id, delta, tickets_remaining__gte=-delta) is None:
+        raise ValidationError("Capacity cannot be reduced below the number of tickets already sold.")
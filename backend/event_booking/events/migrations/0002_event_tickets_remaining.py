@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:26
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_tickets_remaining(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    Booking = apps.get_model('bookings', 'Booking')
+
+    sold = dict(
+        Booking.objects.filter(status__in=['pending', 'confirmed'])
+        .values_list('event_id')
+        .annotate(total=Sum('num_tickets'))
+    )
+    for event in Event.objects.only('id', 'capacity').iterator():
+        event.tickets_remaining = max(event.capacity - (sold.get(event.id) or 0), 0)
+        event.save(update_fields=['tickets_remaining'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('bookings', '0005_remove_booking_purpose'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='tickets_remaining',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_tickets_remaining, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_tickets_remaining'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='waiting_room',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from venue.models import Venue
 
@@ -11,6 +11,44 @@ class Event(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='events_created')
     capacity = models.IntegerField()
     price = models.DecimalField(max_digits=8, decimal_places=2)
+    # Maintained by events.inventory; starts at capacity
+    tickets_remaining = models.PositiveIntegerField(default=0)
+    # Hot events: buyers must pass the booking waiting room before booking
+    waiting_room = models.BooleanField(default=False)
+    # Feeds the catalog's ETag / Last-Modified validators; events.inventory
+    # bumps it as well when the event sells out or comes back on sale
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_capacity = instance.capacity
+        return instance
+
+    def save(self, *args, **kwargs):
+        from . import inventory
+
+        if self._state.adding:
+            self.tickets_remaining = self.capacity
+            super().save(*args, **kwargs)
+            self._loaded_capacity = self.capacity
+            return
+
+        # Never write back a possibly stale tickets_remaining; it only changes
+        # through the conditional updates in events.inventory
+        if kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'tickets_remaining'
+            ]
+        delta = self.capacity - getattr(self, '_loaded_capacity', self.capacity)
+        with transaction.atomic():
+            if delta:
+                inventory.adjust_capacity(self.pk, delta)
+            super().save(*args, **kwargs)
+        if delta:
+            self._loaded_capacity = self.capacity
+            self.refresh_from_db(fields=['tickets_remaining'])
 
     def __str__(self):
         return self.title
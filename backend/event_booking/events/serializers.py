@@ -1,8 +1,22 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 from .models import Event
 
 class EventSerializer(serializers.ModelSerializer):
+    # Only availability, not the live count: the catalog response cache is
+    # invalidated when an event sells out or comes back, not on every sale
+    sold_out = serializers.SerializerMethodField()
+
     class Meta:
         model = Event
-        fields = '__all__'
+        exclude = ('tickets_remaining',)
         read_only_fields = ('created_by',)
+
+    def get_sold_out(self, obj):
+        return obj.tickets_remaining == 0
+
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({'capacity': exc.messages})
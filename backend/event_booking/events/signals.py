@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from event_booking import response_cache
+from .models import Event
+
+
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_event_responses(sender, **kwargs):
+    response_cache.bump('event')
@@ -1,3 +1,58 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from rest_framework.test import APITestCase
+from bookings.models import Booking
+from event_booking.testing import QueryCountGuardMixin
+from user.models import User
+from venue.models import Venue
+from .models import Event
 
-# Create your tests here.
+
+class EventListQueryCountTests(QueryCountGuardMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        self.venue = Venue.objects.create(name='Ramada', location='Lucknow', capacity=300, created_by=self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_events_list(self):
+        def add(count):
+            for _ in range(count):
+                Event.objects.create(
+                    title='Concert', description='Live', date=date.today() + timedelta(days=30), time=time(19, 0),
+                    venue=self.venue, created_by=self.user, capacity=100, price=500,
+                )
+        self.assertListQueriesConstant('/api/events/', add)
+
+
+class EventConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        venue = Venue.objects.create(name='Ramada', location='Lucknow', capacity=300, created_by=self.user)
+        self.event = Event.objects.create(
+            title='Concert', description='Live', date=date.today() + timedelta(days=30), time=time(19, 0),
+            venue=venue, created_by=self.user, capacity=100, price=500,
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_only_selling_out_changes_the_etag(self):
+        url = f'/api/events/{self.event.pk}/'
+        etag = self.client.get(url).headers['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # An ordinary sale leaves the cached catalog alone
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(user=self.user, event=self.event, num_tickets=2)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            last = Booking.objects.create(user=self.user, event=self.event, num_tickets=98)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['sold_out'])
+        self.assertNotIn('tickets_remaining', response.data)
+
+        etag = response.headers['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            last.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['sold_out'])
@@ -1,12 +1,35 @@
-from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from event_booking.conditional import ConditionalGetMixin
+from event_booking.response_cache import CachedResponseMixin
+from notifications import broadcast
+from notifications.serializers import EventNotificationSerializer
 from .models import Event
 from .serializers import EventSerializer
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    cache_namespace = 'event'
     queryset = Event.objects.all()
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
+
+    @action(detail=True, methods=['get', 'post'], permission_classes=[IsAdminUser],
+            serializer_class=EventNotificationSerializer)
+    def notify(self, request, pk=None):
+        """POST {subject, message} queues an email to every ticket holder (sent by
+        manage.py send_event_notifications); GET lists this event's jobs and their progress.
+        """
+        event = self.get_object()
+        if request.method == 'GET':
+            jobs = event.notifications.order_by('-created_at', '-id')
+            return Response(EventNotificationSerializer(jobs, many=True).data)
+        serializer = EventNotificationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = broadcast.create(event, serializer.validated_data['subject'], serializer.validated_data['message'],
+                               user=request.user)
+        return Response(EventNotificationSerializer(job).data, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,110 @@
+"""Contact-message digests for the host.
+
+With ``CONTACT_DIGEST['ENABLED']`` the contact form only stores the message;
+``manage.py send_contact_digest`` (run every minute or so) sends at most one
+summary email per ``WINDOW`` seconds covering everything received since the
+last one. Identical messages from the same sender collapse into one entry
+with a count, and link-stuffed messages are folded into a single spam line,
+so a burst of any size costs one send.
+
+The pending rows themselves are the durable buffer; a digest holds at most
+``MAX_ENTRIES`` distinct entries in memory and only counts the rest.
+"""
+import hashlib
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from notifications import outbox
+
+DEFAULTS = {
+    'ENABLED': False,
+    'WINDOW': 900,
+    'MAX_ENTRIES': 200,
+    'MAX_LINKS': 3,
+}
+LINK = re.compile(r'https?://|www\.', re.IGNORECASE)
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'CONTACT_DIGEST', {})}
+
+
+def is_enabled():
+    return config()['ENABLED']
+
+
+def _fingerprint(message):
+    text = ' '.join(message.message.lower().split())
+    return hashlib.sha256(f'{message.email.lower()}\n{text}'.encode()).hexdigest()
+
+
+def collect(messages, max_entries, max_links):
+    """Collapse ``messages`` into digest entries; returns ``(entries, spam, overflow)``."""
+    entries = {}
+    spam = {}
+    overflow = 0
+    for message in messages:
+        if len(LINK.findall(message.message)) > max_links:
+            sender = message.email.lower()
+            if sender in spam or len(spam) < max_entries:
+                spam[sender] = spam.get(sender, 0) + 1
+            else:
+                overflow += 1
+            continue
+        key = _fingerprint(message)
+        if key in entries:
+            entries[key]['count'] += 1
+            entries[key]['last_at'] = message.created_at
+        elif len(entries) < max_entries:
+            entries[key] = {'message': message, 'count': 1, 'last_at': message.created_at}
+        else:
+            overflow += 1
+    return list(entries.values()), spam, overflow
+
+
+def send_digest(force=False):
+    """Queue one digest of every unnotified message; returns how many it covered.
+
+    Does nothing while the previous digest is younger than ``WINDOW`` seconds,
+    unless ``force`` is set.
+    """
+    from .models import ContactMessage
+
+    opts = config()
+    if not settings.EMAIL_HOST_USER:
+        return 0
+    now = timezone.now()
+    if not force:
+        last = ContactMessage.objects.aggregate(last=Max('notified_at'))['last']
+        if last and now - last < timedelta(seconds=opts['WINDOW']):
+            return 0
+
+    pending = ContactMessage.objects.filter(notified_at__isnull=True).order_by('id')
+    last_id = pending.aggregate(last=Max('id'))['last']
+    if last_id is None:
+        return 0
+    covered = pending.filter(id__lte=last_id)
+    entries, spam, overflow = collect(
+        covered.only('id', 'name', 'email', 'message', 'created_at').iterator(chunk_size=500),
+        opts['MAX_ENTRIES'], opts['MAX_LINKS'],
+    )
+    total = sum(entry['count'] for entry in entries) + sum(spam.values()) + overflow
+
+    body = render_to_string('email/contact_digest.html', {
+        'entries': entries,
+        'spam': sorted(spam.items(), key=lambda item: -item[1]),
+        'spam_total': sum(spam.values()),
+        'overflow': overflow,
+        'total': total,
+    })
+    with transaction.atomic():
+        outbox.enqueue(f"{total} new contact message(s) on Occasio", body, [settings.EMAIL_HOST_USER],
+                       from_email=outbox.default_from_email())
+        covered.update(notified_at=now)
+    return total
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from feedback import digest
+
+
+class Command(BaseCommand):
+    help = "Email the host one summary of the contact messages received since the last digest."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Send now even if the last digest is younger than the window.")
+
+    def handle(self, *args, **options):
+        covered = digest.send_digest(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f"Digested {covered} contact message(s)."))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_waiting_room'),
+        ('feedback', '0002_contactmessage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['created_at', 'id'], name='feedback_co_created_62f762_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['created_at', 'id'], name='feedback_fe_created_20b018_idx'),
+        ),
+    ]
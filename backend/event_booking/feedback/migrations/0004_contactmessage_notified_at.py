@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:15
+
+from django.db import migrations, models
+
+
+def mark_existing_notified(apps, schema_editor):
+    # Everything received so far was emailed one by one already
+    ContactMessage = apps.get_model('feedback', 'ContactMessage')
+    ContactMessage.objects.update(notified_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactmessage',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_notified, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['notified_at', 'id'], name='feedback_co_notifie_453da0_idx'),
+        ),
+    ]
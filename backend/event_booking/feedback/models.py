@@ -9,14 +9,27 @@ class Feedback(models.Model):
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
+
     def __str__(self):
-        return f"{self.user.username} - {self.event.name}"
+        return f"{self.user.username} - {self.event.title}"
 
 class ContactMessage(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set once the host has been emailed about it (directly or in a digest)
+    notified_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['notified_at', 'id']),
+        ]
 
     def __str__(self):
         return f"Contact from {self.name} - {self.email}"
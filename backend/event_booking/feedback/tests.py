@@ -1,3 +1,83 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from event_booking.testing import QueryCountGuardMixin
+from notifications.models import OutboxEmail
+from events.models import Event
+from user.models import User
+from venue.models import Venue
+from . import digest
+from .models import ContactMessage, Feedback
 
-# Create your tests here.
+
+class FeedbackListQueryCountTests(QueryCountGuardMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='Test@1234')
+        venue = Venue.objects.create(name='Ramada', location='Lucknow', capacity=300, created_by=self.user)
+        self.event = Event.objects.create(
+            title='Concert', description='Live', date=date.today() + timedelta(days=30), time=time(19, 0),
+            venue=venue, created_by=self.user, capacity=100, price=500,
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_feedback_list(self):
+        def add(count):
+            for _ in range(count):
+                Feedback.objects.create(user=self.user, event=self.event, rating=5)
+        self.assertListQueriesConstant('/api/feedback/', add)
+
+    def test_contact_list(self):
+        def add(count):
+            for _ in range(count):
+                ContactMessage.objects.create(name='Asha', email='asha@example.com', message='Hello')
+        self.assertListQueriesConstant('/api/contact/', add)
+
+    def test_feedback_str_uses_event_title(self):
+        feedback = Feedback.objects.create(user=self.user, event=self.event, rating=4)
+        self.assertEqual(str(feedback), 'guest - Concert')
+
+
+@override_settings(EMAIL_HOST_USER='host@example.com',
+                   CONTACT_DIGEST={'ENABLED': True, 'WINDOW': 900, 'MAX_ENTRIES': 2, 'MAX_LINKS': 1})
+class ContactDigestTests(APITestCase):
+    def post(self, email, message):
+        response = self.client.post('/api/contact/', {'name': 'Asha', 'email': email, 'message': message})
+        self.assertEqual(response.status_code, 201)
+
+    def test_burst_becomes_one_digest(self):
+        for _ in range(3):
+            self.post('asha@example.com', 'Is the hall  free in May?')
+        self.post('ASHA@example.com', 'is the hall free in may?')
+        self.post('bot@example.com', 'Cheap http://a.example http://b.example')
+        self.post('bot@example.com', 'Deals www.c.example www.d.example')
+        self.post('ravi@example.com', 'Do you do weddings?')
+        self.post('neha@example.com', 'Parking?')
+        self.assertFalse(OutboxEmail.objects.exists())
+
+        self.assertEqual(digest.send_digest(), 8)
+        email = OutboxEmail.objects.get()
+        self.assertIn('sent 4 times', email.body)
+        self.assertIn('bot@example.com &times; 2', email.body)
+        self.assertIn('Do you do weddings?', email.body)
+        self.assertIn('1 more message not shown', email.body)
+        self.assertFalse(ContactMessage.objects.filter(notified_at__isnull=True).exists())
+
+    def test_window_limits_digest_rate(self):
+        self.post('asha@example.com', 'Hello')
+        call_command('send_contact_digest', stdout=StringIO())
+        self.post('ravi@example.com', 'Hello again')
+        self.assertEqual(digest.send_digest(), 0)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+        call_command('send_contact_digest', '--force', stdout=StringIO())
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+        self.assertEqual(digest.send_digest(force=True), 0)  # nothing pending
+
+    @override_settings(CONTACT_DIGEST={'ENABLED': False})
+    def test_immediate_mode_marks_message_notified(self):
+        self.post('asha@example.com', 'Hello')
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+        self.assertIsNotNone(ContactMessage.objects.get().notified_at)
+        self.assertEqual(digest.send_digest(force=True), 0)
@@ -1,17 +1,22 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.core.mail import EmailMessage
 from django.conf import settings
+from django.db import transaction
 from django.template.loader import render_to_string
+from django.utils import timezone
+from notifications import outbox
+from . import digest
 from .models import Feedback, ContactMessage
 from .serializers import FeedbackSerializer, ContactMessageSerializer
 from .permissions import IsOwnerOrAdmin
 
 class FeedbackViewSet(viewsets.ModelViewSet):
+    # FeedbackSerializer renders user/event as ids only, so nothing is joined
     queryset = Feedback.objects.all()
     serializer_class = FeedbackSerializer
     permission_classes = [permissions.IsAuthenticated,IsOwnerOrAdmin]
+    cursor_ordering = ('-created_at', '-id')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -20,9 +25,14 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
     permission_classes = [permissions.AllowAny]
+    cursor_ordering = ('-created_at', '-id')
 
+    @transaction.atomic
     def perform_create(self, serializer):
         contact_message = serializer.save()
+        if digest.is_enabled():
+            # Left pending for the next send_contact_digest run
+            return
         # Send email to host
         subject = f"New Contact Message from {contact_message.name}"
         message = render_to_string('email/contact_message.html', {
@@ -31,15 +41,11 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
             'message': contact_message.message,
             'created_at': contact_message.created_at,
         })
-        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', None)
+        from_email = outbox.default_from_email()
         recipient_list = [settings.EMAIL_HOST_USER]  # Send to the host email
 
-        if from_email and recipient_list:
-            msg = EmailMessage(subject, message, from_email, recipient_list)
-            msg.content_subtype = "html"  # Main content is now text/html
-            try:
-                msg.send(fail_silently=False)
-            except Exception as e:
-                # Log the error but don't fail the request
-                import logging
-                logging.getLogger(__name__).exception("Failed to send contact email")
+        if from_email and settings.EMAIL_HOST_USER:
+            # Queued in the same transaction; the outbox worker sends it
+            outbox.enqueue(subject, message, recipient_list, from_email=from_email)
+            contact_message.notified_at = timezone.now()
+            contact_message.save(update_fields=['notified_at'])
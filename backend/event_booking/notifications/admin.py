@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import EventNotification, OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    def get_exclude(self, request, obj=None):
+        # Sensitive bodies hold login codes; keep them off the admin
+        if obj is not None and obj.sensitive:
+            return ('body',)
+        return super().get_exclude(request, obj)
+
+
+admin.site.register(EventNotification)
@@ -0,0 +1,184 @@
+"""Notify every ticket holder of an event (date, time or venue changes).
+
+Staff create an ``EventNotification`` through ``POST /api/events/<id>/notify/``;
+``manage.py send_event_notifications`` does the sending. Recipients are
+streamed with ``.iterator()`` in user id order, ``CHUNK_SIZE`` at a time. Each
+chunk renders the template once and goes out with one ``send_messages`` call
+over a single reused connection, one message per recipient. The job's cursor
+(``last_user_id``) moves past every recipient handled and is saved after each
+chunk and whenever a send fails.
+
+A recipient the server refuses outright (5xx) is recorded in
+``bad_recipients`` and skipped. Any other error stops the run: the job keeps
+its cursor and is retried with backoff, and it is only marked ``failed`` after
+``MAX_ATTEMPTS`` consecutive failures (the count resets with every chunk that
+goes through). A worker that dies mid-run loses its lease and the job is
+picked up again from the last saved cursor, so at most part of one chunk is
+sent twice.
+"""
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import outbox
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CHUNK_SIZE': 500,
+    'LEASE': 300,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 60,
+}
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'EVENT_NOTIFICATIONS', {})}
+
+
+def recipients(event_id, after_user_id=0):
+    """``(user_id, email)`` of everyone holding an active booking, by user id."""
+    from bookings.availability import ACTIVE_STATUSES
+    from user.models import User
+
+    return (
+        User.objects.filter(
+            bookings__event_id=event_id, bookings__status__in=ACTIVE_STATUSES, id__gt=after_user_id,
+        )
+        .exclude(email='')
+        .order_by('id')
+        .values_list('id', 'email')
+        .distinct()
+    )
+
+
+def create(event, subject, message, user=None):
+    """Queue a notification to ``event``'s ticket holders; returns the job."""
+    from .models import EventNotification
+
+    return EventNotification.objects.create(
+        event=event, subject=subject, message=message, created_by=user,
+        total=recipients(event.pk).count(),
+    )
+
+
+def _claim(opts):
+    from .models import EventNotification
+
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            EventNotification.objects.select_for_update(skip_locked=True)
+            .filter(status__in=('pending', 'running'), next_attempt_at__lte=now)
+            .select_related('event', 'event__venue')
+            .order_by('next_attempt_at', 'id')
+            .first()
+        )
+        if job is not None:
+            job.status = 'running'
+            job.next_attempt_at = now + timedelta(seconds=opts['LEASE'])
+            job.save(update_fields=['status', 'next_attempt_at'])
+    return job
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _refused(exc):
+    """Whether ``exc`` rejects the recipient for good rather than the attempt."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(exc, smtplib.SMTPResponseException) and 500 <= exc.smtp_code < 600
+
+
+def _save_progress(job, *fields):
+    job.save(update_fields=['sent', 'last_user_id', 'bad_recipients', *fields])
+
+
+def _fail(job, exc, opts):
+    job.attempts += 1
+    job.last_error = str(exc)
+    logger.warning("Event notification %s failed after user %s (attempt %s): %s",
+                   job.pk, job.last_user_id, job.attempts, exc)
+    if job.attempts >= opts['MAX_ATTEMPTS']:
+        job.status = 'failed'
+        job.finished_at = timezone.now()
+    else:
+        delay = opts['BACKOFF'] * 2 ** (job.attempts - 1)
+        job.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    _save_progress(job, 'attempts', 'last_error', 'status', 'finished_at', 'next_attempt_at')
+
+
+def _send_chunk(job, chunk, connection, opts):
+    """Send one chunk; returns ``False`` if the run has to stop."""
+    # One render per chunk; the body carries nothing recipient specific
+    body = render_to_string('email/event_update.html', {'event': job.event, 'message': job.message})
+    for user_id, email in chunk:
+        msg = EmailMessage(job.subject, body, outbox.default_from_email(), [email], connection=connection)
+        msg.content_subtype = "html"
+        try:
+            connection.send_messages([msg])
+        except Exception as exc:
+            if not _refused(exc):
+                _fail(job, exc, opts)
+                connection.close()
+                return False
+            logger.info("Event notification %s: %s refused: %s", job.pk, email, exc)
+            job.bad_recipients.append(email)
+        else:
+            job.sent += 1
+        job.last_user_id = user_id
+    return True
+
+
+def run(job, connection, opts):
+    """Send ``job`` from its cursor to the end; returns how many were sent."""
+    before = job.sent
+    rows = recipients(job.event_id, job.last_user_id).iterator(chunk_size=opts['CHUNK_SIZE'])
+    for chunk in _chunks(rows, opts['CHUNK_SIZE']):
+        if not _send_chunk(job, chunk, connection, opts):
+            return job.sent - before
+        job.attempts = 0
+        # Extend the lease with every chunk so long runs are not taken over
+        job.next_attempt_at = timezone.now() + timedelta(seconds=opts['LEASE'])
+        _save_progress(job, 'attempts', 'next_attempt_at')
+
+    job.status = 'done'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at'])
+    return job.sent - before
+
+
+def send_pending():
+    """Run every due job; returns the number of emails sent."""
+    opts = config()
+    connection = get_connection()
+    sent = 0
+    try:
+        while True:
+            job = _claim(opts)
+            if job is None:
+                return sent
+            try:
+                connection.open()
+            except Exception as exc:
+                # Server unreachable: the attempt counts against the job
+                _fail(job, exc, opts)
+                continue
+            sent += run(job, connection, opts)
+    finally:
+        connection.close()
@@ -0,0 +1,36 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications import broadcast
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Send queued event notifications to ticket holders in chunks, resuming unfinished jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep running as a worker, polling for new jobs.")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Seconds between polls with --loop (default 5).")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent = broadcast.send_pending()
+            except Exception:
+                if not options['loop']:
+                    raise
+                # A worker outlives database or mail server hiccups; a claimed
+                # job is picked up again once its lease runs out
+                logger.exception("Event notification run failed; retrying in %ss", options['interval'])
+                time.sleep(options['interval'])
+                continue
+            if sent or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"Sent {sent} event notification email(s)."))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,37 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications import outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails over one SMTP connection, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep running as a worker, polling for new emails.")
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds between polls with --loop (default 1).")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = outbox.send_pending(batch_size=options['batch_size'])
+            except Exception:
+                if not options['loop']:
+                    raise
+                # A worker outlives database or mail server hiccups; claimed
+                # emails are retried once their lease runs out
+                logger.exception("Outbox run failed; retrying in %ss", options['interval'])
+                time.sleep(options['interval'])
+                continue
+            if sent or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s); {failed} gave up."))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_eventnotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventnotification',
+            name='bad_recipients',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    """An email waiting for (or done with) the outbox worker, see notifications.outbox."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html = models.BooleanField(default=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField()  # list of addresses
+    # Bodies with secrets (login codes) are wiped once the email is done with
+    sensitive = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # The worker's queue: due pending emails, oldest first
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+class EventNotification(models.Model):
+    """A message to every ticket holder of an event, sent by notifications.broadcast."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    event = models.ForeignKey('events.Event', on_delete=models.CASCADE, related_name='notifications')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True,
+                                   related_name='+')
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Progress: recipients are walked in user id order and every finished
+    # chunk moves the cursor, so a crashed or failed run resumes after it
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    last_user_id = models.BigIntegerField(default=0)
+    # Addresses the mail server refused for good; they are skipped
+    bad_recipients = models.JSONField(default=list, blank=True)
+    # Consecutive failed attempts; reset whenever a chunk goes through
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # A worker owns the job until then; after that another may pick it up
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> event {self.event_id} ({self.status}, {self.sent}/{self.total})"
@@ -0,0 +1,143 @@
+"""Durable email outbox.
+
+Request handlers only ``enqueue()`` a row; ``manage.py send_outbox`` drains the
+table in batches over one reused SMTP connection. A failed send is retried
+with exponential backoff (``BACKOFF`` * 2^attempts, capped at ``MAX_BACKOFF``)
+until ``MAX_ATTEMPTS`` is reached. Each batch is claimed with a short lease, so
+several workers can run at once and a crashed worker's batch is picked up
+again once its lease runs out.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 30,
+    'MAX_BACKOFF': 3600,
+    'LEASE': 300,
+}
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'OUTBOX', {})}
+
+
+def default_from_email():
+    return getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', None) or ''
+
+
+def enqueue(subject, body, to, from_email=None, html=True, sensitive=False):
+    """Queue an email for the outbox worker; returns the ``OutboxEmail``.
+
+    Runs in the caller's transaction, so nothing is sent if it rolls back.
+    """
+    from .models import OutboxEmail
+
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        html=html,
+        from_email=from_email or '',
+        to=list(to),
+        sensitive=sensitive,
+    )
+
+
+def _claim(batch_size, opts):
+    from .models import OutboxEmail
+
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            OutboxEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+                next_attempt_at=now + timedelta(seconds=opts['LEASE'])
+            )
+    return batch
+
+
+def _message(email, connection):
+    msg = EmailMessage(email.subject, email.body, email.from_email or default_from_email(), email.to,
+                       connection=connection)
+    if email.html:
+        msg.content_subtype = "html"
+    return msg
+
+
+def _finish(email, fields):
+    if email.sensitive and email.status != 'pending':
+        email.body = ''
+        fields.append('body')
+    email.save(update_fields=fields)
+
+
+def _record_failure(email, exc, opts):
+    """Count a failed attempt at ``email``; returns True once it is given up on."""
+    email.attempts += 1
+    logger.warning("Outbox email %s failed (attempt %s): %s", email.pk, email.attempts, exc)
+    email.last_error = str(exc)
+    if email.attempts >= opts['MAX_ATTEMPTS']:
+        email.status = 'failed'
+    else:
+        delay = min(opts['BACKOFF'] * 2 ** (email.attempts - 1), opts['MAX_BACKOFF'])
+        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    _finish(email, ['attempts', 'status', 'next_attempt_at', 'last_error'])
+    return email.status == 'failed'
+
+
+def _send_batch(batch, connection, opts):
+    """Send one claimed batch over ``connection``; returns ``(sent, failed)``."""
+    sent = failed = 0
+    try:
+        # Opened once and reused for every message of the batch
+        connection.open()
+    except Exception as exc:
+        # Server unreachable: every email of the batch spent an attempt
+        return sent, sum(_record_failure(email, exc, opts) for email in batch)
+    for index, email in enumerate(batch):
+        try:
+            connection.send_messages([_message(email, connection)])
+        except Exception as exc:
+            failed += _record_failure(email, exc, opts)
+            # The server may have dropped us; the rest of the batch goes over
+            # a fresh connection
+            connection.close()
+            try:
+                connection.open()
+            except Exception as exc:
+                return sent, failed + sum(_record_failure(rest, exc, opts) for rest in batch[index + 1:])
+            continue
+        email.attempts += 1
+        email.status = 'sent'
+        email.sent_at = timezone.now()
+        sent += 1
+        _finish(email, ['attempts', 'status', 'sent_at'])
+    return sent, failed
+
+
+def send_pending(batch_size=100):
+    """Send every due email; returns ``(sent, failed)`` counts for this run."""
+    opts = config()
+    connection = get_connection()
+    sent = failed = 0
+    try:
+        while True:
+            batch = _claim(batch_size, opts)
+            if not batch:
+                return sent, failed
+            batch_sent, batch_failed = _send_batch(batch, connection, opts)
+            sent += batch_sent
+            failed += batch_failed
+    finally:
+        connection.close()
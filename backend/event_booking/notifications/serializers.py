@@ -0,0 +1,11 @@
+from rest_framework import serializers
+from .models import EventNotification
+
+
+class EventNotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventNotification
+        fields = ['id', 'event', 'subject', 'message', 'status', 'total', 'sent', 'bad_recipients',
+                  'attempts', 'last_error', 'created_at', 'finished_at']
+        read_only_fields = ['event', 'status', 'total', 'sent', 'bad_recipients', 'attempts', 'last_error',
+                            'created_at', 'finished_at']
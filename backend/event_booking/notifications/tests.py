@@ -0,0 +1,183 @@
+import smtplib
+from datetime import date, time, timedelta
+from io import StringIO
+from django.contrib import admin
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from bookings.models import Booking
+from events.models import Event
+from user.models import User
+from venue.models import Venue
+from . import broadcast, outbox
+from .models import EventNotification, OutboxEmail
+
+
+class FlakyBackend(EmailBackend):
+    """locmem backend that fails on bounce@ addresses, rejects refused@ ones for
+    good and counts opens."""
+    opened = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        addresses = [address for message in messages for address in message.to]
+        if any(address.startswith('refused@') for address in addresses):
+            raise smtplib.SMTPRecipientsRefused({address: (550, b'No such user') for address in addresses})
+        if any(address.startswith('bounce@') for address in addresses):
+            raise ConnectionError("mailbox unavailable")
+        return super().send_messages(messages)
+
+
+class DownBackend(EmailBackend):
+    """locmem backend whose server cannot be reached."""
+
+    def open(self):
+        raise ConnectionRefusedError("connection refused")
+
+
+@override_settings(EMAIL_BACKEND='notifications.tests.FlakyBackend',
+                   OUTBOX={'MAX_ATTEMPTS': 2, 'BACKOFF': 60})
+class OutboxWorkerTests(TestCase):
+    def setUp(self):
+        FlakyBackend.opened = 0
+
+    def test_batch_goes_over_one_connection(self):
+        for n in range(5):
+            outbox.enqueue("Hello", "<p>Hi</p>", [f'user{n}@example.com'])
+        self.assertEqual(outbox.send_pending(batch_size=2), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(FlakyBackend.opened, 3)  # once per claimed batch, not per email
+        self.assertEqual(mail.outbox[0].content_subtype, 'html')
+        self.assertFalse(OutboxEmail.objects.filter(status='pending').exists())
+
+    def test_failures_back_off_then_give_up(self):
+        email = outbox.enqueue("Hello", "Hi", ['bounce@example.com'], sensitive=True)
+        outbox.enqueue("Hello", "Hi", ['ok@example.com'])
+        self.assertEqual(outbox.send_pending(), (1, 0))
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(email.body, "Hi")  # still needed for the retry
+
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        call_command('send_outbox', stdout=StringIO())
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.body), ('failed', 2, ''))
+        self.assertIn('mailbox unavailable', email.last_error)
+
+    @override_settings(EMAIL_BACKEND='notifications.tests.DownBackend')
+    def test_unreachable_server_spends_an_attempt_per_email(self):
+        emails = [outbox.enqueue("Hello", "Hi", [f'user{n}@example.com']) for n in range(3)]
+        self.assertEqual(outbox.send_pending(batch_size=2), (0, 0))
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('pending', 1))
+            self.assertIn('connection refused', email.last_error)
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.send_pending(), (0, 3))
+        self.assertFalse(OutboxEmail.objects.exclude(status='failed').exists())
+
+    def test_sensitive_body_is_kept_off_the_admin(self):
+        model_admin = admin.site._registry[OutboxEmail]
+        sensitive = outbox.enqueue("Code", "123456", ['a@example.com'], sensitive=True)
+        self.assertNotIn('body', model_admin.get_fields(None, sensitive))
+        self.assertIn('body', model_admin.get_fields(None, outbox.enqueue("Hi", "Hi", ['b@example.com'])))
+
+
+@override_settings(EMAIL_HOST_USER='host@example.com')
+class ContactMessageOutboxTests(APITestCase):
+    def test_contact_message_is_queued_not_sent(self):
+        response = self.client.post('/api/contact/', {'name': 'Asha', 'email': 'asha@example.com', 'message': 'Hi'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.get().to, ['host@example.com'])
+
+
+@override_settings(EMAIL_BACKEND='notifications.tests.FlakyBackend',
+                   EVENT_NOTIFICATIONS={'CHUNK_SIZE': 2, 'MAX_ATTEMPTS': 3, 'BACKOFF': 60})
+class EventNotificationTests(APITestCase):
+    def setUp(self):
+        FlakyBackend.opened = 0
+        self.staff = User.objects.create_user(username='staff', password='Test@1234', is_staff=True)
+        venue = Venue.objects.create(name='Ramada', location='Lucknow', capacity=300, created_by=self.staff)
+        self.event = Event.objects.create(
+            title='Concert', description='Live', date=date.today() + timedelta(days=30), time=time(19, 0),
+            venue=venue, created_by=self.staff, capacity=100, price=500,
+        )
+        self.holders = []
+        for n in range(5):
+            user = User.objects.create_user(username=f'guest{n}', email=f'guest{n}@example.com', password='Test@1234')
+            Booking.objects.create(user=user, event=self.event, num_tickets=1)
+            self.holders.append(user)
+        # A second booking does not mean a second email; a cancelled one means none
+        Booking.objects.create(user=self.holders[0], event=self.event, num_tickets=2)
+        cancelled = User.objects.create_user(username='gone', email='gone@example.com', password='Test@1234')
+        Booking.objects.create(user=cancelled, event=self.event, num_tickets=1, status='cancelled')
+
+    def notify(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(f'/api/events/{self.event.pk}/notify/',
+                                    {'subject': 'New date', 'message': 'The concert moves by a week.'})
+        self.assertEqual(response.status_code, 202)
+        return EventNotification.objects.get(pk=response.data['id'])
+
+    @override_settings(EMAIL_BACKEND='notifications.tests.DownBackend')
+    def test_unreachable_server_counts_attempts_until_the_job_fails(self):
+        job = self.notify()
+        for attempt in range(1, 4):
+            self.assertEqual(broadcast.send_pending(), 0)
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+            self.assertIn('connection refused', job.last_error)
+            EventNotification.objects.filter(pk=job.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual((job.status, job.sent), ('failed', 0))
+
+    def test_only_staff_may_notify(self):
+        self.client.force_authenticate(self.holders[0])
+        response = self.client.post(f'/api/events/{self.event.pk}/notify/', {'subject': 'x', 'message': 'y'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_chunks_share_one_connection(self):
+        job = self.notify()
+        self.assertEqual((job.status, job.total), ('pending', 5))
+        self.assertEqual(len(mail.outbox), 0)
+
+        call_command('send_event_notifications', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sent), ('done', 5))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f'guest{n}@example.com' for n in range(5)])
+        self.assertEqual(FlakyBackend.opened, 1)
+        self.assertIn('moves by a week', mail.outbox[0].body)
+
+        response = self.client.get(f'/api/events/{self.event.pk}/notify/')
+        self.assertEqual(response.data[0]['sent'], 5)
+
+    def test_failed_send_resumes_after_the_last_delivered_message(self):
+        job = self.notify()
+        User.objects.filter(pk=self.holders[3].pk).update(email='bounce@example.com')
+        self.assertEqual(broadcast.send_pending(), 3)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sent, job.last_user_id, job.attempts), ('running', 3, self.holders[2].pk, 1))
+        self.assertGreater(job.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        User.objects.filter(pk=self.holders[3].pk).update(email='guest3@example.com')
+        EventNotification.objects.filter(pk=job.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(broadcast.send_pending(), 2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sent, job.attempts), ('done', 5, 0))
+        self.assertEqual(len(mail.outbox), 5)  # nobody emailed twice
+
+    def test_refused_recipient_is_recorded_and_skipped(self):
+        job = self.notify()
+        User.objects.filter(pk=self.holders[1].pk).update(email='refused@example.com')
+        self.assertEqual(broadcast.send_pending(), 4)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sent, job.bad_recipients), ('done', 4, ['refused@example.com']))
@@ -0,0 +1,65 @@
+"""JWT authentication that resolves the user from a short-lived cache.
+
+``JWTAuthentication.get_user`` selects the user row on every request, which is
+often the only query a cached endpoint makes. Here the row is cached per user
+ID in the shared cache. Tokens carry a digest of the password they were minted
+for (simplejwt's ``REVOKE_TOKEN_CLAIM``, with ``CHECK_REVOKE_TOKEN`` on); a
+cached user is only reused when that digest still matches its password, so
+tokens issued before a password change are rejected. ``user.signals`` drops
+the entry whenever the user is saved or deleted (deactivation, password
+change, role change), for every worker at once.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+DEFAULTS = {
+    'ALIAS': 'shared',
+    'TIMEOUT': 60,
+}
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'AUTH_USER_CACHE', {})}
+
+
+def _store():
+    return caches[config()['ALIAS']]
+
+
+def _key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate(user_id):
+    """Forget the cached user now and again once the current transaction
+    commits, so a request racing the write cannot re-cache the old row."""
+    key = _key(user_id)
+    _store().delete(key)
+    transaction.on_commit(lambda: _store().delete(key), robust=True)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        store = _store()
+        user = store.get(_key(user_id))
+        if user is not None and self._current(validated_token, user):
+            return user
+
+        # Runs simplejwt's active/revocation checks before anything is cached
+        user = super().get_user(validated_token)
+        store.set(_key(user_id), user, config()['TIMEOUT'])
+        return user
+
+    @staticmethod
+    def _current(validated_token, user):
+        if not api_settings.CHECK_REVOKE_TOKEN:
+            return True
+        return validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) == get_md5_hash_password(user.password)
@@ -0,0 +1,67 @@
+"""Authentication by username, email or vendor ID in one indexed query."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Case, Q, Value, When
+
+UserModel = get_user_model()
+
+
+def lookup_filter(identifier, lookup=None):
+    """``Q`` matching ``identifier`` against indexed columns.
+
+    ``lookup`` is ``'username'``, ``'email'`` or ``'vendor_id'``. Without it,
+    anything containing ``@`` is matched as an email *or* a username (usernames
+    may contain ``@`` too), everything else as a username.
+    """
+    identifier = identifier.strip()
+    if lookup is None:
+        if '@' in identifier:
+            return lookup_filter(identifier, 'email') | lookup_filter(identifier, 'username')
+        lookup = 'username'
+    if lookup == 'email':
+        return Q(email_normalized=identifier.lower())
+    if lookup == 'vendor_id':
+        return Q(vendor_id=identifier.upper())
+    if lookup == 'username':
+        return Q(**{UserModel.USERNAME_FIELD: identifier})
+    raise ValueError(f"Unknown login lookup {lookup!r}")
+
+
+def lookup_user(identifier, lookup=None):
+    """The user ``identifier`` refers to, or ``None``; one query.
+
+    When an identifier matches one account's username and another's email,
+    the username wins.
+    """
+    username_first = Case(
+        When(Q(**{UserModel.USERNAME_FIELD: identifier.strip()}), then=Value(0)),
+        default=Value(1),
+    )
+    return (
+        UserModel._default_manager.filter(lookup_filter(identifier, lookup))
+        .order_by(username_first, 'pk')
+        .first()
+    )
+
+
+class MultiIdentifierBackend(ModelBackend):
+    """``authenticate(request, username=..., password=..., lookup=None)``.
+
+    ``username`` may hold a username, an email or (with ``lookup='vendor_id'``)
+    a vendor ID; the user is fetched with a single query either way.
+    """
+
+    def authenticate(self, request, username=None, password=None, lookup=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if not username or password is None:
+            return None
+        user = lookup_user(username, lookup)
+        if user is None:
+            # Run the hasher anyway so unknown identifiers take as long as
+            # wrong passwords (see ModelBackend.authenticate)
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,160 @@
+"""In-process Bloom filter in front of simplejwt's token blacklist.
+
+Every refresh and logout checks the presented refresh token against
+``BlacklistedToken``, and nearly all of them are *not* blacklisted. The filter
+answers that case from memory: a miss means the token is certainly not
+blacklisted, a hit is confirmed against the database.
+
+The filter is loaded once per process and then extended incrementally with
+the rows whose id is above the last one seen. To keep a miss trustworthy
+without touching the blacklist table, every new ``BlacklistedToken`` bumps a
+version key in the shared cache once its transaction commits; a check reads
+that key first and reloads the new rows whenever it moved, so a token
+revoked by any process is refused by every other one straight away. The
+filter is also extended every ``REFRESH_INTERVAL`` seconds as a backstop, and
+rebuilt from scratch every ``REBUILD_INTERVAL`` seconds (dropping pruned
+tokens) or once it holds more than ``CAPACITY`` entries. Each refresh re-reads
+the last ``OVERLAP`` ids as well, so rows whose transaction committed after a
+higher id was already seen are not skipped.
+"""
+import hashlib
+import math
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+DEFAULTS = {
+    'ALIAS': 'shared',
+    'CAPACITY': 200_000,
+    'ERROR_RATE': 0.001,
+    # Backstop reload; blacklisting normally reaches every process through the
+    # shared version key
+    'REFRESH_INTERVAL': 60.0,
+    'REBUILD_INTERVAL': 3600,
+}
+OVERLAP = 1000
+VERSION_KEY = 'token-blacklist:version'
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_BLACKLIST_FILTER', {})}
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class _State:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filter = None
+        self.last_id = 0
+        self.refreshed_at = 0.0
+        self.built_at = 0.0
+        self.version = None
+
+
+_state = _State()
+
+
+def _store():
+    return caches[config()['ALIAS']]
+
+
+def _version():
+    store = _store()
+    version = store.get(VERSION_KEY)
+    if version is None:
+        # Lost or never set: a random start differs from whatever any
+        # process last saw, so each of them reloads once
+        store.add(VERSION_KEY, secrets.randbits(62), None)
+        version = store.get(VERSION_KEY)
+    return version
+
+
+def _changed():
+    store = _store()
+    try:
+        store.incr(VERSION_KEY)
+    except ValueError:
+        store.set(VERSION_KEY, secrets.randbits(62), None)
+
+
+def changed():
+    """Tell every process the blacklist grew; deferred until the row commits."""
+    transaction.on_commit(_changed, robust=True)
+
+
+def _load(since_id):
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    return BlacklistedToken.objects.filter(id__gt=since_id).order_by('id').values_list('id', 'token__jti')
+
+
+def _refresh(opts, version):
+    now = time.monotonic()
+    if (
+        _state.filter is not None
+        and version == _state.version
+        and now - _state.refreshed_at < opts['REFRESH_INTERVAL']
+    ):
+        return
+    rebuild = (
+        _state.filter is None
+        or now - _state.built_at >= opts['REBUILD_INTERVAL']
+        or _state.filter.count > opts['CAPACITY']
+    )
+    if rebuild:
+        _state.filter = BloomFilter(opts['CAPACITY'], opts['ERROR_RATE'])
+        _state.last_id = 0
+        _state.built_at = now
+    for row_id, jti in _load(max(0, _state.last_id - OVERLAP)).iterator(chunk_size=5000):
+        if jti not in _state.filter:
+            _state.filter.add(jti)
+        _state.last_id = max(_state.last_id, row_id)
+    _state.refreshed_at = now
+    _state.version = version
+
+
+def might_be_blacklisted(jti):
+    """``False`` means the token is certainly not blacklisted."""
+    # Read before loading, so rows committed meanwhile are caught next time
+    version = _version()
+    with _state.lock:
+        _refresh(config(), version)
+        return jti in _state.filter
+
+
+def add(jti):
+    """Record a token this process just blacklisted."""
+    with _state.lock:
+        if _state.filter is not None:
+            _state.filter.add(jti)
+
+
+def reset():
+    """Drop the filter; the next check reloads it (used by tests)."""
+    with _state.lock:
+        _state.filter = None
@@ -0,0 +1,167 @@
+"""Bulk import of users and vendors from partner spreadsheets.
+
+Rows are streamed from a CSV or JSONL file and handled in chunks. For each
+chunk the rows are validated (username uniqueness in one query), passwords are
+hashed in a process pool, vendor IDs are allocated in one block per prefix,
+and the users are written with ``bulk_create``. A bad row is reported with its
+line number and never aborts the rest of the file.
+
+Used by ``manage.py import_users`` and the staff ``POST /api/users/import/``.
+"""
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from . import vendor_ids
+
+DEFAULT_CHUNK_SIZE = 1000
+FORMATS = ('csv', 'jsonl')
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line_number, row)`` from a text stream; ``row`` is a dict or,
+    for an unparsable line, the error message."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Blank cells are missing values, not empty strings
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_number, f"Invalid JSON: {exc}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "Each line must be a JSON object."
+    else:
+        raise ValueError(f"Unknown import format {fmt!r}; expected one of {', '.join(FORMATS)}.")
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker():
+    # Spawned (non-forked) workers need the app registry for the hashers
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+class _Importer:
+    def __init__(self, pool):
+        self.pool = pool
+        self.seen = set()
+        self.created = 0
+        self.errors = []
+
+    def error(self, line, errors):
+        self.errors.append({'row': line, 'errors': errors})
+
+    def validate(self, chunk):
+        from .models import User
+        from .serializers import UserImportSerializer
+
+        valid = []
+        for line, row in chunk:
+            if not isinstance(row, dict):
+                self.error(line, {'non_field_errors': [row]})
+                continue
+            serializer = UserImportSerializer(data=row)
+            if not serializer.is_valid():
+                self.error(line, serializer.errors)
+                continue
+            username = serializer.validated_data['username']
+            if username in self.seen:
+                self.error(line, {'username': ["Duplicate username in this file."]})
+                continue
+            self.seen.add(username)
+            valid.append((line, serializer.validated_data))
+
+        taken = set(User.objects.filter(
+            username__in=[data['username'] for _, data in valid]
+        ).values_list('username', flat=True))
+        for line, data in valid:
+            if data['username'] in taken:
+                self.error(line, {'username': ["A user with that username already exists."]})
+        return [(line, data) for line, data in valid if data['username'] not in taken]
+
+    def hash_passwords(self, passwords):
+        if self.pool is None:
+            return [make_password(password) for password in passwords]
+        return list(self.pool.map(make_password, passwords, chunksize=max(1, len(passwords) // 32)))
+
+    def build(self, valid):
+        from .models import User
+
+        hashed = self.hash_passwords([data['password'] for _, data in valid])
+        users = []
+        for (line, data), password in zip(valid, hashed):
+            fields = {key: value for key, value in data.items() if key != 'password'}
+            user = User(**fields, password=password)
+            # bulk_create skips User.save(), so normalize here
+            user.email_normalized = (user.email or '').strip().lower()
+            users.append((line, user))
+
+        vendors = {}
+        for _, user in users:
+            if user.role == 'vendor':
+                vendors.setdefault(vendor_ids.prefix_for(user.state, user.city), []).append(user)
+        for prefix, group in vendors.items():
+            for user, vendor_id in zip(group, vendor_ids.allocate(prefix, len(group))):
+                user.vendor_id = vendor_id
+        return users
+
+    def insert(self, users):
+        from .models import User
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user for _, user in users])
+            self.created += len(users)
+        except IntegrityError:
+            # Someone registered one of the names meanwhile: find the row(s)
+            for line, user in users:
+                try:
+                    with transaction.atomic():
+                        User.objects.bulk_create([user])
+                    self.created += 1
+                except IntegrityError:
+                    self.error(line, {'non_field_errors': ["A user with that username or vendor ID already exists."]})
+
+    def run(self, rows, chunk_size):
+        for chunk in _chunks(rows, chunk_size):
+            valid = self.validate(chunk)
+            if valid:
+                self.insert(self.build(valid))
+
+
+def import_users(rows, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """Import ``(line_number, row)`` pairs; returns ``{'created', 'errors'}``.
+
+    ``workers`` processes hash the passwords (default: one per CPU; ``1``
+    hashes in this process).
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+    with pool or nullcontext():
+        importer = _Importer(pool)
+        importer.run(rows, chunk_size)
+    return {'created': importer.created, 'errors': importer.errors}
@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user.bulk_import import DEFAULT_CHUNK_SIZE, FORMATS, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk-create users and vendors from a CSV or JSONL file, reporting bad rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (with a header row) or JSONL file.")
+        parser.add_argument('--format', choices=FORMATS,
+                            help="File format; guessed from the extension by default.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help=f"Rows validated and inserted together (default {DEFAULT_CHUNK_SIZE}).")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Password hashing processes (default: one per CPU).")
+        parser.add_argument('--errors', help="Write the rejected rows to this JSONL file instead of stderr.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if fmt not in FORMATS:
+            raise CommandError(f"Cannot tell the format of {options['path']}; pass --format.")
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            result = import_users(read_rows(stream, fmt), options['chunk_size'], options['workers'])
+
+        lines = [json.dumps(error, default=str) for error in result['errors']]
+        if options['errors']:
+            with open(options['errors'], 'w', encoding='utf-8') as out:
+                out.writelines(line + '\n' for line in lines)
+        else:
+            for line in lines:
+                self.stderr.write(line)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} user(s); {len(result['errors'])} row(s) rejected."
+        ))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens in bounded chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help="Tokens deleted per transaction (default 1000).")
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Seconds to sleep between chunks to leave room for live traffic.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        last_id = 0
+        pruned = 0
+        while True:
+            # Walk the primary key so each chunk is an index range scan; expired
+            # tokens are the oldest, so the walk finds them early
+            ids = list(
+                OutstandingToken.objects.filter(pk__gt=last_id, expires_at__lte=now)
+                .order_by('pk').values_list('pk', flat=True)[:options['chunk_size']]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                OutstandingToken.objects.filter(pk__in=ids).delete()
+            pruned += len(ids)
+            last_id = ids[-1]
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {pruned} expired token(s)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from user import otp
+
+
+class Command(BaseCommand):
+    help = "Delete expired one-time login codes and finished lockouts."
+
+    def handle(self, *args, **options):
+        purged = otp.get_store().purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired OTP(s)."))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_user_city_user_shop_name_user_state_user_vendor_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OneTimePassword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identifier', models.CharField(max_length=255, unique=True)),
+                ('code_hash', models.CharField(blank=True, max_length=128)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='one_time_passwords', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:55
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim, Upper
+
+
+def normalize_identifiers(apps, schema_editor):
+    User = apps.get_model('user', 'User')
+    User.objects.exclude(email__isnull=True).update(email_normalized=Lower(Trim('email')))
+    User.objects.exclude(vendor_id__isnull=True).update(vendor_id=Upper(Trim('vendor_id')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_onetimepassword'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.RunPython(normalize_identifiers, migrations.RunPython.noop),
+    ]
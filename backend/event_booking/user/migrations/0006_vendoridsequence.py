@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:08
+
+import re
+
+from django.db import migrations, models
+
+VENDOR_ID = re.compile(r'^(.+?)(\d{4})$')
+
+
+def seed_sequences(apps, schema_editor):
+    """Start every prefix's sequence above the highest ID already issued."""
+    User = apps.get_model('user', 'User')
+    VendorIdSequence = apps.get_model('user', 'VendorIdSequence')
+    highest = {}
+    for vendor_id in User.objects.exclude(vendor_id__isnull=True).values_list('vendor_id', flat=True).iterator():
+        match = VENDOR_ID.match(vendor_id)
+        if match:
+            prefix, number = match.group(1), int(match.group(2))
+            highest[prefix] = max(highest.get(prefix, 0), number)
+    VendorIdSequence.objects.bulk_create(
+        [VendorIdSequence(prefix=prefix, last_value=number) for prefix, number in highest.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_user_email_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10, unique=True)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,3 @@
-import random
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -20,21 +19,50 @@ class User(AbstractUser):
     city = models.CharField(max_length=100, blank=True, null=True)
     state = models.CharField(max_length=100, blank=True, null=True)
     vendor_id = models.CharField(max_length=20, unique=True, blank=True, null=True)
+    # Lowercased copy of email so logins use a plain index (user.backends)
+    email_normalized = models.CharField(max_length=254, blank=True, default='', db_index=True, editable=False)
 
     def generate_vendor_id(self):
         if self.role != 'vendor':
             return None
 
-        state_code = (self.state[:2] if self.state else "XX").upper()
-        city_code = (self.city[:3] if self.city else "XXX").upper()
-        random_number = str(random.randint(1000, 9999))
+        from . import vendor_ids
 
-        return f"{state_code}{city_code}{random_number}"
+        return vendor_ids.allocate(vendor_ids.prefix_for(self.state, self.city))[0]
 
     def save(self, *args, **kwargs):
         if self.role == 'vendor' and not self.vendor_id:
             self.vendor_id = self.generate_vendor_id()
+        # Login lookups compare against these normalized values
+        if self.vendor_id:
+            self.vendor_id = self.vendor_id.strip().upper()
+        self.email_normalized = (self.email or '').strip().lower()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'email_normalized'}
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.username
+
+
+class OneTimePassword(models.Model):
+    """Pending login code of one identifier (see user.otp.DatabaseOTPStore)."""
+    identifier = models.CharField(max_length=255, unique=True)  # e.g. "email:jane@example.com"
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='one_time_passwords')
+    code_hash = models.CharField(max_length=128, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    locked_until = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return self.identifier
+
+
+class VendorIdSequence(models.Model):
+    """Last vendor ID number handed out under one state/city prefix (see user.vendor_ids)."""
+    prefix = models.CharField(max_length=10, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.prefix}: {self.last_value}"
@@ -0,0 +1,219 @@
+"""One-time login codes shared by every worker process.
+
+The store is pluggable through ``settings.OTP['STORE']``:
+
+* ``DatabaseOTPStore`` (default) keeps codes in the ``OneTimePassword`` table,
+  so any process can verify a code another one issued.
+* ``CacheOTPStore`` keeps them in a cache alias that every worker shares
+  (e.g. ``shared``, or a ``FileBasedCache`` on a single host).
+
+Codes are stored as salted HMACs, expire after ``TTL`` seconds, and each
+identifier gets ``MAX_ATTEMPTS`` wrong guesses before it is locked out for
+``LOCKOUT`` seconds. ``manage.py purge_otps`` sweeps expired entries.
+"""
+import math
+import secrets
+from abc import ABC, abstractmethod
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    'STORE': 'user.otp.DatabaseOTPStore',
+    'CACHE_ALIAS': 'shared',
+    'TTL': 300,
+    'MAX_ATTEMPTS': 5,
+    'LOCKOUT': 900,
+}
+
+
+class OTPLocked(APIException):
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_detail = "Too many wrong codes, please try again later."
+    default_code = 'otp_locked'
+
+    def __init__(self, wait):
+        super().__init__()
+        # DRF turns `wait` into a Retry-After header
+        self.wait = wait
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'OTP', {})}
+
+
+def get_store():
+    opts = config()
+    return import_string(opts['STORE'])(opts)
+
+
+def identifier_for(kind, value):
+    """Normalized store key, e.g. ``email:jane@example.com``."""
+    value = value.strip()
+    return f"{kind}:{value.lower() if kind == 'email' else value}"
+
+
+def _hash(identifier, code):
+    return salted_hmac('user.otp', f'{identifier}:{code}').hexdigest()
+
+
+def _seconds_until(moment):
+    return max(1, math.ceil((moment - timezone.now()).total_seconds()))
+
+
+class OTPStore(ABC):
+    """Interface of an OTP store."""
+
+    def __init__(self, opts):
+        self.ttl = timedelta(seconds=opts['TTL'])
+        self.max_attempts = opts['MAX_ATTEMPTS']
+        self.lockout = timedelta(seconds=opts['LOCKOUT'])
+
+    @abstractmethod
+    def issue(self, identifier, user_id):
+        """Create (or replace) the code for ``identifier`` and return it.
+
+        Raises ``OTPLocked`` while the identifier is locked out.
+        """
+
+    @abstractmethod
+    def verify(self, identifier, code):
+        """Return the user id the code was issued for, or ``None`` if it is wrong
+        or expired. A correct code can only be used once.
+
+        Raises ``OTPLocked`` while (or once) the identifier is locked out.
+        """
+
+    def purge_expired(self):
+        """Delete expired entries; returns how many were removed."""
+        return 0
+
+    @staticmethod
+    def new_code():
+        return f"{secrets.randbelow(1000000):06d}"
+
+
+class DatabaseOTPStore(OTPStore):
+    def issue(self, identifier, user_id):
+        from .models import OneTimePassword
+
+        code = self.new_code()
+        now = timezone.now()
+        with transaction.atomic():
+            entry = OneTimePassword.objects.select_for_update().filter(identifier=identifier).first()
+            if entry and entry.locked_until and entry.locked_until > now:
+                locked_until = entry.locked_until
+            else:
+                if entry is None or entry.expires_at <= now:
+                    # A fresh start once the previous code (or lockout) is over
+                    entry = entry or OneTimePassword(identifier=identifier)
+                    entry.attempts = 0
+                entry.user_id = user_id
+                entry.code_hash = _hash(identifier, code)
+                entry.expires_at = now + self.ttl
+                entry.locked_until = None
+                entry.save()
+                return code
+        raise OTPLocked(wait=_seconds_until(locked_until))
+
+    def verify(self, identifier, code):
+        from .models import OneTimePassword
+
+        now = timezone.now()
+        with transaction.atomic():
+            entry = OneTimePassword.objects.select_for_update().filter(identifier=identifier).first()
+            if entry is None:
+                return None
+            if entry.locked_until and entry.locked_until > now:
+                locked_until = entry.locked_until
+            elif entry.code_hash and entry.expires_at > now and constant_time_compare(
+                entry.code_hash, _hash(identifier, code)
+            ):
+                entry.delete()
+                return entry.user_id
+            else:
+                entry.attempts += 1
+                locked_until = None
+                if entry.attempts >= self.max_attempts:
+                    # Burn the code and keep the row around for the lockout
+                    locked_until = now + self.lockout
+                    entry.code_hash = ''
+                    entry.locked_until = locked_until
+                    entry.expires_at = max(entry.expires_at, locked_until)
+                entry.save(update_fields=['attempts', 'code_hash', 'locked_until', 'expires_at'])
+        # Raised outside the transaction so the failed attempt is still counted
+        if locked_until:
+            raise OTPLocked(wait=_seconds_until(locked_until))
+        return None
+
+    def purge_expired(self):
+        from .models import OneTimePassword
+
+        deleted, _ = OneTimePassword.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+
+class CacheOTPStore(OTPStore):
+    """OTPs in a shared cache alias; entries expire on their own.
+
+    The code, the wrong-guess counter and the lockout live under separate
+    keys. Guesses are counted with ``incr``, and a code is spent by whichever
+    request manages to ``delete`` it, so concurrent workers cannot lose a
+    wrong guess or redeem the same code twice.
+    """
+
+    def __init__(self, opts):
+        super().__init__(opts)
+        self.cache = caches[opts['CACHE_ALIAS']]
+
+    @staticmethod
+    def _keys(identifier):
+        return f'otp:{identifier}', f'otp-attempts:{identifier}', f'otp-lock:{identifier}'
+
+    def _check_lock(self, lock_key):
+        locked_until = self.cache.get(lock_key)
+        if locked_until and locked_until > timezone.now():
+            raise OTPLocked(wait=_seconds_until(locked_until))
+
+    def issue(self, identifier, user_id):
+        key, _, lock_key = self._keys(identifier)
+        self._check_lock(lock_key)
+        code = self.new_code()
+        # Wrong guesses are not reset by asking for a new code
+        self.cache.set(key, {'user_id': user_id, 'code_hash': _hash(identifier, code)}, int(self.ttl.total_seconds()))
+        return code
+
+    def verify(self, identifier, code):
+        key, attempts_key, lock_key = self._keys(identifier)
+        self._check_lock(lock_key)
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        if constant_time_compare(entry['code_hash'], _hash(identifier, code)):
+            if not self.cache.delete(key):
+                # Another request redeemed it first
+                return None
+            self.cache.delete(attempts_key)
+            return entry['user_id']
+
+        self.cache.add(attempts_key, 0, int(self.ttl.total_seconds()))
+        try:
+            attempts = self.cache.incr(attempts_key)
+        except ValueError:
+            # Evicted in between: this guess is the first one again
+            attempts = 1
+            self.cache.set(attempts_key, attempts, int(self.ttl.total_seconds()))
+        if attempts < self.max_attempts:
+            return None
+        # Burn the code and lock the identifier out
+        locked_until = timezone.now() + self.lockout
+        self.cache.set(lock_key, locked_until, int(self.lockout.total_seconds()))
+        self.cache.delete_many([key, attempts_key])
+        raise OTPLocked(wait=_seconds_until(locked_until))
@@ -0,0 +1,123 @@
+"""Sliding-window rate limits for the authentication endpoints.
+
+Login, OTP and registration requests each cost a PBKDF2 hash, so they are
+counted per client IP, per submitted identifier (username/email) and per
+vendor ID *before* any credential is checked. Counters live in the ``shared``
+cache so every worker enforces the same limits.
+
+Each key keeps two fixed-window counters and the limit is checked against the
+sliding estimate ``previous * (1 - elapsed / window) + current``, which smooths
+out the burst a plain fixed window allows at its boundary.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'ALIAS': 'shared',
+    # kind: (requests, window in seconds)
+    'RATES': {
+        'ip': (30, 60),
+        'identifier': (10, 300),
+        'vendor_id': (10, 300),
+    },
+}
+
+
+def config():
+    opts = {**DEFAULTS, **getattr(settings, 'AUTH_RATE_LIMIT', {})}
+    opts['RATES'] = {**DEFAULTS['RATES'], **opts['RATES']}
+    return opts
+
+
+def _store():
+    return caches[config()['ALIAS']]
+
+
+def _key(scope, kind, value):
+    digest = hashlib.sha256(str(value).strip().lower().encode()).hexdigest()
+    return f'ratelimit:{scope}:{kind}:{digest}'
+
+
+def _windows(key, window, now):
+    index = int(now // window)
+    return f'{key}:{index}', f'{key}:{index - 1}', now - index * window
+
+
+def retry_after(keys, now=None):
+    """Seconds until every ``(key, limit, window)`` is under its limit again,
+    or 0 if a request may go through now."""
+    now = time.time() if now is None else now
+    store = _store()
+    windows = [(_windows(key, window, now), limit, window) for key, limit, window in keys]
+    counts = store.get_many([name for (current, previous, _), _, _ in windows for name in (current, previous)])
+
+    wait = 0
+    for (current, previous, elapsed), limit, window in windows:
+        hits, earlier = counts.get(current, 0), counts.get(previous, 0)
+        if earlier * (1 - elapsed / window) + hits < limit:
+            continue
+        if hits >= limit:
+            # Wait for the next window, then for this one to slide out of it
+            needed = (window - elapsed) + window * (1 - limit / hits)
+        else:
+            # Time until enough of the previous window has slid out
+            needed = window * (1 - (limit - hits) / earlier) - elapsed
+        wait = max(wait, math.ceil(max(needed, 1)))
+    return wait
+
+
+def hit(keys, now=None):
+    """Count one request against every ``(key, limit, window)``."""
+    now = time.time() if now is None else now
+    store = _store()
+    for key, _, window in keys:
+        current, _, _ = _windows(key, window, now)
+        # The counter must outlive the next window, which still reads it
+        if not store.add(current, 1, window * 2):
+            try:
+                store.incr(current)
+            except ValueError:
+                store.set(current, 1, window * 2)
+
+
+class AuthRateThrottle(BaseThrottle):
+    """Rate limit of an authentication view, named by its ``throttle_scope``.
+
+    Runs in ``APIView.initial()``, i.e. before the view checks any password.
+    """
+    identifier_fields = ('username', 'email', 'identifier')
+
+    def __init__(self):
+        self.wait_seconds = 0
+
+    def get_keys(self, request, view):
+        scope = getattr(view, 'throttle_scope', view.__class__.__name__)
+        rates = config()['RATES']
+        # REMOTE_ADDR, or the hop REST_FRAMEWORK['NUM_PROXIES'] trusts; never
+        # a client-supplied X-Forwarded-For
+        keys = [(_key(scope, 'ip', self.get_ident(request)), *rates['ip'])]
+
+        data = request.data if hasattr(request.data, 'get') else {}
+        vendor = data.get('role') == 'vendor'
+        for field in self.identifier_fields:
+            value = data.get(field)
+            if value and isinstance(value, str):
+                kind = 'vendor_id' if vendor and field == 'identifier' else 'identifier'
+                keys.append((_key(scope, kind, value), *rates[kind]))
+        return keys
+
+    def allow_request(self, request, view):
+        keys = self.get_keys(request, view)
+        self.wait_seconds = retry_after(keys)
+        if self.wait_seconds:
+            return False
+        hit(keys)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
@@ -1,3 +1,4 @@
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
 from .models import User
 
@@ -29,6 +30,17 @@ class RegisterSerializer(serializers.ModelSerializer):
 
         return user
 
+class UserImportSerializer(serializers.ModelSerializer):
+    """One row of a bulk import (user.bulk_import)."""
+    password = serializers.CharField(write_only=True, min_length=6)
+    role = serializers.ChoiceField(choices=['user', 'vendor'], default='user')
+
+    class Meta:
+        model = User
+        fields = ['username', 'email', 'password', 'phone', 'role', 'shop_name', 'city', 'state']
+        # Username uniqueness is checked for a whole chunk in one query
+        extra_kwargs = {'username': {'validators': [UnicodeUsernameValidator()]}}
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -37,4 +49,4 @@ class UserSerializer(serializers.ModelSerializer):
 class VendorSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = [ 'id','role','username', 'email', 'phone', "vendor_id", 'sh op_name', 'city', 'state']
+        fields = [ 'id','role','username', 'email', 'phone', "vendor_id", 'shop_name', 'city', 'state']
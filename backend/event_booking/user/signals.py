@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from . import authentication, blacklist
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    authentication.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def announce_blacklisted_token(sender, created, **kwargs):
+    if created:
+        blacklist.changed()
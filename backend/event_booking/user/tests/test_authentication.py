@@ -0,0 +1,61 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from ..models import User
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        self.user = User.objects.create_user(username='jane', email='jane@example.com', password='Test@1234')
+
+    def login(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/bookings/')
+        return response, [q for q in queries.captured_queries if 'FROM "user_user"' in q['sql']]
+
+    def test_user_is_loaded_once(self):
+        self.login()
+        response, first = self.user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(first), 1)
+        response, second = self.user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(second)
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.login()
+        self.assertEqual(self.client.get('/api/bookings/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/bookings/').status_code, 401)
+
+    def test_password_change_revokes_old_tokens(self):
+        self.login()
+        self.assertEqual(self.user_queries()[0].status_code, 200)
+        self.user.set_password('Changed@1234')
+        self.user.save()
+        self.assertEqual(self.client.get('/api/bookings/').status_code, 401)
+
+        self.login()
+        self.assertEqual(self.user_queries()[0].status_code, 200)
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(queries)  # the reloaded user is cached again
+
+    def test_stale_cached_user_is_not_trusted(self):
+        self.login()
+        self.user_queries()
+        # Another worker changed the password but its invalidation was lost:
+        # the token's password digest no longer matches the cached user
+        User.objects.filter(pk=self.user.pk).update(password='pbkdf2_sha256$1$x$y')
+        cached = caches['shared'].get(f'auth-user:{self.user.pk}')
+        cached.password = 'pbkdf2_sha256$1$x$y'
+        caches['shared'].set(f'auth-user:{self.user.pk}', cached)
+        self.assertEqual(self.client.get('/api/bookings/').status_code, 401)
@@ -0,0 +1,58 @@
+from django.contrib.auth import authenticate
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from ..models import User
+
+
+class MultiIdentifierBackendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='jane', email='Jane@Example.com', password='Test@1234')
+        self.vendor = User.objects.create_user(username='acme', password='Test@1234', role='vendor', vendor_id='uplko1234')
+
+    def assertSingleLookup(self, expected, **credentials):
+        with CaptureQueriesContext(connection) as queries:
+            user = authenticate(None, **credentials)
+        self.assertEqual(user, expected)
+        self.assertEqual(len([q for q in queries.captured_queries if 'FROM "user_user"' in q['sql']]), 1)
+
+    def test_each_identifier_takes_one_query(self):
+        self.assertSingleLookup(self.user, username='jane', password='Test@1234')
+        self.assertSingleLookup(self.user, username=' JANE@example.com', password='Test@1234')
+        self.assertSingleLookup(self.vendor, username='UPLKO1234', password='Test@1234', lookup='vendor_id')
+        self.assertSingleLookup(None, username='nobody@example.com', password='Test@1234')
+
+    def test_username_with_at_sign(self):
+        other = User.objects.create_user(username='jane@example.com', password='Other@1234')
+        self.assertSingleLookup(other, username='jane@example.com', password='Other@1234')
+        # The same identifier is still a login by email for the account it belongs to
+        self.assertSingleLookup(self.user, username='JANE@example.com', password='Test@1234')
+
+    def test_wrong_password_or_lookup(self):
+        self.assertIsNone(authenticate(None, username='jane', password='nope'))
+        # A vendor ID is not accepted as a username
+        self.assertIsNone(authenticate(None, username='UPLKO1234', password='Test@1234'))
+
+    def test_normalized_columns_follow_updates(self):
+        self.user.email = 'JANE.DOE@example.com'
+        self.user.save(update_fields=['email'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email_normalized, 'jane.doe@example.com')
+        self.assertEqual(self.vendor.vendor_id, 'UPLKO1234')
+
+
+class LoginPathTests(APITestCase):
+    def setUp(self):
+        User.objects.create_user(username='jane', email='jane@example.com', password='Test@1234')
+        User.objects.create_user(username='acme', password='Test@1234', role='vendor', vendor_id='UPLKO1234')
+
+    def test_token_login_by_email(self):
+        response = self.client.post('/api/auth/login/', {'username': 'Jane@Example.com', 'password': 'Test@1234'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_vendor_login(self):
+        payload = {'identifier': 'uplko1234', 'password': 'Test@1234', 'role': 'vendor'}
+        response = self.client.post('/api/auth/otp/request/', payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['vendor_id'], 'UPLKO1234')
@@ -0,0 +1,79 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from .. import bulk_import, vendor_ids
+from ..models import User
+
+CSV = """username,email,password,role,city,state
+asha,Asha@Example.com,Secret@123,user,,
+ravi,ravi@example.com,Secret@123,vendor,Lucknow,Uttar Pradesh
+meena,meena@example.com,Secret@123,vendor,Lucknow,Uttar Pradesh
+short,short@example.com,abc,user,,
+asha,asha2@example.com,Secret@123,user,,
+taken,taken@example.com,Secret@123,user,,
+"""
+
+
+class ImportUsersCommandTests(TestCase):
+    def setUp(self):
+        vendor_ids.reset()
+        User.objects.create_user(username='taken', password='Test@1234')
+
+    def test_imports_good_rows_and_reports_bad_ones(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source, \
+                tempfile.NamedTemporaryFile('r', suffix='.jsonl') as errors:
+            source.write(CSV)
+            source.flush()
+            out = StringIO()
+            call_command('import_users', source.name, workers=2, chunk_size=4, errors=errors.name, stdout=out)
+            rejected = [json.loads(line) for line in errors]
+
+        self.assertIn('Created 3 user(s); 3 row(s) rejected.', out.getvalue())
+        self.assertEqual([error['row'] for error in rejected], [5, 6, 7])
+        self.assertIn('password', rejected[0]['errors'])
+
+        asha = User.objects.get(username='asha')
+        self.assertTrue(asha.check_password('Secret@123'))
+        self.assertEqual(asha.email_normalized, 'asha@example.com')
+        self.assertEqual(
+            sorted(User.objects.filter(role='vendor').values_list('vendor_id', flat=True)),
+            ['UTLUC0001', 'UTLUC0002'],
+        )
+
+
+class ImportUsersApiTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='Test@1234', is_staff=True)
+        self.rows = '\n'.join([
+            json.dumps({'username': 'kiran', 'password': 'Secret@123'}),
+            'not json',
+        ]).encode()
+
+    def upload(self, name='partners.jsonl'):
+        return self.client.post('/api/users/import/', {'file': SimpleUploadedFile(name, self.rows)},
+                                format='multipart')
+
+    def test_staff_upload(self):
+        self.client.force_authenticate(self.staff)
+        with mock.patch.object(bulk_import, 'ProcessPoolExecutor') as pool:
+            response = self.upload()
+        pool.assert_not_called()  # hashed in the request's own process
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        self.assertTrue(User.objects.filter(username='kiran').exists())
+
+    @override_settings(USER_IMPORT_MAX_API_ROWS=1)
+    def test_large_files_are_refused(self):
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.upload().status_code, 413)
+        self.assertFalse(User.objects.filter(username='kiran').exists())
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user(username='guest', password='Test@1234'))
+        self.assertEqual(self.upload().status_code, 403)
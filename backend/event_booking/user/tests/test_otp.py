@@ -0,0 +1,111 @@
+import re
+from datetime import timedelta
+from io import StringIO
+from django.core import mail
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from .. import otp
+from ..models import OneTimePassword, User
+
+
+class DatabaseOTPStoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='jane', email='jane@example.com', password='Test@1234')
+        self.store = otp.get_store()
+        self.key = otp.identifier_for('email', 'Jane@Example.com')
+
+    def test_code_is_single_use(self):
+        code = self.store.issue(self.key, self.user.pk)
+        # A second store instance stands in for another worker process
+        self.assertEqual(otp.get_store().verify(self.key, code), self.user.pk)
+        self.assertIsNone(self.store.verify(self.key, code))
+
+    def test_expired_code_is_rejected_and_purged(self):
+        code = self.store.issue(self.key, self.user.pk)
+        OneTimePassword.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(self.store.verify(self.key, code))
+        call_command('purge_otps', stdout=open('/dev/null', 'w'))
+        self.assertFalse(OneTimePassword.objects.exists())
+
+    @override_settings(OTP={'MAX_ATTEMPTS': 3, 'LOCKOUT': 600})
+    def test_wrong_codes_lock_the_identifier(self):
+        store = otp.get_store()
+        code = store.issue(self.key, self.user.pk)
+        wrong = '000000' if code != '000000' else '111111'
+        self.assertIsNone(store.verify(self.key, wrong))
+        self.assertIsNone(store.verify(self.key, wrong))
+        with self.assertRaises(otp.OTPLocked):
+            store.verify(self.key, wrong)
+        # The right code no longer works, and no new one is handed out
+        with self.assertRaises(otp.OTPLocked):
+            store.verify(self.key, code)
+        with self.assertRaises(otp.OTPLocked):
+            store.issue(self.key, self.user.pk)
+        self.assertEqual(OneTimePassword.objects.get().attempts, 3)
+
+
+@override_settings(OTP={'STORE': 'user.otp.CacheOTPStore', 'CACHE_ALIAS': 'default', 'MAX_ATTEMPTS': 2})
+class CacheOTPStoreTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_issue_verify_and_lockout(self):
+        store = otp.get_store()
+        code = store.issue('phone:+919876543210', 7)
+        self.assertEqual(store.verify('phone:+919876543210', code), 7)
+
+        code = store.issue('phone:+919876543210', 7)
+        wrong = '000000' if code != '000000' else '111111'
+        self.assertIsNone(store.verify('phone:+919876543210', wrong))
+        with self.assertRaises(otp.OTPLocked):
+            store.verify('phone:+919876543210', wrong)
+        with self.assertRaises(otp.OTPLocked):
+            store.issue('phone:+919876543210', 7)
+
+    def test_guesses_from_every_worker_are_counted(self):
+        # Separate store instances stand in for separate worker processes
+        stores = [otp.get_store(), otp.get_store()]
+        code = stores[0].issue('email:jane@example.com', 7)
+        wrong = '000000' if code != '000000' else '111111'
+        self.assertIsNone(stores[0].verify('email:jane@example.com', wrong))
+        with self.assertRaises(otp.OTPLocked):
+            stores[1].verify('email:jane@example.com', wrong)
+        with self.assertRaises(otp.OTPLocked):
+            stores[0].verify('email:jane@example.com', code)
+
+    def test_code_is_redeemed_once(self):
+        store = otp.get_store()
+        code = store.issue('email:jane@example.com', 7)
+        self.assertEqual(store.verify('email:jane@example.com', code), 7)
+        self.assertIsNone(otp.get_store().verify('email:jane@example.com', code))
+
+    def test_store_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            otp.OTPStore(otp.config())
+
+
+class OTPLoginFlowTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='jane', email='jane@example.com', password='Test@1234')
+
+    def test_request_then_verify(self):
+        response = self.client.post('/api/auth/otp/request/', {'identifier': 'jane@example.com', 'password': 'Test@1234'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)  # queued, not sent in the request
+        call_command('send_outbox', stdout=StringIO())
+        code = re.search(r'\b\d{6}\b', mail.outbox[0].body).group()
+
+        response = self.client.post('/api/auth/otp/verify/', {'identifier': 'JANE@example.com', 'code': code})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['id'], self.user.pk)
+        self.assertIn('access', response.data)
+
+    @override_settings(OTP={'MAX_ATTEMPTS': 1, 'LOCKOUT': 600})
+    def test_lockout_returns_429(self):
+        self.client.post('/api/auth/otp/request/', {'identifier': 'jane@example.com', 'password': 'Test@1234'})
+        response = self.client.post('/api/auth/otp/verify/', {'email': 'jane@example.com', 'code': 'wrong'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
@@ -0,0 +1,66 @@
+from unittest import mock
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from .. import ratelimit
+from ..models import User
+
+LIMITS = {'ALIAS': 'default', 'RATES': {'ip': (100, 60), 'identifier': (3, 60), 'vendor_id': (2, 60)}}
+
+
+@override_settings(AUTH_RATE_LIMIT=LIMITS)
+class SlidingWindowTests(SimpleTestCase):
+    def setUp(self):
+        ratelimit._store().clear()
+        self.keys = [('k', 4, 60)]
+
+    def test_previous_window_slides_out(self):
+        for _ in range(4):
+            ratelimit.hit(self.keys, now=10)
+        self.assertEqual(ratelimit.retry_after(self.keys, now=59), 1)
+        # 10s into the next window the estimate is 4 * 50/60 = 3.3 hits
+        self.assertEqual(ratelimit.retry_after(self.keys, now=70), 0)
+        ratelimit.hit(self.keys, now=70)
+        # 4.3 hits: wait until the old window weighs less than 3 (at 75s)
+        self.assertEqual(ratelimit.retry_after(self.keys, now=70), 5)
+
+
+@override_settings(AUTH_RATE_LIMIT=LIMITS)
+class AuthRateThrottleTests(APITestCase):
+    def setUp(self):
+        ratelimit._store().clear()
+        # Keep every request in one window so the limits are exact
+        clock = mock.patch.object(ratelimit, 'time', mock.Mock(time=lambda: 1_000_000.0))
+        clock.start()
+        self.addCleanup(clock.stop)
+        User.objects.create_user(username='jane', email='jane@example.com', password='Test@1234')
+        User.objects.create_user(username='acme', password='Test@1234', role='vendor', vendor_id='UPLKO1234')
+
+    def test_login_is_rejected_before_the_user_is_looked_up(self):
+        for _ in range(3):
+            self.assertEqual(self.client.post('/api/auth/login/', {'username': 'jane', 'password': 'nope'}).status_code, 401)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/auth/login/', {'username': 'JANE', 'password': 'Test@1234'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+        self.assertFalse([q for q in queries.captured_queries if 'user_user' in q['sql']])
+
+        # Other identifiers are unaffected
+        self.assertEqual(self.client.post('/api/auth/login/', {'username': 'acme', 'password': 'Test@1234'}).status_code, 200)
+
+    def test_vendor_logins_are_limited_per_vendor_id(self):
+        payload = {'identifier': 'UPLKO1234', 'password': 'nope', 'role': 'vendor'}
+        for _ in range(2):
+            self.assertEqual(self.client.post('/api/auth/otp/request/', payload).status_code, 400)
+        self.assertEqual(self.client.post('/api/auth/otp/request/', payload).status_code, 429)
+
+    @override_settings(AUTH_RATE_LIMIT={**LIMITS, 'RATES': {**LIMITS['RATES'], 'ip': (2, 60)}})
+    def test_forged_forwarded_for_does_not_reset_the_ip_bucket(self):
+        for n in range(2):
+            response = self.client.post('/api/auth/login/', {'username': f'user{n}', 'password': 'nope'},
+                                        HTTP_X_FORWARDED_FOR=f'10.0.0.{n}')
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post('/api/auth/login/', {'username': 'user9', 'password': 'nope'},
+                                    HTTP_X_FORWARDED_FOR='1.2.3.4')
+        self.assertEqual(response.status_code, 429)
@@ -0,0 +1,70 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from .. import blacklist
+from ..models import User
+from ..tokens import RefreshToken
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = blacklist.BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f'jti-{i}' for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+@override_settings(TOKEN_BLACKLIST_FILTER={'REFRESH_INTERVAL': 60})
+class TokenBlacklistTests(APITestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        blacklist.reset()
+        self.user = User.objects.create_user(username='jane', password='Test@1234')
+
+    def blacklist_queries(self, token):
+        with CaptureQueriesContext(connection) as queries:
+            RefreshToken(token)
+        return [q for q in queries.captured_queries if 'token_blacklist_blacklistedtoken' in q['sql']]
+
+    def test_valid_token_check_skips_the_database(self):
+        for _ in range(3):
+            RefreshToken.for_user(self.user).blacklist()
+        token = str(RefreshToken.for_user(self.user))
+        self.blacklist_queries(token)  # loads the filter
+        self.assertFalse(self.blacklist_queries(token))
+
+    def test_token_blacklisted_elsewhere_is_rejected_before_the_refresh(self):
+        token = RefreshToken.for_user(self.user)
+        self.blacklist_queries(str(token))  # loads the filter
+        # Another process blacklists it; this process's filter has not seen it
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+        self.assertEqual(self.client.post('/api/auth/token/refresh/', {'refresh': str(token)}).status_code, 401)
+
+    def test_rotated_token_cannot_be_reused(self):
+        token = str(RefreshToken.for_user(self.user))
+        self.blacklist_queries(token)
+        self.assertEqual(self.client.post('/api/auth/token/refresh/', {'refresh': token}).status_code, 200)
+        self.assertEqual(self.client.post('/api/auth/token/refresh/', {'refresh': token}).status_code, 401)
+
+    def test_prune_removes_expired_tokens_in_chunks(self):
+        live = RefreshToken.for_user(self.user)
+        for _ in range(5):
+            RefreshToken.for_user(self.user).blacklist()
+        OutstandingToken.objects.exclude(jti=live['jti']).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        out = StringIO()
+        call_command('prune_token_blacklist', chunk_size=2, stdout=out)
+        self.assertIn('Pruned 5', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live['jti']])
+        self.assertFalse(BlacklistedToken.objects.exists())
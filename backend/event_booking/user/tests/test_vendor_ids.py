@@ -0,0 +1,58 @@
+from importlib import import_module
+from django.apps import apps
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from .. import vendor_ids
+from ..models import User, VendorIdSequence
+
+
+class VendorIdAllocatorTests(TestCase):
+    def setUp(self):
+        vendor_ids.reset()
+
+    def make_vendor(self, n):
+        return User.objects.create_user(username=f'vendor{n}', password='Test@1234', role='vendor',
+                                        state='Uttar Pradesh', city='Lucknow')
+
+    def test_vendors_in_one_city_get_sequential_ids(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.make_vendor(0)
+        self.assertEqual(first.vendor_id, 'UTLUC0001')
+
+        with CaptureQueriesContext(connection) as queries:
+            for n in range(1, 20):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.make_vendor(n)
+        # The whole batch came out of the first reserved block
+        self.assertFalse([q for q in queries.captured_queries if 'user_vendoridsequence' in q['sql']])
+        self.assertEqual(
+            sorted(User.objects.values_list('vendor_id', flat=True)),
+            [f'UTLUC{n:04d}' for n in range(1, 21)],
+        )
+
+    def test_batch_reserves_exactly_what_it_needs(self):
+        ids = vendor_ids.allocate('MHMUM', 500)
+        self.assertEqual(ids[0], 'MHMUM0001')
+        self.assertEqual(ids[-1], 'MHMUM0500')
+        self.assertEqual(VendorIdSequence.objects.get(prefix='MHMUM').last_value, 500)
+
+    def test_rolled_back_block_is_not_reused_from_memory(self):
+        try:
+            with transaction.atomic():
+                vendor_ids.allocate('DLDEL')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        # The sequence rolled back with the transaction, and so did the block
+        self.assertEqual(vendor_ids.allocate('DLDEL'), ['DLDEL0001'])
+
+    def test_migration_seeds_above_existing_ids(self):
+        User.objects.create_user(username='old', password='Test@1234', role='vendor', vendor_id='UPLKO9120')
+        User.objects.create_user(username='older', password='Test@1234', role='vendor', vendor_id='UPLKO1044')
+        # Two-letter city names give four-character prefixes
+        User.objects.create_user(username='short', password='Test@1234', role='vendor', vendor_id='DEUD0042')
+        VendorIdSequence.objects.all().delete()
+        import_module('user.migrations.0006_vendoridsequence').seed_sequences(apps, None)
+        self.assertEqual(vendor_ids.allocate('UPLKO'), ['UPLKO9121'])
+        self.assertEqual(vendor_ids.allocate(vendor_ids.prefix_for('Delhi', 'Ud')), ['DEUD0043'])
@@ -0,0 +1,38 @@
+from django.core.cache import caches
+from django.db import connection
+from rest_framework.test import APITestCase
+from ..models import User
+
+
+class RegisterViewTests(APITestCase):
+    def setUp(self):
+        caches['idempotency'].clear()
+        self.payload = {
+            'username': 'testuser',
+            'email': 'test@example.com',
+            'password': 'Test@1234',
+            'password2': 'Test@1234',
+        }
+
+    def test_register_retry_with_idempotency_key_creates_one_user(self):
+        first = self.client.post('/api/auth/register/', self.payload, HTTP_IDEMPOTENCY_KEY='signup-1')
+        retry = self.client.post('/api/auth/register/', self.payload, HTTP_IDEMPOTENCY_KEY='signup-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data['user']['id'], first.data['user']['id'])
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_replay_mints_fresh_tokens_and_stores_no_secrets(self):
+        first = self.client.post('/api/auth/register/', self.payload, HTTP_IDEMPOTENCY_KEY='signup-2')
+        retry = self.client.post('/api/auth/register/', self.payload, HTTP_IDEMPOTENCY_KEY='signup-2')
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['user']['username'], 'testuser')
+        self.assertNotEqual(retry.data['refresh'], first.data['refresh'])
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT cache_key FROM idempotency_cache')
+            keys = [row[0].split(':', 2)[2] for row in cursor.fetchall()]
+        stored = repr([caches['idempotency'].get(key) for key in keys])
+        self.assertIn("'user': ", stored)
+        for secret in (first.data['refresh'], first.data['access'], 'Test@1234'):
+            self.assertNotIn(secret, stored)
@@ -0,0 +1,22 @@
+"""Refresh tokens whose blacklist check goes through ``user.blacklist``."""
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from . import blacklist
+
+
+class RefreshToken(BaseRefreshToken):
+    def check_blacklist(self):
+        # Only tokens the Bloom filter cannot rule out cost a query
+        if blacklist.might_be_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    token_class = RefreshToken
@@ -0,0 +1,89 @@
+"""Collision-free vendor IDs: ``<state 2><city 3><sequence number>``.
+
+Numbers come from one ``VendorIdSequence`` row per prefix, advanced with a
+single conditional ``UPDATE``. Each process reserves a block of
+``VENDOR_ID_BLOCK_SIZE`` numbers at a time and hands them out from memory, so
+a burst of sign-ups in one city touches the sequence row once per block
+instead of once per vendor. The unused rest of a block only becomes available
+once the transaction that reserved it has committed; a rolled-back
+reservation never leaks numbers another process may hand out again.
+"""
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+DEFAULT_BLOCK_SIZE = 20
+NUMBER_WIDTH = 4
+
+_pool = {}  # prefix -> (next number, last number) reserved by this process
+_lock = threading.Lock()
+
+
+def prefix_for(state, city):
+    state_code = (state[:2] if state else "XX").upper()
+    city_code = (city[:3] if city else "XXX").upper()
+    return f"{state_code}{city_code}"
+
+
+def format_id(prefix, number):
+    return f"{prefix}{number:0{NUMBER_WIDTH}d}"
+
+
+def _block_size():
+    return getattr(settings, 'VENDOR_ID_BLOCK_SIZE', DEFAULT_BLOCK_SIZE)
+
+
+def _reserve(prefix, count):
+    """Advance the prefix's sequence by ``count``; returns ``(first, last)``."""
+    from .models import VendorIdSequence
+
+    with transaction.atomic():
+        sequence = VendorIdSequence.objects.filter(prefix=prefix)
+        if not sequence.update(last_value=F('last_value') + count):
+            try:
+                with transaction.atomic():
+                    VendorIdSequence.objects.create(prefix=prefix, last_value=count)
+                return 1, count
+            except IntegrityError:
+                # Another process created the row first
+                sequence.update(last_value=F('last_value') + count)
+        last = sequence.values_list('last_value', flat=True).get()
+    return last - count + 1, last
+
+
+def _take(prefix, count):
+    with _lock:
+        start, end = _pool.get(prefix, (1, 0))
+        taken = min(count, end - start + 1)
+        if taken <= 0:
+            return []
+        _pool[prefix] = (start + taken, end)
+        return list(range(start, start + taken))
+
+
+def _publish(prefix, block):
+    with _lock:
+        start, end = _pool.get(prefix, (1, 0))
+        if start > end:
+            _pool[prefix] = block
+
+
+def allocate(prefix, count=1):
+    """Return ``count`` new, unused vendor IDs under ``prefix``."""
+    numbers = _take(prefix, count)
+    missing = count - len(numbers)
+    if missing:
+        first, last = _reserve(prefix, max(missing, _block_size()))
+        numbers.extend(range(first, first + missing))
+        if first + missing <= last:
+            spare = (first + missing, last)
+            transaction.on_commit(lambda: _publish(prefix, spare))
+    return [format_id(prefix, number) for number in numbers]
+
+
+def reset():
+    """Forget this process's reserved blocks (used by tests)."""
+    with _lock:
+        _pool.clear()
@@ -2,51 +2,65 @@ from rest_framework import viewsets,generics
 from rest_framework import status,permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser
 from .models import User
 from .serializers import UserSerializer,RegisterSerializer,VendorSerializer
+from .bulk_import import FORMATS, import_users, read_rows
 from django.template.loader import render_to_string
 # Allow login by username OR email by customizing the TokenObtainPair serializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.conf import settings
-from django.core.mail import EmailMessage
-import random
+from notifications import outbox
+import csv
+import io
 import logging
+from itertools import islice
 from django.contrib.auth import authenticate
-
-UserModel = get_user_model()
+from event_booking.idempotency import idempotent
+from . import otp
+from .ratelimit import AuthRateThrottle
+from .tokens import RefreshToken
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
-    """Accept either username or email in the 'username' field when obtaining tokens."""
-
-    def validate(self, attrs):
-        # attrs typically contains 'username' and 'password'
-        identifier = attrs.get(self.username_field)
-        # If identifier looks like an email, try to map it to a username
-        if identifier and "@" in identifier:
-            try:
-                user = UserModel.objects.get(email__iexact=identifier)
-                # replace the identifier with the user's username and continue
-                attrs[self.username_field] = getattr(user, self.username_field)
-            except UserModel.DoesNotExist:
-                # leave attrs untouched; super() will handle invalid credentials
-                pass
+    """Accept either username or email in the 'username' field when obtaining tokens.
 
-        return super().validate(attrs)
+    The lookup itself happens in user.backends.MultiIdentifierBackend, which
+    super().validate() reaches through authenticate().
+    """
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    # Over-limit logins are turned away before the password is hashed
+    throttle_classes = [AuthRateThrottle]
+    throttle_scope = 'login'
+
+def _registered_user_id(data):
+    # Only the new user's id is kept for Idempotency-Key replays, never tokens
+    return {'user': data['user']['id']}
+
+
+def _registration_response(data):
+    user = User.objects.get(pk=data['user'])
+    refresh = RefreshToken.for_user(user)
+    return {
+        'user': UserSerializer(user).data,
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+    }
+
 
 class RegisterView( generics.CreateAPIView):
     permission_classes = [AllowAny]
     serializer_class = RegisterSerializer
+    throttle_classes = [AuthRateThrottle]
+    throttle_scope = 'register'
 
+    @idempotent(dump=_registered_user_id, load=_registration_response)
     def post(self, request, *args, **kwargs):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
@@ -65,12 +79,9 @@ class RegisterView( generics.CreateAPIView):
                         'user': user,
                     })
 
-                from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', None)
-
+                # Sent by the outbox worker, not inside the request
                 if user.email:
-                    msg = EmailMessage(subject, message, from_email, [user.email])
-                    msg.content_subtype = "html"
-                    msg.send(fail_silently=False)
+                    outbox.enqueue(subject, message, [user.email])
 
             except Exception as e:
                 logging.getLogger(__name__).exception("Email failed")
@@ -101,11 +112,46 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
+    @action(detail=False, methods=['post'], url_path='import',
+            permission_classes=[IsAdminUser], parser_classes=[MultiPartParser])
+    def import_users(self, request):
+        """Bulk-create users/vendors from a spreadsheet: POST multipart file=<.csv|.jsonl>
+        (optionally file_format=csv|jsonl). Larger files go through manage.py import_users.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "Upload the rows as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get('file_format') or upload.name.rsplit('.', 1)[-1].lower()
+        if fmt not in FORMATS:
+            return Response({"detail": f"file_format must be one of {', '.join(FORMATS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        limit = settings.USER_IMPORT_MAX_API_ROWS
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            rows = list(islice(read_rows(stream, fmt), limit + 1))
+        except (UnicodeDecodeError, csv.Error) as exc:
+            return Response({"detail": f"Could not read the file: {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > limit:
+            return Response({"detail": f"At most {limit} rows per upload; use manage.py import_users for more."},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        # Hashed in this process: a request must not fork a worker pool
+        result = import_users(rows, workers=1)
+        return Response({
+            'created': result['created'],
+            'failed': len(result['errors']),
+            'errors': result['errors'],
+        })
+
 
 class OTPRequestView(APIView):
-    """Request an OTP for a given phone number. Stores OTP in cache with a short TTL.
+    """Request an OTP for a given phone number. Stores OTP in the shared OTP
+    store (user.otp) with a short TTL.
     """
     permission_classes = [AllowAny]
+    throttle_classes = [AuthRateThrottle]
+    throttle_scope = 'otp'
 
     def post(self, request, *args, **kwargs):
         identifier = request.data.get('identifier')
@@ -119,13 +165,10 @@ class OTPRequestView(APIView):
 
         # ===== VENDOR LOGIN (NO OTP) =====
         if role == "vendor":
-            user = User.objects.filter(vendor_id__iexact=identifier).first()
+            # One indexed lookup by vendor ID, then the password check
+            user = authenticate(request, username=identifier, password=password, lookup='vendor_id')
             if not user:
-                return Response({"detail": "Invalid Vendor ID"}, status=400)
-
-            user_auth = authenticate(request, username=user.username, password=password)
-            if not user_auth:
-                return Response({"detail": "Invalid credentials"}, status=400)
+                return Response({"detail": "Invalid Vendor ID or password"}, status=400)
 
             #  NO OTP FOR VENDOR
             refresh = RefreshToken.for_user(user)
@@ -139,29 +182,18 @@ class OTPRequestView(APIView):
 
         # ===== USER LOGIN (OTP FLOW) =====
         else:
-            user = User.objects.filter(email__iexact=identifier).first()
+            user = authenticate(request, username=identifier, password=password, lookup='email')
             if not user:
-                return Response({"detail": "Invalid email"}, status=400)
-
-            user_auth = authenticate(request, username=user.username, password=password)
-            if not user_auth:
-                return Response({"detail": "Invalid credentials"}, status=400)
+                return Response({"detail": "Invalid email or password"}, status=400)
 
             # ===== OTP GENERATION =====
-            otp = f"{random.randint(100000, 999999):06d}"
-            key = f"otp:email:{user.email}"
+            code = otp.get_store().issue(otp.identifier_for('email', user.email), user.id)
 
-            cache.set(key, {"code": otp, "user_id": user.id}, timeout=300)
-
-            # send email
+            # queue the email; the body holds the code, so it is wiped once sent
             try:
                 subject = "Your login OTP"
-                message = render_to_string('email/otp_email.html', {'otp': otp, 'user': user})
-                from_email = settings.EMAIL_HOST_USER
-
-                msg = EmailMessage(subject, message, from_email, [user.email])
-                msg.content_subtype = "html"
-                msg.send(fail_silently=True)
+                message = render_to_string('email/otp_email.html', {'otp': code, 'user': user})
+                outbox.enqueue(subject, message, [user.email], from_email=settings.EMAIL_HOST_USER, sensitive=True)
             except Exception:
                 logging.getLogger(__name__).exception("OTP email failed")
 
@@ -185,29 +217,28 @@ class OTPVerifyView(APIView):
         if not code or (not identifier and not phone and not email):
             return Response({"detail": "Identifier and code are required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # determine cache key
+        # determine store key
         if phone:
-            cache_key = f"otp:phone:{phone}"
+            key = otp.identifier_for('phone', phone)
         elif email:
-            cache_key = f"otp:email:{email}"
+            key = otp.identifier_for('email', email)
         else:
             if '@' in identifier:
-                cache_key = f"otp:email:{identifier}"
+                key = otp.identifier_for('email', identifier)
             else:
-                cache_key = f"otp:phone:{identifier}"
+                key = otp.identifier_for('phone', identifier)
 
-        data = cache.get(cache_key)
-        if not data or str(data.get('code')) != str(code):
+        # A correct code is consumed; wrong ones count towards the lockout
+        user_id = otp.get_store().verify(key, str(code))
+        if user_id is None:
             return Response({"detail": "Invalid or expired OTP."}, status=status.HTTP_400_BAD_REQUEST)
 
         # lookup user
         try:
-            user = User.objects.get(id=data.get('user_id'))
+            user = User.objects.get(id=user_id)
         except User.DoesNotExist:
             return Response({"detail": "User not found."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # OTP valid -> clear cache and return tokens
-        cache.delete(cache_key)
         refresh = RefreshToken.for_user(user)
         return Response({
             'user': UserSerializer(user).data,
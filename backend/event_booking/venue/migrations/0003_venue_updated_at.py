@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    Venue = apps.get_model('venue', 'Venue')
+    Venue.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venue', '0002_venue_description_venue_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venue',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
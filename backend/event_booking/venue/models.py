@@ -9,6 +9,8 @@ class Venue(models.Model):
     description = models.TextField(blank=True, null=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='venues')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Feeds the catalog's ETag / Last-Modified validators
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
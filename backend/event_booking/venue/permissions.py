@@ -10,4 +10,10 @@ class IsAdminOrReadOnly(BasePermission):
         # SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
         if request.method in SAFE_METHODS:
             return True
-        return request.user and request.user.is_staff
\ No newline at end of file
+        return request.user and request.user.is_staff
+
+
+class IsVendor(BasePermission):
+    """Only vendor accounts (User.role == 'vendor')."""
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.role == 'vendor')
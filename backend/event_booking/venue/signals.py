@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bookings import occupancy
+from event_booking import response_cache
+from .models import Venue
+
+
+@receiver([post_save, post_delete], sender=Venue)
+def invalidate_venue_responses(sender, instance, **kwargs):
+    response_cache.bump('venue')
+    # The owner's occupancy report lists every venue they own
+    occupancy.invalidate(instance.created_by_id)
@@ -1,3 +1,171 @@
-from django.test import TestCase
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from bookings import availability, reservations
+from bookings.models import VenueBooking, VenueCalendarMonth
+from event_booking import response_cache
+from event_booking.testing import QueryCountGuardMixin
+from user.models import User
+from .models import Venue
 
-# Create your tests here.
+
+class VenueListQueryCountTests(QueryCountGuardMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='Test@1234')
+
+    def test_venues_list(self):
+        def add(count):
+            for _ in range(count):
+                Venue.objects.create(name='Ramada', location='Lucknow', capacity=300, created_by=self.user)
+        self.assertListQueriesConstant('/api/venues/', add)
+
+
+class VenueResponseCacheTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='Test@1234')
+        self.venue = Venue.objects.create(name='Ramada', location='Lucknow', capacity=300, created_by=self.user)
+
+    def venue_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q for q in queries.captured_queries if 'venue_venue' in q['sql']]
+
+    def test_repeat_reads_are_served_from_cache(self):
+        for url in ['/api/venues/', f'/api/venues/{self.venue.pk}/']:
+            _, first = self.venue_queries(url)
+            _, second = self.venue_queries(url)
+            self.assertTrue(first)
+            self.assertFalse(second)
+
+    def test_save_invalidates_cached_responses(self):
+        self.client.get('/api/venues/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.venue.name = 'Ramada Plaza'
+            self.venue.save()
+        response, queries = self.venue_queries('/api/venues/')
+        self.assertTrue(queries)
+        self.assertEqual(response.data['results'][0]['name'], 'Ramada Plaza')
+
+
+class VenueConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='Test@1234')
+        self.venue = Venue.objects.create(name='Ramada', location='Lucknow', capacity=300, created_by=self.user)
+
+    def test_list_and_detail_answer_304_until_a_write(self):
+        for url in ['/api/venues/', f'/api/venues/{self.venue.pk}/']:
+            etag = self.client.get(url).headers['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.venue.price += 1000
+                self.venue.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_missing_venue_is_still_404(self):
+        self.assertEqual(self.client.get('/api/venues/999/').status_code, 404)
+        self.assertEqual(self.client.get('/api/venues/abc/').status_code, 404)
+
+
+class GenerationTests(TestCase):
+    @override_settings(RESPONSE_CACHE={'ALIAS': 'default'})
+    def test_lost_generation_never_restarts_at_an_old_value(self):
+        cache.clear()
+        seen = {response_cache.generation('venue')}
+        for _ in range(3):
+            response_cache._bump('venue')
+            seen.add(response_cache.generation('venue'))
+        # Evicted (e.g. culled): the next generation is one never used before
+        cache.delete('response-gen:venue')
+        self.assertNotIn(response_cache.generation('venue'), seen)
+
+
+class SingleFlightTests(TestCase):
+    @override_settings(RESPONSE_CACHE={'ALIAS': 'default', 'WAIT': 5})
+    def test_concurrent_misses_build_once(self):
+        cache.clear()
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return {'ok': True}
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: response_cache.get_or_build('single-flight', build), range(8)))
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(results, [{'ok': True}] * 8)
+
+
+class VendorOccupancyTests(APITestCase):
+    def setUp(self):
+        caches[response_cache.config()['ALIAS']].clear()
+        self.vendor = User.objects.create_user(username='acme', password='Test@1234', role='vendor',
+                                               state='Uttar Pradesh', city='Lucknow')
+        self.hall = Venue.objects.create(name='Hall', location='Lucknow', capacity=300, price=1000, created_by=self.vendor)
+        self.lawn = Venue.objects.create(name='Lawn', location='Lucknow', capacity=500, price=500, created_by=self.vendor)
+        self.year = date.today().year + 1
+        self.url = f'/api/venues/occupancy/?from={self.year}-01&to={self.year}-02'
+        self.client.force_authenticate(self.vendor)
+
+    def book(self, venue, start, end, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return VenueBooking.objects.create(user=self.vendor, venue=venue, event_date=start, end_date=end, **kwargs)
+
+    def test_buckets_follow_bookings_and_match_a_rebuild(self):
+        booking = self.book(self.hall, date(self.year, 1, 30), date(self.year, 2, 2), status='confirmed')
+        self.book(self.lawn, date(self.year, 2, 10), date(self.year, 2, 10))
+
+        report = self.client.get(self.url).data
+        hall, lawn = report['venues']
+        self.assertEqual(hall['name'], 'Hall')
+        self.assertEqual([(m['month'], m['booked_days'], m['bookings'], m['revenue']) for m in hall['months']],
+                         [(f'{self.year}-01', 2, 1, Decimal('2000.00')), (f'{self.year}-02', 2, 1, Decimal('2000.00'))])
+        self.assertEqual(hall['months'][0]['occupancy'], round(2 / 31, 4))
+        self.assertEqual((lawn['booked_days'], report['revenue']), (1, Decimal('4500.00')))
+
+        snapshot = sorted(VenueCalendarMonth.objects.values_list('venue_id', 'month', 'booked_days', 'bookings', 'revenue'))
+        availability.rebuild()
+        self.assertEqual(sorted(VenueCalendarMonth.objects.values_list(
+            'venue_id', 'month', 'booked_days', 'bookings', 'revenue')), snapshot)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'cancelled'
+            booking.save()
+        hall = self.client.get(self.url).data['venues'][0]
+        self.assertEqual((hall['booked_days'], hall['revenue']), (0, Decimal('0.00')))
+
+    def test_report_is_cached_per_vendor(self):
+        self.book(self.hall, date(self.year, 1, 5), date(self.year, 1, 5))
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['venues'][0]['booked_days'], 1)
+        self.assertFalse([q for q in queries.captured_queries if 'bookings_venuecalendarmonth' in q['sql']])
+
+        # Expired holds drop out of the owner's report
+        VenueBooking.objects.update(hold_expires_at=timezone.now() - timedelta(minutes=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            reservations.expire_holds()
+        self.assertEqual(self.client.get(self.url).data['venues'][0]['months'][0]['bookings'], 0)
+
+    def test_only_vendors_see_their_own_venues(self):
+        other = User.objects.create_user(username='rival', password='Test@1234', role='vendor',
+                                         state='Uttar Pradesh', city='Lucknow')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url).data['venues'], [])
+        self.assertEqual(self.client.get('/api/venues/occupancy/?from=2026-13').status_code, 400)
+
+        self.client.force_authenticate(User.objects.create_user(username='guest', password='Test@1234'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
@@ -1,10 +1,23 @@
-from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from datetime import date, datetime, timedelta
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from bookings import availability, occupancy
+from event_booking.conditional import ConditionalGetMixin
+from event_booking.response_cache import CachedResponseMixin
 from .models import Venue
 from .serializers import VenueSerializer
-from .permissions import IsAdminOrReadOnly  
+from .permissions import IsAdminOrReadOnly, IsVendor
 
-class VenueViewSet(viewsets.ModelViewSet):
+AVAILABILITY_DEFAULT_DAYS = 90
+AVAILABILITY_MAX_DAYS = 366
+OCCUPANCY_DEFAULT_MONTHS = 12
+OCCUPANCY_MAX_MONTHS = 36
+
+
+class VenueViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    cache_namespace = 'venue'
     queryset = Venue.objects.all()
     serializer_class = VenueSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsAdminOrReadOnly]
@@ -12,3 +25,48 @@ class VenueViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         #setting the user who created the venue
         serializer.save(created_by=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def availability(self, request, pk=None):
+        """Booked and free dates for a venue: GET /api/venues/{id}/availability/?from=&to="""
+        try:
+            start = date.fromisoformat(request.query_params['from']) if request.query_params.get('from') else date.today()
+            end = date.fromisoformat(request.query_params['to']) if request.query_params.get('to') else start + timedelta(days=AVAILABILITY_DEFAULT_DAYS - 1)
+        except ValueError:
+            return Response({"detail": "Dates must be in YYYY-MM-DD format."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if end < start:
+            return Response({"detail": "'to' must not be before 'from'."}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= AVAILABILITY_MAX_DAYS:
+            return Response({"detail": f"Date range cannot exceed {AVAILABILITY_MAX_DAYS} days."}, status=status.HTTP_400_BAD_REQUEST)
+
+        venue = self.get_object()
+        booked = set(availability.booked_dates(venue.pk, start, end))
+        return Response({
+            'venue': venue.pk,
+            'from': start,
+            'to': end,
+            'booked': sorted(booked),
+            'available': [day for day in availability.date_range(start, end) if day not in booked],
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsVendor])
+    def occupancy(self, request):
+        """Monthly occupancy and revenue of the requesting vendor's venues:
+        GET /api/venues/occupancy/?from=YYYY-MM&to=YYYY-MM (default: the last 12 months)"""
+        try:
+            end = datetime.strptime(request.query_params['to'], '%Y-%m').date() if request.query_params.get('to') else date.today().replace(day=1)
+            if request.query_params.get('from'):
+                start = datetime.strptime(request.query_params['from'], '%Y-%m').date()
+            else:
+                first = end.year * 12 + end.month - OCCUPANCY_DEFAULT_MONTHS
+                start = date(first // 12, first % 12 + 1, 1)
+        except ValueError:
+            return Response({"detail": "Months must be in YYYY-MM format."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if end < start:
+            return Response({"detail": "'to' must not be before 'from'."}, status=status.HTTP_400_BAD_REQUEST)
+        if (end.year - start.year) * 12 + end.month - start.month >= OCCUPANCY_MAX_MONTHS:
+            return Response({"detail": f"Range cannot exceed {OCCUPANCY_MAX_MONTHS} months."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(occupancy.vendor_report(request.user.pk, start, end))
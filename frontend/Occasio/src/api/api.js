@@ -46,5 +46,28 @@ api.interceptors.response.use(
   }
 );
 
+/**
+ * Fetch every page of a cursor-paginated list endpoint.
+ * Follows the `next` link until the server stops returning one.
+ * @param {string} url - List endpoint, relative to the API base URL
+ * @param {Object} config - Extra axios config (e.g. headers)
+ * @param {Object} client - axios instance to use (defaults to `api`)
+ * @returns {Promise} Array with the results of every page
+ */
+export const getAllPages = async (url, config = {}, client = api) => {
+  const results = [];
+  let next = url;
+  while (next) {
+    const response = await client.get(next, config);
+    const data = response.data;
+    if (!Array.isArray(data?.results)) {
+      return Array.isArray(data) ? data : results;
+    }
+    results.push(...data.results);
+    next = data.next;
+  }
+  return results;
+};
+
 export default api;
 
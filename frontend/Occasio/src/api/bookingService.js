@@ -1,4 +1,4 @@
-import api from "./api";
+import api, { getAllPages } from "./api";
 
 /**
  * Booking API Service
@@ -21,13 +21,12 @@ export const bookingService = {
   },
 
   /**
-   * Get all bookings for the current user
+   * Get all of the current user's bookings (newest first)
    * @returns {Promise} Array of booking objects
    */
   getMyBookings: async () => {
     try {
-      const response = await api.get("bookings/");
-      return response.data;
+      return await getAllPages("bookings/");
     } catch (error) {
       throw error.response?.data || { error: "Failed to fetch bookings" };
     }
@@ -2,7 +2,7 @@
 import React, { useState, useEffect, useContext } from "react";
 import { useNavigate } from "react-router-dom";
 import { Container, Row, Col, Card, ListGroup, Button } from "react-bootstrap";
-import api from "../api/api";
+import { getAllPages } from "../api/api";
 import UiContext from "../context/UiContext";
 import BookingModal from "./BookingModal";
 import Img4 from "../Assets/HeroPic4.jpg";
@@ -28,9 +28,7 @@ export default function VenueListingPage() {
     setLoading(true);
     setError(null);
     try {
-      const response = await api.get("events/");
-      const eventList = Array.isArray(response.data) ? response.data : [];
-      setEvents(eventList);
+      setEvents(await getAllPages("events/"));
     } catch (err) {
       setError("Failed to load events. Please try again.");
       console.error("Events fetch error:", err);
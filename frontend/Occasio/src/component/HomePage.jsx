@@ -15,6 +15,7 @@ import Img10 from "../assets/HeroPic7.jpg";
 import Img11 from "../assets/HeroPic8.jpg";
 import { Link } from "react-router-dom";
 import axios from "axios"; 
+import { getAllPages } from "../api/api";
 
 const HomePage = () => {
   const heroImages = [Img11, Img7, Img5, Img10, Img6, Img4, Img8, Img9];
@@ -43,12 +44,12 @@ const HomePage = () => {
   useEffect(() => {
     const fetchVenues = async () => {
       try {
-        const response = await axios.get('http://localhost:8000/api/venues/', {
+        const venueList = await getAllPages('http://localhost:8000/api/venues/', {
           headers: {
             Authorization: `Bearer ${access}`
           }
-        });
-        setVenues(response.data);
+        }, axios);
+        setVenues(venueList);
       } catch (error) {
         console.error('Error fetching venues:', error);
       }
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useContext } from "react";
 import { useNavigate } from "react-router-dom";
 import bookingService from "../api/bookingService";
-import api from "../api/api";
+import api, { getAllPages } from "../api/api";
 import UiContext from "../context/UiContext";
 
 function MyBookings() {
@@ -26,8 +26,7 @@ function MyBookings() {
       setEventBookings(Array.isArray(eventData) ? eventData : []);
 
       // Fetch venue bookings
-      const venueResponse = await api.get("venue-bookings/");
-      setVenueBookings(Array.isArray(venueResponse.data) ? venueResponse.data : []);
+      setVenueBookings(await getAllPages("venue-bookings/"));
     } catch (err) {
       setError("Failed to load bookings. Please try again.");
       console.error("Booking fetch error:", err);
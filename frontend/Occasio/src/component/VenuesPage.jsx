@@ -4,7 +4,7 @@ import { Container, Row, Col, Card, Button, Alert } from "react-bootstrap";
 import { useNavigate } from "react-router-dom";
 import AuthContext from "../context/AuthContext";
 import UiContext from "../context/UiContext";
-import api from "../api/api";
+import { getAllPages } from "../api/api";
 import CustomVenueBookingForm from "./CustomVenueBookingForm";
 import Img4 from "../assets/HeroPic4.jpg";
 import Img2 from "../assets/HeroPic5.jpg";
@@ -31,9 +31,7 @@ export default function VenuesPage() {
     setLoading(true);
     setError(null);
     try {
-      const response = await api.get("venues/");
-      const venueList = Array.isArray(response.data) ? response.data : [];
-      setVenues(venueList);
+      setVenues(await getAllPages("venues/"));
     } catch (err) {
       setError("Failed to load venues. Please try again.");
       console.error("Venues fetch error:", err);